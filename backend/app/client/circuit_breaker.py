@@ -0,0 +1,200 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import functools
+import logging
+import os
+from collections import deque
+from enum import Enum
+from threading import Lock
+from time import monotonic
+from typing import Callable
+from typing import Optional
+
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import Timeout as RequestsTimeout
+from urllib3.exceptions import HTTPError as Urllib3Error
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    closed = "Closed"
+    open = "Open"
+    half_open = "HalfOpen"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a console endpoint whose circuit is open."""
+
+
+class ConsoleUnavailableError(Exception):
+    """Raised by clients when the console failed to serve a call."""
+
+
+TRANSPORT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    Urllib3Error,
+    RequestsConnectionError,
+    RequestsTimeout,
+    ConsoleUnavailableError,
+)
+
+
+def _error_status(error: BaseException) -> Optional[int]:
+    """HTTP status of an error of the console API clients, FastAPI or requests."""
+    for status in (
+        getattr(error, "status", None),
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_console_failure(error: BaseException) -> bool:
+    """Whether an error of a console call shows that the console is failing.
+
+    Only transport errors and 5xx (or 429) responses count, so that errors caused
+    by the call itself, such as an unknown device or a rejected configuration, don't
+    open the circuit. The clients wrap the errors of the console API clients, so the
+    errors they were raised from are checked too.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, TRANSPORT_ERRORS):
+            return True
+        status = _error_status(error)
+        if status is not None and (status >= 500 or status == 429):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitBreaker:
+    """Stops calling a console endpoint while most of its recent calls fail.
+
+    The circuit opens when at least `failure_ratio` of the last `window` calls failed,
+    with at least `min_calls` calls. Errors that are not console failures, see
+    `is_console_failure`, are raised without being recorded. Failures of a single
+    device among many healthy ones therefore don't open it. While open, calls fail
+    immediately for `reset_timeout` seconds, then a single trial call decides whether
+    it closes again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        failure_ratio: Optional[float] = None,
+        reset_timeout: Optional[float] = None,
+    ):
+        self.name = name
+        self.window = window or int(os.getenv("CIRCUIT_BREAKER_WINDOW", 20))
+        self.min_calls = min_calls or int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", 5))
+        self.failure_ratio = failure_ratio or float(
+            os.getenv("CIRCUIT_BREAKER_FAILURE_RATIO", 0.5)
+        )
+        self.reset_timeout = reset_timeout or float(
+            os.getenv("CIRCUIT_BREAKER_RESET_TIMEOUT", 30)
+        )
+        self.state = CircuitState.closed
+        self.opened_at: Optional[float] = None
+        self._results: deque[bool] = deque(maxlen=self.window)
+        self._trial_running = False
+        self._lock = Lock()
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == CircuitState.closed:
+                return
+            if self.state == CircuitState.open:
+                if monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(
+                        f"Console endpoint {self.name} is unavailable, retrying later"
+                    )
+                self.state = CircuitState.half_open
+            if self._trial_running:
+                raise CircuitOpenError(
+                    f"Console endpoint {self.name} is being checked, retrying later"
+                )
+            self._trial_running = True
+
+    def _after_call(self, success: Optional[bool]):
+        """Record the result of a call, None for errors that are not console failures."""
+        with self._lock:
+            if self.state == CircuitState.half_open:
+                self._trial_running = False
+                # The console answered the trial call, even with an error
+                if success is not False:
+                    logger.info(f"Circuit of console endpoint {self.name} closed")
+                    self.state = CircuitState.closed
+                    self._results.clear()
+                else:
+                    self._open()
+                return
+            if success is None:
+                return
+            self._results.append(success)
+            failures = self._results.count(False)
+            if len(
+                self._results
+            ) >= self.min_calls and failures >= self.failure_ratio * len(self._results):
+                logger.warning(
+                    f"Circuit of console endpoint {self.name} opened after {failures} "
+                    f"failures in {len(self._results)} calls"
+                )
+                self._open()
+
+    def _open(self):
+        self.state = CircuitState.open
+        self.opened_at = monotonic()
+        self._results.clear()
+
+    def call(self, function: Callable, *args, **kwargs):
+        self._before_call()
+        try:
+            result = function(*args, **kwargs)
+        except Exception as error:
+            self._after_call(False if is_console_failure(error) else None)
+            raise
+        self._after_call(True)
+        return result
+
+
+# Breakers of every console endpoint, by client and method
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breakers() -> dict[str, CircuitBreaker]:
+    return _breakers
+
+
+def guard_console_call(client: str, method: str, function: Callable) -> Callable:
+    """Wrap a console client method behind the circuit breaker of its endpoint."""
+    name = f"{client}.{method}"
+    breaker = _breakers.setdefault(name, CircuitBreaker(name))
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if os.getenv("CIRCUIT_BREAKER", "True") != "True":
+            return function(*args, **kwargs)
+        return breaker.call(function, *args, **kwargs)
+
+    return wrapper
@@ -14,17 +14,24 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import os
+from threading import Lock
 from typing import Optional
 
 from app.client.client_interface import ClientInferface
 from app.client.online_client_v1 import OnlineConsoleClientV1
 from app.client.online_client_v2 import OnlineConsoleClientV2
+from app.client.simulated_client import SimulatedConsoleClient
+from app.data_management.inference_deserialization import InferenceFormat
 
 # Singleton instances
 _singleton_clients: dict[str, Optional[ClientInferface]] = {
     "ONLINE V1": None,
     "ONLINE V2": None,
+    "SIMULATOR V1": None,
+    "SIMULATOR V2": None,
 }
+# Concurrent first callers must not create, or close, the same clients twice
+_singleton_lock = Lock()
 
 
 def is_allowed_client_type(client_type: str) -> bool:
@@ -42,11 +49,26 @@ def get_api_client() -> ClientInferface:
     if not is_allowed_client_type(client_type):
         raise ValueError(f"Unknown client type: {client_type}")
 
-    # Check if the client already exists
-    if _singleton_clients[client_type] is None:
-        if client_type == "ONLINE V1":
-            _singleton_clients[client_type] = OnlineConsoleClientV1()
-        elif client_type == "ONLINE V2":
-            _singleton_clients[client_type] = OnlineConsoleClientV2()
+    with _singleton_lock:
+        # Clients of the previously selected types are no longer used
+        for other_type, client in _singleton_clients.items():
+            if other_type != client_type and client is not None:
+                client.close()
+                _singleton_clients[other_type] = None
 
-    return _singleton_clients[client_type]
+        # Check if the client already exists
+        if _singleton_clients[client_type] is None:
+            if client_type == "ONLINE V1":
+                _singleton_clients[client_type] = OnlineConsoleClientV1()
+            elif client_type == "ONLINE V2":
+                _singleton_clients[client_type] = OnlineConsoleClientV2()
+            elif client_type == "SIMULATOR V1":
+                _singleton_clients[client_type] = SimulatedConsoleClient(
+                    InferenceFormat.ZONE_DETECTION
+                )
+            elif client_type == "SIMULATOR V2":
+                _singleton_clients[client_type] = SimulatedConsoleClient(
+                    InferenceFormat.OBJECT_DETECTION_EXPANDED
+                )
+
+        return _singleton_clients[client_type]
@@ -16,17 +16,37 @@
 import os
 from abc import ABC
 from abc import abstractmethod
+from threading import Event
+from typing import Any
+from typing import Callable
 from typing import Generic
 from typing import Optional
 from typing import TypeVar
 
+from app.client.circuit_breaker import guard_console_call
+from app.client.coalescing import coalesce_console_read
+from app.client.coalescing import invalidate_console_reads
+from app.client.coalescing import SingleFlight
 from app.schemas.common import StatusResponse
 from app.schemas.configuration import Configuration
 from app.schemas.device import Device
 from app.schemas.device import Devices
+from app.utils.metrics import observe_console_call
 
 
 Conf = TypeVar("Conf", bound=Configuration)
+# Methods that don't call the console
+LOCAL_METHODS = {"reload_client"}
+# Console reads shared by concurrent callers and cached briefly
+COALESCED_METHODS = {"get_devices", "get_device", "get_configuration"}
+# Methods changing devices, after which their reads are fetched again
+INVALIDATING_METHODS = {
+    "reload_client",
+    "update_configuration",
+    "set_configuration",
+    "start_upload_inference_data",
+    "stop_upload_inference_data",
+}
 
 
 class ClientInferface(ABC, Generic[Conf]):
@@ -34,6 +54,27 @@ class ClientInferface(ABC, Generic[Conf]):
 
     def __init__(self, timeout: int = None):
         self.timeout = timeout or int(os.getenv("API_TIMEOUT", 60))
+        self.console_reads = SingleFlight()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Record the latency of every method of the interface implemented by clients,
+        # guard the console calls with circuit breakers and coalesce the reads
+        for name in ClientInferface.__abstractmethods__:
+            method = cls.__dict__.get(name)
+            if method is None:
+                continue
+            method = observe_console_call(cls.__name__, name, method)
+            if name not in LOCAL_METHODS:
+                method = guard_console_call(cls.__name__, name, method)
+            if name in COALESCED_METHODS:
+                method = coalesce_console_read(cls.__name__, name, method)
+            elif name in INVALIDATING_METHODS:
+                method = invalidate_console_reads(method)
+            setattr(cls, name, method)
+
+    def close(self):
+        """Release the resources of a client that is no longer used."""
 
     @abstractmethod
     def reload_client(self):
@@ -70,7 +111,7 @@ class ClientInferface(ABC, Generic[Conf]):
         """
 
     @abstractmethod
-    async def update_configuration(
+    def update_configuration(
         self, device_id: str, configuration: Conf
     ) -> StatusResponse:
         """Update some configuration values in a device.
@@ -83,9 +124,7 @@ class ClientInferface(ABC, Generic[Conf]):
         """
 
     @abstractmethod
-    async def set_configuration(
-        self, device_id: str, configuration: Conf
-    ) -> StatusResponse:
+    def set_configuration(self, device_id: str, configuration: Conf) -> StatusResponse:
         """
         Replace the configuration in a device with the one provided by the caller.
 
@@ -122,15 +161,44 @@ class ClientInferface(ABC, Generic[Conf]):
             tuple[str | None, dict[str, str]]: Tuple containing the latest image (if requested) as string and its inference result
         """
 
+    @abstractmethod
+    def get_inferences_since(
+        self, device_id: str, since: Optional[int] = None, limit: int = 500
+    ) -> list[dict[str, Any]]:
+        """Get every inference result produced by the device after a given timestamp.
+
+        Args:
+            device_id (str): Device ID
+            since (Optional[int]): Timestamp, in UTC epoch microseconds, of the last
+                inference already processed. If None, only the latest inference is returned.
+            limit (int): Maximum number of inferences to retrieve in one call. When
+                more were produced, the oldest are returned and the next call continues
+                after the last one.
+
+        Returns:
+            list[dict[str, Any]]: Inferences (id, timestamp, timestamp_us, the
+                timestamp in UTC epoch microseconds, and content), oldest first.
+                Inferences with an invalid timestamp are dropped.
+        """
+
     @abstractmethod
     def start_upload_inference_data(
-        self, device_id: str, get_image: bool = False
+        self,
+        device_id: str,
+        get_image: bool = False,
+        cancel_event: Optional[Event] = None,
+        progress: Optional[Callable[[int, float], None]] = None,
     ) -> StatusResponse:
         """Start the upload process for inference data from a specified device.
 
+        Waits, with backoff, until the device produces its first new data.
+
         Args:
             device_id (str): Device ID
             get_image (bool): Whether to get the image or not
+            cancel_event (Optional[Event]): Event that aborts the wait when set
+            progress (Optional[Callable[[int, float], None]]): Called with the number
+                of checks and the elapsed seconds while waiting for the device
 
         Returns:
             dict: Dictionary containing the status and message of the upload process
@@ -0,0 +1,168 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import functools
+import inspect
+import logging
+import os
+from collections.abc import Hashable
+from threading import Event
+from threading import Lock
+from time import monotonic
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from app.utils.metrics import CONSOLE_COALESCED_READS
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A console read in progress, shared by every caller asking for the same key."""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces identical concurrent console reads and caches their results briefly.
+
+    The first caller of a key runs the read, callers arriving while it is in flight
+    wait for its result instead of calling the console again, and the result is then
+    served for `ttl` seconds. Errors are shared with the waiting callers but never
+    cached. Invalidating a device drops its cached results and detaches the reads in
+    flight, whose results are then returned to their callers without being cached.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("CONSOLE_CACHE_TTL", 2))
+        self._cache: dict[Hashable, tuple[float, Any]] = {}
+        self._flights: dict[Hashable, _Flight] = {}
+        self._generation = 0
+        self._listeners: list[Callable[[Optional[str]], None]] = []
+        self._lock = Lock()
+
+    def do(self, key: tuple, function: Callable[[], Any]) -> tuple[Any, str]:
+        """Get the result of the read of `key`, running `function` only if needed.
+
+        Args:
+            key (tuple): Read identifier, starting with the method name and the device
+                id, if any.
+            function (Callable[[], Any]): Performs the read.
+
+        Returns:
+            tuple[Any, str]: Result, and whether it came from the `cache`, a `shared`
+                read or a `console` call.
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                if cached[0] > monotonic():
+                    return cached[1], "cache"
+                del self._cache[key]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight(self._generation)
+                self._flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, "shared"
+
+        try:
+            flight.result = function()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                if (
+                    flight.error is None
+                    and self.ttl > 0
+                    and flight.generation == self._generation
+                ):
+                    self._cache[key] = (monotonic() + self.ttl, flight.result)
+            flight.done.set()
+        return flight.result, "console"
+
+    def add_invalidation_listener(self, listener: Callable[[Optional[str]], None]):
+        """Call `listener` with the device id, or None, on every invalidation."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def invalidate(self, device_id: Optional[str] = None):
+        """Forget the reads of a device, or every read if `device_id` is None.
+
+        Reads of the device list are always forgotten, as they describe every device.
+        """
+        with self._lock:
+            self._generation += 1
+            for entries in (self._cache, self._flights):
+                for key in list(entries):
+                    if device_id is None or key[1] in (None, device_id):
+                        del entries[key]
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(device_id)
+
+
+def coalesce_console_read(client: str, method: str, function: Callable) -> Callable:
+    """Wrap a console client read method behind the SingleFlight of its client.
+
+    Arguments are normalized with the method signature, so that positional and
+    keyword calls share the same key.
+    """
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        arguments = signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        values = tuple(arguments.arguments.values())[1:]
+        key = (method, *(values or (None,)))
+        result, outcome = self.console_reads.do(
+            key, lambda: function(self, *args, **kwargs)
+        )
+        CONSOLE_COALESCED_READS.labels(client, method, outcome).inc()
+        # Callers may modify the models they get
+        return result.model_copy(deep=True)
+
+    return wrapper
+
+
+def invalidate_console_reads(method: Callable) -> Callable:
+    """Wrap a console client method changing devices, forgetting the reads of the
+    device it changes, or every read if it takes no device, once it returns or fails."""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            arguments = signature.bind(self, *args, **kwargs)
+            self.console_reads.invalidate(arguments.arguments.get("device_id"))
+
+    return wrapper
@@ -16,16 +16,24 @@
 import json
 import logging
 from base64 import b64encode
-from time import time
+from threading import Event
+from threading import Lock
+from typing import Any
+from typing import Callable
 from typing import Optional
 
 from app.client.client_interface import ClientInferface
 from app.client.client_interface import Device
 from app.client.client_interface import Devices
 from app.client.client_interface import StatusResponse
+from app.client.token_manager import TokenManager
 from app.config.get_console_settings import get_console_settings
 from app.schemas.configuration import ConfigurationV1
-from app.utils.auth import get_token
+from app.utils.backoff import wait_until
+from app.utils.metrics import CONSOLE_TRUNCATED_READS
+from app.utils.metrics import DROPPED_FRAMES
+from app.utils.timestamp import format_numeric_timestamp
+from app.utils.timestamp import parse_timestamp
 from console_api_client import ApiClient
 from console_api_client import ApiException
 from console_api_client import CommandParameterFileApi
@@ -48,59 +56,84 @@ def get_last_inference_id(response: list[GetInferenceResults200ResponseInner]) -
 
 
 class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
+    MAX_INFERENCES_PER_REQUEST = 10000
 
     def __init__(self, timeout=None):
         super().__init__(timeout)
         self.__api_client = None
-        self.token_expiry = time()
+        self.__client_lock = Lock()
+        self.token_manager = self._create_token_manager()
 
-    def _get_client(self):
+    def _create_token_manager(self) -> TokenManager:
+        token_manager = TokenManager()
+        token_manager.add_listener(self._update_access_token)
+        return token_manager
+
+    def _get_client(self, access_token: str):
         """
         Get autogenerated API Client to interact with Online Console
 
+        Args:
+            access_token (str): Access token used until the next refresh
+
         Returns:
             ApiClient: Python API Client
         """
+        logger.debug("Attempting to create Online Console API client.")
+        console_endpoint, _, _, _ = get_console_settings()
+        configuration = Configuration(host=console_endpoint)
+        api_client = ApiClient(
+            configuration=configuration,
+            header_name="Authorization",
+            header_value=f"Bearer {access_token}",
+        )
+        logger.info("Online Console API client successfully created.")
+        return api_client
+
+    def _update_access_token(self, access_token: str):
+        # Swap the header in place so that the connection pool is kept
+        with self.__client_lock:
+            if self.__api_client is not None:
+                self.__api_client.set_default_header(
+                    "Authorization", f"Bearer {access_token}"
+                )
+
+    def get_client(self):
         try:
-            logger.debug("Attempting to create Online Console API client.")
-            (
-                console_endpoint,
-                client_id,
-                client_secret,
-                portal_authorization_endpoint,
-            ) = get_console_settings()
-            access_token, expires_in = get_token(
-                client_id=client_id,
-                client_secret=client_secret,
-                portal_authorization_endpoint=portal_authorization_endpoint,
-            )
-
-            self.token_expiry = time() + expires_in - 10  # Add a safety buffer
-
-            configuration = Configuration(host=console_endpoint)
-            api_client = ApiClient(
-                configuration=configuration,
-                header_name="Authorization",
-                header_value=f"Bearer {access_token}",
-            )
-            logger.info("Online Console API client successfully created.")
-
-            return api_client
+            self.token_manager.get_access_token()
+            if self.__api_client is None:
+                with self.__client_lock:
+                    if self.__api_client is None:
+                        logger.info(
+                            "Initializing Online Console API client connection."
+                        )
+                        self.__api_client = self._get_client(
+                            self.token_manager.access_token
+                        )
+            return self.__api_client
         except Exception as e:
-            logger.error(f"Failed to create Online Console API client: {e}")
+            logger.error(
+                f"Failed to create Online Console API client: {e}", exc_info=True
+            )
             raise HTTPException(
                 status_code=500, detail=f"Unable to create API client: {str(e)}"
             )
 
-    def get_client(self):
-        if self.__api_client is None or time() >= self.token_expiry:
-            logger.info("Initializing Online Console API client connection.")
-            self.__api_client = self._get_client()
-        return self.__api_client
-
     def reload_client(self):
         logger.info("Reloading Online Console API client connection.")
-        self.__api_client = self._get_client()
+        with self.__client_lock:
+            self.__api_client = None
+        # The new token manager fetches new credentials and refreshes them
+        previous_token_manager = self.token_manager
+        self.token_manager = self._create_token_manager()
+        previous_token_manager.stop()
+        self.token_manager.refresh(force=True)
+        self.get_client()
+
+    def close(self):
+        self.token_manager.stop()
+        with self.__client_lock:
+            self.__api_client = None
 
     def get_devices(self) -> Devices:
         logger.debug("Fetching device list from Online Console.")
@@ -213,7 +246,7 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
             commands=[c.to_dict() for c in param.parameter.commands],
         )
 
-    async def update_configuration(
+    def update_configuration(
         self, device_id: str, configuration: ConfigurationV1
     ) -> StatusResponse:
         try:
@@ -256,7 +289,7 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
             )
             raise Exception(f"Transport error occurred: {str(transport_error)}")
 
-    async def set_configuration(
+    def set_configuration(
         self, device_id: str, configuration: ConfigurationV1
     ) -> StatusResponse:
         logger.debug(
@@ -421,8 +454,97 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
             )
             raise Exception(f"Transport error occurred: {str(transport_error)}")
 
+    def _get_inference_results(
+        self, device_id: str, number: int, since: Optional[int] = None
+    ) -> list:
+        # Results holding an inference from `since` on. Numeric timestamps have a
+        # fixed width, so they compare like their strings.
+        search_filter = (
+            "EXISTS(SELECT VALUE i FROM i IN c.Inferences "
+            f'WHERE i.T >= "{format_numeric_timestamp(since)}")'
+            if since
+            else None
+        )
+        try:
+            insight_api = InsightApi(self.get_client())
+            return insight_api.get_inference_results(
+                device_id=device_id,
+                filter=search_filter,
+                raw=1,
+                number_of_inferenceresults=number,
+                _request_timeout=self.timeout,
+            )
+        except ApiException as api_error:
+            logger.error(
+                f"API error while retrieving data from device id {device_id}: {api_error}"
+            )
+            raise Exception(
+                f"API error while retrieving data from device id {device_id}: {api_error}"
+            )
+        except (MaxRetryError, ReadTimeoutError) as transport_error:
+            logger.error(
+                f"Transport Error while retrieving data from device id {device_id}: {transport_error}"
+            )
+            raise Exception(f"Transport error occurred: {str(transport_error)}")
+
+    def get_inferences_since(
+        self, device_id: str, since: Optional[int] = None, limit: int = 500
+    ) -> list[dict[str, Any]]:
+        logger.debug(f"Fetching inferences for device ID '{device_id}' since {since}")
+        # The console filters the results from `since` on, and returns the most
+        # recent ones. Their oldest are needed when more than requested were
+        # produced since then, e.g. to catch up after an outage.
+        number = (
+            min(limit, OnlineConsoleClientV1.MAX_INFERENCES_PER_REQUEST) if since else 1
+        )
+        response = self._get_inference_results(device_id, number, since)
+        if since and len(response) >= number:
+            if number < OnlineConsoleClientV1.MAX_INFERENCES_PER_REQUEST:
+                number = OnlineConsoleClientV1.MAX_INFERENCES_PER_REQUEST
+                response = self._get_inference_results(device_id, number, since)
+            if len(response) >= number:
+                CONSOLE_TRUNCATED_READS.labels(
+                    client=type(self).__name__, method="get_inferences_since"
+                ).inc()
+                logger.warning(
+                    f"More than {number} inference results of device {device_id} "
+                    f"since {format_numeric_timestamp(since)}, the oldest are skipped"
+                )
+
+        inferences = []
+        for result in response:
+            for index, inference in enumerate(result.inference_result.inferences):
+                try:
+                    timestamp = parse_timestamp(inference.t)
+                except ValueError as e:
+                    DROPPED_FRAMES.labels(reason="invalid_timestamp").inc()
+                    logger.warning(f"Inference of device_id: {device_id} dropped: {e}")
+                    continue
+                # Older inferences of a result holding new ones
+                if since and timestamp < since:
+                    continue
+                inferences.append(
+                    (
+                        timestamp,
+                        {
+                            "id": f"{result.id}:{index}",
+                            "timestamp": inference.t,
+                            "timestamp_us": timestamp,
+                            "content": inference.o,
+                        },
+                    )
+                )
+
+        # Oldest first, the next call continues after the last one returned
+        inferences.sort(key=lambda x: x[0])
+        return [inference for _, inference in inferences[:limit]]
+
     def start_upload_inference_data(
-        self, device_id: str, get_image: bool = False
+        self,
+        device_id: str,
+        get_image: bool = False,
+        cancel_event: Optional[Event] = None,
+        progress: Optional[Callable[[int, float], None]] = None,
     ) -> StatusResponse:
         logger.debug(
             f"Starting upload inference data for device ID '{device_id}'. Get image: {get_image}"
@@ -430,7 +552,6 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
         try:
             device_api = DeviceCommandApi(self.get_client())
             insight_api = InsightApi(self.get_client())
-            start_time = time()
             time_out_secs = self.timeout
             if get_image:
                 response = insight_api.get_image_directories(
@@ -440,17 +561,18 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
                 response = device_api.start_upload_inference_result(
                     device_id, _request_timeout=self.timeout
                 )
-                while (
-                    insight_api.get_image_directories(device_id)[0].devices[0].image
-                    == previous_directories
-                ):
+
+                def device_started() -> bool:
                     logger.info("Waiting for the creation of new image directory...")
-                    if time() - start_time > time_out_secs:
-                        raise Exception("Timeout while waiting for device to start.")
+                    return (
+                        insight_api.get_image_directories(
+                            device_id, _request_timeout=self.timeout
+                        )[0]
+                        .devices[0]
+                        .image
+                        != previous_directories
+                    )
 
-                logger.debug(
-                    f"[start_upload_inference_data] Image directory created, status response: {response.result}"
-                )
             else:
                 response = insight_api.get_inference_results(
                     device_id,
@@ -461,19 +583,24 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
                 response = device_api.start_upload_inference_result(
                     device_id, _request_timeout=self.timeout
                 )
-                while last_inference_id == get_last_inference_id(
-                    insight_api.get_inference_results(
-                        device_id,
-                        number_of_inferenceresults=1,
-                        _request_timeout=self.timeout,
-                    )
-                ):
+
+                def device_started() -> bool:
                     logger.info("Waiting for the device to start...")
-                    if time() - start_time > time_out_secs:
-                        raise Exception("Timeout while waiting for device to start.")
-                logger.debug(
-                    f"[start_upload_inference_data] Device started, status response: {response.result}"
-                )
+                    return last_inference_id != get_last_inference_id(
+                        insight_api.get_inference_results(
+                            device_id,
+                            number_of_inferenceresults=1,
+                            _request_timeout=self.timeout,
+                        )
+                    )
+
+            if not wait_until(device_started, time_out_secs, cancel_event, progress):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise Exception("Cancelled while waiting for device to start.")
+                raise Exception("Timeout while waiting for device to start.")
+            logger.debug(
+                f"[start_upload_inference_data] Device started, status response: {response.result}"
+            )
             return StatusResponse(status=response.result)
         except ApiException as api_error:
             logger.error(
@@ -18,18 +18,26 @@ import datetime
 import logging
 import urllib
 from tempfile import TemporaryDirectory
+from threading import Event
+from threading import Lock
 from time import sleep
-from time import time
+from typing import Any
+from typing import Callable
 from typing import Optional
 
 from app.client.client_interface import ClientInferface
 from app.client.client_interface import StatusResponse
+from app.client.token_manager import TokenManager
 from app.config.get_console_settings import get_console_settings
 from app.schemas.configuration import ConfigurationV2
 from app.schemas.device import Device
 from app.schemas.device import Devices
-from app.utils.auth import get_token
+from app.utils.backoff import wait_until
+from app.utils.metrics import CONSOLE_TRUNCATED_READS
+from app.utils.metrics import DROPPED_FRAMES
 from app.utils.timestamp import convert_iso_timestamp_to_numeric
+from app.utils.timestamp import format_iso_timestamp
+from app.utils.timestamp import parse_timestamp
 from console_v2_api_client import ApiClient
 from console_v2_api_client import ApiException
 from console_v2_api_client import Configuration
@@ -75,44 +83,62 @@ def _process_configuration_for_sending(configuration: ConfigurationV2) -> dict:
 class OnlineConsoleClientV2(ClientInferface):
     NUM_RETRIES = 10
     WAIT_SECONDS = 0.25
+    MAX_INFERENCES_PER_PAGE = 500
+    MAX_CATCH_UP_PAGES = 20
 
     def __init__(self, timeout=None):
         super().__init__(timeout)
         self.__api_client = None
-        self.token_expiry = time()
+        self.__client_lock = Lock()
+        self.token_manager = self._create_token_manager()
 
-    def _get_client(self):
+    def _create_token_manager(self) -> TokenManager:
+        token_manager = TokenManager()
+        token_manager.add_listener(self._update_access_token)
+        return token_manager
+
+    def _get_client(self, access_token: str):
         """
         Get autogenerated API Client to interact with Online Console v2
 
+        Args:
+            access_token (str): Access token used until the next refresh
+
         Returns:
             ApiClient: Python API Client
         """
+        logger.debug("Attempting to create Online Console API v2 client.")
+        console_endpoint, _, _, _ = get_console_settings()
+        configuration = Configuration(host=console_endpoint)
+        api_client = ApiClient(
+            configuration=configuration,
+            header_name="Authorization",
+            header_value=f"Bearer {access_token}",
+        )
+        logger.info("Online Console API v2 client successfully created.")
+        return api_client
+
+    def _update_access_token(self, access_token: str):
+        # Swap the header in place so that the connection pool is kept
+        with self.__client_lock:
+            if self.__api_client is not None:
+                self.__api_client.set_default_header(
+                    "Authorization", f"Bearer {access_token}"
+                )
+
+    def get_client(self):
         try:
-            logger.debug("Attempting to create Online Console API v2 client.")
-            (
-                console_endpoint,
-                client_id,
-                client_secret,
-                portal_authorization_endpoint,
-            ) = get_console_settings()
-            access_token, expires_in = get_token(
-                client_id=client_id,
-                client_secret=client_secret,
-                portal_authorization_endpoint=portal_authorization_endpoint,
-            )
-
-            self.token_expiry = time() + expires_in - 10  # Add a safety buffer
-
-            configuration = Configuration(host=console_endpoint)
-            api_client = ApiClient(
-                configuration=configuration,
-                header_name="Authorization",
-                header_value=f"Bearer {access_token}",
-            )
-            logger.info("Online Console API v2 client successfully created.")
-
-            return api_client
+            self.token_manager.get_access_token()
+            if self.__api_client is None:
+                with self.__client_lock:
+                    if self.__api_client is None:
+                        logger.info(
+                            "Initializing Online Console API v2 client connection."
+                        )
+                        self.__api_client = self._get_client(
+                            self.token_manager.access_token
+                        )
+            return self.__api_client
         except Exception as e:
             logger.error(
                 f"Failed to create Online Console API v2 client: {e}", exc_info=True
@@ -121,15 +147,21 @@ class OnlineConsoleClientV2(ClientInferface):
                 status_code=500, detail=f"Unable to create API client: {str(e)}"
             )
 
-    def get_client(self):
-        if self.__api_client is None or time() >= self.token_expiry:
-            logger.info("Initializing Online Console API v2 client connection.")
-            self.__api_client = self._get_client()
-        return self.__api_client
-
     def reload_client(self):
         logger.info("Reloading Online Console API client connection.")
-        self.__api_client = self._get_client()
+        with self.__client_lock:
+            self.__api_client = None
+        # The new token manager fetches new credentials and refreshes them
+        previous_token_manager = self.token_manager
+        self.token_manager = self._create_token_manager()
+        previous_token_manager.stop()
+        self.token_manager.refresh(force=True)
+        self.get_client()
+
+    def close(self):
+        self.token_manager.stop()
+        with self.__client_lock:
+            self.__api_client = None
 
     def get_devices(self) -> Devices:
         logger.debug("Fetching device list from Online Console.")
@@ -256,7 +288,7 @@ class OnlineConsoleClientV2(ClientInferface):
 
         return validatedConfig
 
-    async def update_configuration(
+    def update_configuration(
         self, device_id: str, configuration: ConfigurationV2
     ) -> StatusResponse:
         device_command_api: DeviceCommandApi = DeviceCommandApi(self.get_client())
@@ -276,7 +308,7 @@ class OnlineConsoleClientV2(ClientInferface):
             ).result
         )
 
-    async def set_configuration(
+    def set_configuration(
         self, device_id: str, configuration: ConfigurationV2
     ) -> StatusResponse:
         raise ApiException("Online Console V2 does not support this endpoint")
@@ -428,6 +460,74 @@ class OnlineConsoleClientV2(ClientInferface):
         )
         return image_content, latest_inference
 
+    def get_inferences_since(
+        self, device_id: str, since: Optional[int] = None, limit: int = 500
+    ) -> list[dict[str, Any]]:
+        logger.debug(f"Fetching inferences for device ID '{device_id}' since {since}")
+        insight_api = InsightApi(self.get_client())
+        page_size = min(limit, OnlineConsoleClientV2.MAX_INFERENCES_PER_PAGE)
+        from_datetime = format_iso_timestamp(since) if since else None
+
+        inferences = []
+        continuation_token = None
+        pages = 0
+        try:
+            while True:
+                response: InferenceresultsGet200Response = (
+                    insight_api.inferenceresults_get(
+                        devices=[device_id],
+                        limit=page_size if since else 1,
+                        from_datetime=from_datetime,
+                        starting_after=continuation_token,
+                        _request_timeout=self.timeout,
+                    )
+                )
+                for result in response.inferences or []:
+                    for index, inference in enumerate(result.inferences or []):
+                        try:
+                            timestamp = parse_timestamp(inference.t)
+                        except ValueError as e:
+                            DROPPED_FRAMES.labels(reason="invalid_timestamp").inc()
+                            logger.warning(
+                                f"Inference of device_id: {device_id} dropped: {e}"
+                            )
+                            continue
+                        inferences.append(
+                            {
+                                "id": f"{result.id}:{index}",
+                                "timestamp": inference.t,
+                                "timestamp_us": timestamp,
+                                "content": inference.o,
+                            }
+                        )
+
+                pages += 1
+                continuation_token = response.continuation_token
+                # Every page is read, the order of the inferences is not guaranteed
+                if not since or not continuation_token:
+                    break
+                if pages >= OnlineConsoleClientV2.MAX_CATCH_UP_PAGES:
+                    CONSOLE_TRUNCATED_READS.labels(
+                        client=type(self).__name__, method="get_inferences_since"
+                    ).inc()
+                    logger.warning(
+                        f"More than {len(inferences)} inferences of device {device_id} "
+                        f"since {from_datetime}, some are skipped"
+                    )
+                    break
+        except ApiException as api_error:
+            logger.error(
+                f"API error while retrieving data from device id {device_id}: {api_error}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"API error while retrieving data from device id {device_id}: {api_error}"
+            )
+
+        # Oldest first, the next call continues after the last one returned
+        inferences.sort(key=lambda x: x["timestamp_us"])
+        return inferences[:limit]
+
     def _update_process_state(
         self, _device_id: str, _module_id: str, _process_state: int
     ) -> UpdateDeviceConfiguration200Response:
@@ -492,7 +592,11 @@ class OnlineConsoleClientV2(ClientInferface):
                 return folder_path
 
     def start_upload_inference_data(
-        self, device_id: str, get_image: bool = False
+        self,
+        device_id: str,
+        get_image: bool = False,
+        cancel_event: Optional[Event] = None,
+        progress: Optional[Callable[[int, float], None]] = None,
     ) -> StatusResponse:
 
         logger.debug(
@@ -561,19 +665,22 @@ class OnlineConsoleClientV2(ClientInferface):
                 .id
             )
 
-            start_time = time()
-            time_out_secs = 60
-            while (
-                latest_inference_id
-                == insight_api.inferenceresults_get(
-                    devices=[device_id], limit=1, _request_timeout=self.timeout
-                )
-                .inferences[0]
-                .id
-            ):
+            def device_started() -> bool:
                 logger.info("Waiting for the device to start...")
-                if time() - start_time > time_out_secs:
-                    raise Exception("Timeout while waiting for device to start.")
+                return (
+                    latest_inference_id
+                    != insight_api.inferenceresults_get(
+                        devices=[device_id], limit=1, _request_timeout=self.timeout
+                    )
+                    .inferences[0]
+                    .id
+                )
+
+            time_out_secs = 60
+            if not wait_until(device_started, time_out_secs, cancel_event, progress):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise Exception("Cancelled while waiting for device to start.")
+                raise Exception("Timeout while waiting for device to start.")
 
             logger.debug(
                 f"[start_upload_inference_data] Device started, status response: {response.result}"
@@ -0,0 +1,452 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import os
+import random
+import struct
+import zlib
+from base64 import b64encode
+from datetime import datetime
+from datetime import timezone
+from math import floor
+from threading import Event
+from threading import Lock
+from time import sleep
+from time import time
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from app.client.circuit_breaker import ConsoleUnavailableError
+from app.client.client_interface import ClientInferface
+from app.client.client_interface import StatusResponse
+from app.data_management.inference_deserialization import InferenceFormat
+from app.data_management.inference_serialization import serialize
+from app.schemas.configuration import Configuration
+from app.schemas.configuration import ConfigurationV1
+from app.schemas.configuration import ConfigurationV2
+from app.schemas.device import Device
+from app.schemas.device import Devices
+from app.utils.backoff import wait_until
+from app.utils.timestamp import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+def _to_numeric_timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y%m%d%H%M%S%f")[:-3]
+
+
+def _encode_png(width: int, height: int, rows: list[bytearray]) -> bytes:
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + chunk_type
+            + data
+            + struct.pack(">I", zlib.crc32(chunk_type + data))
+        )
+
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 1))
+        + chunk(b"IEND", b"")
+    )
+
+
+class SimulatedDevice:
+    """State of a simulated device: its configuration and its current upload session."""
+
+    def __init__(self, device_id: str, configuration: Configuration):
+        self.device_id = device_id
+        self.configuration = configuration
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    def is_streaming(self) -> bool:
+        return self.started_at is not None and self.stopped_at is None
+
+
+class SimulatedConsoleClient(ClientInferface):
+    """Local stand-in for the Online Console, for offline development and load testing.
+
+    Every simulated device produces synthetic inferences, in the FlatBuffers schema of
+    the simulated console version, at a fixed rate while its upload is started.
+    Inferences are derived from the device id and their index, so they are generated
+    on request instead of being stored, and the same seed always produces the same data.
+    The behavior is configured with the following environment variables:
+
+    - SIMULATOR_DEVICE_COUNT: number of simulated devices.
+    - SIMULATOR_INFERENCE_RATE: inferences produced per second by each device.
+    - SIMULATOR_DETECTIONS: average number of detections per inference.
+    - SIMULATOR_IMAGE_SIZE: size of the images, as WIDTHxHEIGHT.
+    - SIMULATOR_LATENCY and SIMULATOR_LATENCY_JITTER: seconds added to every call.
+    - SIMULATOR_ERROR_RATE: probability of a call failing.
+    - SIMULATOR_START_DELAY: seconds a device takes to start producing inferences.
+    - SIMULATOR_SEED: seed of the generated data.
+    """
+
+    NUM_CLASSES = 3
+
+    def __init__(
+        self,
+        inference_format: InferenceFormat,
+        timeout: int = None,
+        device_count: Optional[int] = None,
+        inference_rate: Optional[float] = None,
+        detections: Optional[float] = None,
+        image_size: Optional[str] = None,
+        latency: Optional[float] = None,
+        latency_jitter: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        start_delay: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(timeout)
+        self.inference_format = inference_format
+        self.device_count = device_count or int(os.getenv("SIMULATOR_DEVICE_COUNT", 4))
+        self.inference_rate = inference_rate or float(
+            os.getenv("SIMULATOR_INFERENCE_RATE", 1.0)
+        )
+        self.detections = (
+            detections
+            if detections is not None
+            else float(os.getenv("SIMULATOR_DETECTIONS", 5))
+        )
+        self.image_width, self.image_height = (
+            int(size)
+            for size in (
+                image_size or os.getenv("SIMULATOR_IMAGE_SIZE", "320x240")
+            ).split("x")
+        )
+        self.latency = (
+            latency if latency is not None else float(os.getenv("SIMULATOR_LATENCY", 0))
+        )
+        self.latency_jitter = (
+            latency_jitter
+            if latency_jitter is not None
+            else float(os.getenv("SIMULATOR_LATENCY_JITTER", 0))
+        )
+        self.error_rate = (
+            error_rate
+            if error_rate is not None
+            else float(os.getenv("SIMULATOR_ERROR_RATE", 0))
+        )
+        self.start_delay = (
+            start_delay
+            if start_delay is not None
+            else float(os.getenv("SIMULATOR_START_DELAY", 1.0))
+        )
+        self.seed = seed if seed is not None else int(os.getenv("SIMULATOR_SEED", 0))
+
+        self._random = random.Random(self.seed)
+        self._lock = Lock()
+        self.devices: dict[str, SimulatedDevice] = {
+            device_id: SimulatedDevice(
+                device_id, self._default_configuration(device_id)
+            )
+            for device_id in (f"sim-device-{i:03d}" for i in range(self.device_count))
+        }
+        self._background: Optional[bytearray] = None
+
+    def _default_configuration(self, device_id: str) -> Configuration:
+        if self.inference_format == InferenceFormat.ZONE_DETECTION:
+            return ConfigurationV1(
+                file_name=f"{device_id}.json",
+                commands=[
+                    {
+                        "command_name": "StartUploadInferenceData",
+                        "parameters": {
+                            "Mode": 1,
+                            "UploadInterval": 30,
+                            "NumberOfImages": 0,
+                            "MaxDetectionsPerFrame": 5,
+                            "ModelId": "simulated",
+                            "PPLParameter": {},
+                        },
+                    }
+                ],
+            )
+        return ConfigurationV2(
+            edge_app={
+                "common_settings": {
+                    "process_state": 1,
+                    "log_level": 2,
+                    "inference_settings": {"number_of_iterations": 0},
+                    "port_settings": {
+                        "metadata": {
+                            "path": f"{device_id}/meta",
+                            "method": 1,
+                            "enabled": True,
+                            "endpoint": "",
+                            "storage_name": "",
+                        },
+                        "input_tensor": {
+                            "path": f"{device_id}/image/simulated",
+                            "method": 1,
+                            "enabled": False,
+                            "endpoint": "",
+                            "storage_name": "",
+                        },
+                    },
+                    "codec_settings": {"format": 1},
+                    "number_of_inference_per_message": 1,
+                },
+                "custom_settings": {"metadata_settings": {"format": 1}},
+            }
+        )
+
+    def _simulate_call(self):
+        """Applies the configured latency and error profiles to a console call."""
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            fails = self._random.random() < self.error_rate
+        if delay > 0:
+            sleep(delay)
+        if fails:
+            raise ConsoleUnavailableError("Simulated console error")
+
+    def _get_simulated_device(self, device_id: str) -> SimulatedDevice:
+        device = self.devices.get(device_id)
+        if device is None:
+            raise Exception(f"Device {device_id} not found.")
+        return device
+
+    def _get_latest_index(self, device: SimulatedDevice) -> Optional[int]:
+        if device.started_at is None:
+            return None
+        end = time() if device.stopped_at is None else device.stopped_at
+        first_inference_at = device.started_at + self.start_delay
+        if end < first_inference_at:
+            return None
+        return floor((end - first_inference_at) * self.inference_rate)
+
+    def _get_inference_time(self, device: SimulatedDevice, index: int) -> float:
+        return device.started_at + self.start_delay + index / self.inference_rate
+
+    def _generate_detections(self, device_id: str, index: int) -> list[dict]:
+        rng = random.Random(f"{self.seed}:{device_id}:{index}")
+        detections = []
+        for _ in range(rng.randint(0, round(2 * self.detections))):
+            width = rng.randint(8, max(self.image_width // 4, 8))
+            height = rng.randint(8, max(self.image_height // 4, 8))
+            left = rng.randint(0, self.image_width - width)
+            top = rng.randint(0, self.image_height - height)
+            center_x = left + width / 2
+            center_y = top + height / 2
+            detections.append(
+                {
+                    "class_id": rng.randrange(SimulatedConsoleClient.NUM_CLASSES),
+                    "score": round(rng.uniform(0.3, 1.0), 2),
+                    # Objects in the central quarter of the image are in the zone
+                    "zone_flag": abs(center_x - self.image_width / 2)
+                    < self.image_width / 4
+                    and abs(center_y - self.image_height / 2) < self.image_height / 4,
+                    "bounding_box": {
+                        "left": left,
+                        "top": top,
+                        "right": left + width,
+                        "bottom": top + height,
+                    },
+                }
+            )
+        return detections
+
+    def _generate_inference(self, device: SimulatedDevice, index: int) -> dict:
+        timestamp = _to_numeric_timestamp(self._get_inference_time(device, index))
+        return {
+            "id": f"{device.device_id}:{int(device.started_at * 1000)}:{index}",
+            "timestamp": timestamp,
+            "timestamp_us": parse_timestamp(timestamp),
+            "content": serialize(
+                self._generate_detections(device.device_id, index),
+                self.inference_format,
+            ),
+        }
+
+    def _generate_image(self, detections: list[dict]) -> str:
+        width, height = self.image_width, self.image_height
+        if self._background is None:
+            self._background = bytearray(
+                value
+                for y in range(height)
+                for x in range(width)
+                for value in (x * 255 // width, y * 255 // height, 96)
+            )
+        pixels = bytearray(self._background)
+
+        def fill(left: int, top: int, right: int, bottom: int):
+            for y in range(max(top, 0), min(bottom, height)):
+                start = (y * width + max(left, 0)) * 3
+                end = (y * width + min(right, width)) * 3
+                pixels[start:end] = b"\xff\xff\xff" * ((end - start) // 3)
+
+        for detection in detections:
+            box = detection["bounding_box"]
+            fill(box["left"], box["top"], box["right"], box["top"] + 2)
+            fill(box["left"], box["bottom"] - 2, box["right"], box["bottom"])
+            fill(box["left"], box["top"], box["left"] + 2, box["bottom"])
+            fill(box["right"] - 2, box["top"], box["right"], box["bottom"])
+
+        row_size = width * 3
+        rows = [pixels[y * row_size : (y + 1) * row_size] for y in range(height)]
+        return b64encode(_encode_png(width, height, rows)).decode("utf-8")
+
+    def reload_client(self):
+        logger.info("Reloading simulated console.")
+
+    def get_devices(self) -> Devices:
+        self._simulate_call()
+        return Devices(
+            devices=[
+                Device(
+                    device_id=device.device_id,
+                    device_name=device.device_id,
+                    connection_state="Connected",
+                )
+                for device in self.devices.values()
+            ]
+        )
+
+    def get_device(self, device_id: str) -> Device:
+        self._simulate_call()
+        device = self._get_simulated_device(device_id)
+        return Device(
+            device_id=device_id,
+            device_name=device_id,
+            connection_state="Connected",
+            models=["simulated"],
+            application=["simulated"],
+            inference_status="Streaming" if device.is_streaming() else "Idle",
+        )
+
+    def get_configuration(self, device_id: str) -> Configuration:
+        self._simulate_call()
+        return self._get_simulated_device(device_id).configuration.model_copy(deep=True)
+
+    def update_configuration(
+        self, device_id: str, configuration: Configuration
+    ) -> StatusResponse:
+        self._simulate_call()
+        device = self._get_simulated_device(device_id)
+
+        def merge(current: dict, update: dict) -> dict:
+            for key, value in update.items():
+                if isinstance(value, dict) and isinstance(current.get(key), dict):
+                    merge(current[key], value)
+                else:
+                    current[key] = value
+            return current
+
+        merged = merge(
+            device.configuration.model_dump(),
+            configuration.model_dump(exclude_none=True),
+        )
+        device.configuration = type(device.configuration).model_validate(merged)
+        return StatusResponse(status="SUCCESS")
+
+    def set_configuration(
+        self, device_id: str, configuration: Configuration
+    ) -> StatusResponse:
+        if self.inference_format == InferenceFormat.OBJECT_DETECTION_EXPANDED:
+            raise Exception("Online Console V2 does not support this endpoint")
+        self._simulate_call()
+        self._get_simulated_device(device_id).configuration = configuration
+        return StatusResponse(status="SUCCESS")
+
+    def get_direct_image(self, device_id: str) -> str:
+        self._simulate_call()
+        device = self._get_simulated_device(device_id)
+        index = self._get_latest_index(device) or 0
+        return self._generate_image(self._generate_detections(device_id, index))
+
+    def get_latest_data(
+        self, device_id: str, get_image: bool = False
+    ) -> tuple[Optional[str], dict[str, str]]:
+        self._simulate_call()
+        device = self._get_simulated_device(device_id)
+        index = self._get_latest_index(device)
+        if index is None:
+            raise Exception(
+                f"Device {device_id} has not produced any inference. Make sure you have started inference properly."
+            )
+
+        inference = self._generate_inference(device, index)
+        image = (
+            self._generate_image(self._generate_detections(device_id, index))
+            if get_image
+            else None
+        )
+        return image, {
+            "timestamp": inference["timestamp"],
+            "content": inference["content"],
+        }
+
+    def get_inferences_since(
+        self, device_id: str, since: Optional[int] = None, limit: int = 500
+    ) -> list[dict[str, Any]]:
+        self._simulate_call()
+        device = self._get_simulated_device(device_id)
+        latest_index = self._get_latest_index(device)
+        if latest_index is None:
+            return []
+
+        first_index = latest_index
+        if since:
+            elapsed = since / 1_000_000 - self._get_inference_time(device, 0)
+            first_index = max(floor(elapsed * self.inference_rate) + 1, 0)
+        # Oldest first, the next call continues after the last one returned
+        last_index = min(latest_index, first_index + limit - 1)
+        return [
+            self._generate_inference(device, index)
+            for index in range(first_index, last_index + 1)
+        ]
+
+    def start_upload_inference_data(
+        self,
+        device_id: str,
+        get_image: bool = False,
+        cancel_event: Optional[Event] = None,
+        progress: Optional[Callable[[int, float], None]] = None,
+    ) -> StatusResponse:
+        self._simulate_call()
+        device = self._get_simulated_device(device_id)
+        device.started_at = time()
+        device.stopped_at = None
+
+        def device_started() -> bool:
+            return self._get_latest_index(device) is not None
+
+        if not wait_until(device_started, 60, cancel_event, progress):
+            if cancel_event is not None and cancel_event.is_set():
+                raise Exception("Cancelled while waiting for device to start.")
+            raise Exception("Timeout while waiting for device to start.")
+        return StatusResponse(status="SUCCESS")
+
+    def stop_upload_inference_data(self, device_id: str) -> StatusResponse:
+        self._simulate_call()
+        device = self._get_simulated_device(device_id)
+        if device.is_streaming():
+            device.stopped_at = time()
+        return StatusResponse(status="SUCCESS")
+
+    def delete_device_data(self, device_id: str) -> StatusResponse:
+        self._simulate_call()
+        device = self._get_simulated_device(device_id)
+        # Previous inferences are lost, a streaming device starts a new session
+        device.started_at = time() if device.is_streaming() else None
+        return StatusResponse(status="Success")
@@ -0,0 +1,165 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import os
+from threading import Event
+from threading import Lock
+from threading import Thread
+from time import time
+from typing import Callable
+from typing import NamedTuple
+from typing import Optional
+
+from app.config.get_console_settings import get_console_settings
+from app.utils.auth import get_token
+
+logger = logging.getLogger(__name__)
+
+
+class Credentials(NamedTuple):
+    access_token: str
+    refresh_at: float
+    expiry: float
+
+
+class TokenManager:
+    """Keeps a valid Console access token, refreshing it ahead of its expiry.
+
+    The token is renewed by a background thread before it expires, so callers
+    normally get the cached token without waiting. When a refresh is needed
+    inline, a single caller fetches the token while the others wait for it.
+    Listeners are notified with every new token to update their credentials.
+    """
+
+    EXPIRY_SAFETY_SECONDS = 10
+    MIN_RETRY_SECONDS = 1.0
+    MAX_RETRY_SECONDS = 60.0
+
+    def __init__(self, refresh_margin: Optional[float] = None):
+        self.refresh_margin = (
+            refresh_margin
+            if refresh_margin is not None
+            else float(os.getenv("TOKEN_REFRESH_MARGIN", 300))
+        )
+        self._credentials: Optional[Credentials] = None
+        self._generation = 0
+        self._refresh_lock = Lock()
+        self._listeners: list[Callable[[str], None]] = []
+        self._wakeup = Event()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """Register a callback called with every new access token."""
+        self._listeners.append(listener)
+
+    @property
+    def access_token(self) -> Optional[str]:
+        """Cached access token, without refreshing it."""
+        credentials = self._credentials
+        return credentials.access_token if credentials is not None else None
+
+    def get_access_token(self) -> str:
+        """Get the current access token, refreshing it inline only if it expired.
+
+        Returns:
+            str: Access token
+        """
+        credentials = self._credentials
+        if credentials is not None and time() < credentials.expiry:
+            return credentials.access_token
+        return self.refresh()
+
+    def refresh(self, force: bool = False) -> str:
+        """Fetch a new access token, unless another caller already did it.
+
+        Args:
+            force (bool): Fetch a new token even if the current one is still valid
+
+        Returns:
+            str: Access token
+        """
+        observed_generation = self._generation
+        with self._refresh_lock:
+            credentials = self._credentials
+            if credentials is not None and (
+                self._generation != observed_generation
+                or (not force and time() < credentials.refresh_at)
+            ):
+                return credentials.access_token
+
+            logger.debug("Refreshing Online Console access token.")
+            _, client_id, client_secret, portal_authorization_endpoint = (
+                get_console_settings()
+            )
+            access_token, expires_in = get_token(
+                client_id=client_id,
+                client_secret=client_secret,
+                portal_authorization_endpoint=portal_authorization_endpoint,
+            )
+            now = time()
+            lifetime = max(expires_in - self.EXPIRY_SAFETY_SECONDS, 0)
+            self._credentials = Credentials(
+                access_token=access_token,
+                refresh_at=now + max(lifetime - self.refresh_margin, lifetime / 2),
+                expiry=now + lifetime,
+            )
+            self._generation += 1
+
+            for listener in self._listeners:
+                listener(access_token)
+        logger.info("Online Console access token refreshed.")
+
+        self._ensure_background_refresh()
+        self._wakeup.set()
+        return access_token
+
+    def stop(self):
+        """Stop the background refresh for good. Tokens are then only refreshed inline."""
+        self._stop.set()
+        self._wakeup.set()
+
+    def _ensure_background_refresh(self):
+        if self._stop.is_set():
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = Thread(
+                target=self._refresh_periodically, name="token-refresh", daemon=True
+            )
+            self._thread.start()
+
+    def _refresh_periodically(self):
+        retry_delay = self.MIN_RETRY_SECONDS
+        while not self._stop.is_set():
+            credentials = self._credentials
+            self._wakeup.wait(max(credentials.refresh_at - time(), 0))
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            if time() < self._credentials.refresh_at:
+                continue  # Woken up by a refresh made by a caller
+
+            try:
+                self.refresh()
+                retry_delay = self.MIN_RETRY_SECONDS
+            except Exception as e:
+                remaining = self._credentials.expiry - time()
+                logger.warning(
+                    f"Background token refresh failed, retrying in {retry_delay}s "
+                    f"({max(remaining, 0):.0f}s left before expiry): {e}"
+                )
+                self._stop.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, self.MAX_RETRY_SECONDS)
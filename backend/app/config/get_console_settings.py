@@ -15,6 +15,8 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 import os
+from threading import Lock
+from typing import Optional
 
 import yaml
 
@@ -28,6 +30,11 @@ SETTINGS_FILE = os.getenv(
     ),
 )
 
+# Parsed settings, reused while the file is unchanged
+_cached_settings: Optional[dict] = None
+_cached_mtime: Optional[float] = None
+_cache_lock = Lock()
+
 
 def save_settings_to_yaml(settings: dict):
     """Save settings to the YAML file."""
@@ -35,6 +42,7 @@ def save_settings_to_yaml(settings: dict):
         logger.debug(f"Attempting to save settings to {SETTINGS_FILE}")
         with open(SETTINGS_FILE, "w") as file:
             yaml.safe_dump({"console_access_settings": settings}, file, sort_keys=False)
+        invalidate_cached_settings()
         logger.info("Settings successfully saved to YAML file.")
     except Exception as e:
         logger.error(f"Failed to save settings to {SETTINGS_FILE}: {e}", exc_info=True)
@@ -60,9 +68,31 @@ def load_settings_from_yaml() -> dict:
         raise Exception(f"Failed to load settings: {str(e)}")
 
 
+def invalidate_cached_settings():
+    """Drop the parsed settings so that the next read goes to the YAML file."""
+    global _cached_settings, _cached_mtime
+    with _cache_lock:
+        _cached_settings = None
+        _cached_mtime = None
+
+
+def load_cached_settings() -> dict:
+    """Load settings from memory, re-reading the YAML file only when it changed."""
+    global _cached_settings, _cached_mtime
+    try:
+        mtime = os.path.getmtime(SETTINGS_FILE)
+    except OSError:
+        mtime = None
+    with _cache_lock:
+        if _cached_settings is None or mtime != _cached_mtime:
+            _cached_settings = load_settings_from_yaml()
+            _cached_mtime = mtime
+        return _cached_settings
+
+
 def get_console_settings() -> tuple[str, str, str, str]:
     logger.debug("Fetching console settings.")
-    settings = load_settings_from_yaml()
+    settings = load_cached_settings()
     if not settings:
         logger.error("Settings file is empty or not initialized.")
         raise ValueError("Settings file is empty or not initialized.")
@@ -0,0 +1,423 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import bisect
+import hashlib
+import json
+import logging
+import os
+import select
+import socket
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from queue import Empty
+from queue import Full
+from queue import Queue
+from threading import Event
+from threading import Lock
+from threading import Thread
+from typing import Callable
+from typing import Optional
+
+from app.data_management.image_tiers import FrameImage
+from app.data_management.image_tiers import FULL_TIER
+from app.data_management.image_tiers import get_tier_names
+from app.data_management.image_tiers import IMAGE_TIERS
+from app.database.db import engine
+from app.database.models import ActiveDeviceTable
+from app.database.models import WorkerTable
+from app.utils.metrics import DROPPED_FRAMES
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+logger = logging.getLogger(__name__)
+
+CONTROL_CHANNEL = "zone_detection_control"
+FRAMES_CHANNEL = "zone_detection_frames"
+# NOTIFY payloads are limited to 8000 bytes, larger frames are sent in chunks
+CHUNK_SIZE = 7000
+# First key of the two-key advisory locks held on the devices by their pipeline
+ADVISORY_LOCK_NAMESPACE = 0x5A44
+# Frames waiting to be relayed, older frames are dropped beyond
+RELAY_QUEUE_SIZE = 100
+
+
+class HashRing:
+    """Consistent hashing of keys over members, with virtual nodes.
+
+    Adding or removing a member only moves the keys of that member.
+    """
+
+    def __init__(self, members: list[str], virtual_nodes: int = 64):
+        self._ring = sorted(
+            (self._hash(f"{member}#{index}"), member)
+            for member in members
+            for index in range(virtual_nodes)
+        )
+        self._positions = [position for position, _ in self._ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._positions, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class WorkerCoordinator:
+    """Shares the device pipelines between the backend workers through PostgreSQL.
+
+    Workers register themselves with a heartbeat in WorkerTable, and requested
+    devices are kept in ActiveDeviceTable. Each device is collected by the worker
+    owning it on a consistent hash ring of the live workers, which holds an advisory
+    lock on the device so that no two workers collect it at once while the ring
+    changes. Changes are announced with NOTIFY and periodically reconciled, and the
+    frames collected by a worker are relayed with NOTIFY to the others, which queue
+    them for their WebSocket clients. Frames are only relayed while another worker
+    has WebSocket clients, with their image reduced to the COORDINATION_IMAGE_TIER.
+    """
+
+    def __init__(self, data_pipeline, heartbeat: Optional[float] = None):
+        if engine.dialect.name != "postgresql":
+            raise Exception("Worker coordination requires a PostgreSQL database")
+        self.data_pipeline = data_pipeline
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.heartbeat = heartbeat or float(os.getenv("COORDINATION_HEARTBEAT", 5))
+        self.image_tier = os.getenv(
+            "COORDINATION_IMAGE_TIER", next(iter(IMAGE_TIERS), FULL_TIER)
+        )
+        if self.image_tier not in get_tier_names():
+            raise ValueError(
+                f"Unknown COORDINATION_IMAGE_TIER '{self.image_tier}', available tiers are {get_tier_names()}"
+            )
+        self.members: list[str] = []
+        self.owned: set[str] = set()
+        # Whether another worker has WebSocket clients, so frames must be relayed
+        self.relay_frames = False
+        self._has_subscribers = False
+        self._relay_queue: Queue[tuple] = Queue(maxsize=RELAY_QUEUE_SIZE)
+        self._relay_thread: Optional[Thread] = None
+        self._activity_listeners: list[Callable[[], None]] = []
+        self._partial_frames: OrderedDict[str, list] = OrderedDict()
+        self._stop_event = Event()
+        self._reconcile_event = Event()
+        self._lock = Lock()
+        self._connection = None
+        self._thread: Optional[Thread] = None
+
+    def add_activity_listener(self, listener: Callable[[], None]):
+        """Register a callback called when devices are collected by any worker."""
+        self._activity_listeners.append(listener)
+
+    def start(self):
+        logger.info(f"Starting worker coordination as {self.worker_id}")
+        self._connection = engine.raw_connection()
+        driver_connection = self._connection.driver_connection
+        driver_connection.autocommit = True
+        with driver_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CONTROL_CHANNEL}")
+            cursor.execute(f"LISTEN {FRAMES_CHANNEL}")
+        self._heartbeat()
+        self._notify_control({"type": "members"})
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._relay_thread = Thread(target=self._relay, daemon=True)
+        self._relay_thread.start()
+
+    def stop(self):
+        logger.info(f"Stopping worker coordination of {self.worker_id}")
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._relay_thread is not None:
+            self._relay_thread.join()
+        self._release_all()
+        with Session(engine) as session:
+            session.exec(
+                delete(WorkerTable).where(WorkerTable.worker_id == self.worker_id)
+            )
+            session.commit()
+        self._notify_control({"type": "members"})
+        if self._connection is not None:
+            self._connection.close()
+
+    # Requests, from any worker
+
+    def request_start(self, device_id: str, get_image: bool, catch_up: bool):
+        """Request the data collection of a device from the worker owning it."""
+        values = {"device_id": device_id, "get_image": get_image, "catch_up": catch_up}
+        with Session(engine) as session:
+            session.exec(
+                insert(ActiveDeviceTable)
+                .values(**values, requested_at=datetime.now(timezone.utc))
+                .on_conflict_do_update(index_elements=["device_id"], set_=values)
+            )
+            session.commit()
+        self._notify_control({"type": "devices"})
+
+    def request_stop(self, device_id: str):
+        """Stop the data collection of a device, wherever it runs."""
+        with Session(engine) as session:
+            session.exec(
+                delete(ActiveDeviceTable).where(
+                    ActiveDeviceTable.device_id == device_id
+                )
+            )
+            session.commit()
+        self._notify_control({"type": "devices"})
+
+    def request_reset(self, client_type: Optional[str]):
+        """Stop every data collection and switch every worker to client_type."""
+        with Session(engine) as session:
+            session.exec(delete(ActiveDeviceTable))
+            session.commit()
+        self._notify_control({"type": "reset", "client_type": client_type})
+
+    def is_active(self, device_id: Optional[str] = None) -> bool:
+        query = sql_select(func.count()).select_from(ActiveDeviceTable)
+        if device_id:
+            query = query.where(ActiveDeviceTable.device_id == device_id)
+        with Session(engine) as session:
+            return session.exec(query).one()[0] > 0
+
+    def publish_frame(self, frame: tuple):
+        """Queue a frame collected by this worker to be relayed to the other workers.
+
+        Called from the collector threads, the frames are relayed by the relay thread.
+        """
+        if not self.relay_frames:
+            return
+        while True:
+            try:
+                self._relay_queue.put_nowait(frame)
+                return
+            except Full:
+                pass
+            try:
+                self._relay_queue.get_nowait()
+                DROPPED_FRAMES.labels(reason="relay_backlog").inc()
+            except Empty:
+                pass
+
+    # Relay thread
+
+    def _relay(self):
+        while not self._stop_event.is_set():
+            try:
+                frame = self._relay_queue.get(timeout=1.0)
+            except Empty:
+                continue
+            if not self.relay_frames:
+                continue
+            try:
+                self._send_frame(frame)
+            except Exception as e:
+                DROPPED_FRAMES.labels(reason="relay_error").inc()
+                logger.error(f"Error relaying a frame to the other workers: {e}")
+
+    def _send_frame(self, frame: tuple):
+        image, inference, timestamp, device_id, _ = frame
+        payload = json.dumps(
+            {
+                "w": self.worker_id,
+                "d": device_id,
+                "t": timestamp,
+                "i": inference,
+                "m": image.get(self.image_tier) if image else None,
+            },
+            separators=(",", ":"),
+        )
+        frame_id = uuid.uuid4().hex
+        chunks = [
+            payload[offset : offset + CHUNK_SIZE]
+            for offset in range(0, len(payload), CHUNK_SIZE)
+        ]
+        # Notifications of a transaction are delivered together, in order
+        with engine.begin() as connection:
+            for index, chunk in enumerate(chunks):
+                connection.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {
+                        "channel": FRAMES_CHANNEL,
+                        "payload": f"{frame_id} {index} {len(chunks)} {chunk}",
+                    },
+                )
+
+    # Coordination thread
+
+    def _notify_control(self, message: dict):
+        message["w"] = self.worker_id
+        with engine.begin() as connection:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CONTROL_CHANNEL, "payload": json.dumps(message)},
+            )
+
+    def _run(self):
+        driver_connection = self._connection.driver_connection
+        next_heartbeat = 0.0
+        while not self._stop_event.is_set():
+            try:
+                readable, _, _ = select.select([driver_connection], [], [], 1.0)
+                if readable:
+                    driver_connection.poll()
+                    while driver_connection.notifies:
+                        self._handle(driver_connection.notifies.pop(0))
+                now = datetime.now(timezone.utc).timestamp()
+                has_subscribers = bool(self.data_pipeline.subscribers)
+                if has_subscribers != self._has_subscribers:
+                    # Let the other workers start or stop relaying frames now
+                    self._heartbeat()
+                    self._notify_control({"type": "members"})
+                if now >= next_heartbeat:
+                    self._heartbeat()
+                    self._reconcile_event.set()
+                    next_heartbeat = now + self.heartbeat
+                if self._reconcile_event.is_set():
+                    self._reconcile_event.clear()
+                    self._reconcile()
+            except Exception as e:
+                logger.error(f"Worker coordination error: {e}", exc_info=True)
+                self._stop_event.wait(self.heartbeat)
+
+    def _handle(self, notification):
+        if notification.channel == FRAMES_CHANNEL:
+            self._receive_frame_chunk(notification.payload)
+            return
+        message = json.loads(notification.payload)
+        if message["type"] == "reset":
+            self._release_all()
+            # The requesting worker resets its own client
+            if message["w"] != self.worker_id:
+                logger.info(f"Switching to client type {message['client_type']}")
+                if message["client_type"]:
+                    os.environ["CLIENT_TYPE"] = message["client_type"]
+                self.data_pipeline.reset_local_client()
+        self._reconcile_event.set()
+
+    def _receive_frame_chunk(self, payload: str):
+        frame_id, index, count, chunk = payload.split(" ", 3)
+        chunks = self._partial_frames.setdefault(frame_id, [])
+        chunks.append(chunk)
+        if len(chunks) < int(count):
+            # Frames whose chunks never complete are eventually discarded
+            while len(self._partial_frames) > 100:
+                self._partial_frames.popitem(last=False)
+            return
+        del self._partial_frames[frame_id]
+        frame = json.loads("".join(chunks))
+        if frame["w"] == self.worker_id or not self.data_pipeline.subscribers:
+            return
+        self.data_pipeline.enqueue(
+            (
+                FrameImage(frame["m"]) if frame["m"] else None,
+                frame["i"],
+                frame["t"],
+                frame["d"],
+                None,
+            )
+        )
+
+    def _heartbeat(self):
+        now = datetime.now(timezone.utc)
+        self._has_subscribers = bool(self.data_pipeline.subscribers)
+        values = {"heartbeat_at": now, "has_subscribers": self._has_subscribers}
+        with Session(engine) as session:
+            session.exec(
+                insert(WorkerTable)
+                .values(worker_id=self.worker_id, **values)
+                .on_conflict_do_update(index_elements=["worker_id"], set_=values)
+            )
+            session.exec(
+                delete(WorkerTable).where(
+                    WorkerTable.heartbeat_at
+                    < now - timedelta(seconds=3 * self.heartbeat)
+                )
+            )
+            session.commit()
+            self._load_members(session)
+
+    def _load_members(self, session: Session):
+        workers = session.exec(
+            sql_select(WorkerTable.worker_id, WorkerTable.has_subscribers)
+        ).all()
+        self.members = sorted(worker_id for worker_id, _ in workers)
+        self.relay_frames = any(
+            has_subscribers
+            for worker_id, has_subscribers in workers
+            if worker_id != self.worker_id
+        )
+
+    def _reconcile(self):
+        """Start the devices owned by this worker and stop the others."""
+        with Session(engine) as session:
+            devices = {
+                device.device_id: device
+                for device in session.exec(sql_select(ActiveDeviceTable)).scalars()
+            }
+            self._load_members(session)
+        ring = HashRing(self.members)
+
+        for device_id in list(self.owned):
+            if device_id not in devices or ring.owner(device_id) != self.worker_id:
+                logger.info(f"Releasing device {device_id}")
+                self._release(device_id)
+
+        for device_id, device in devices.items():
+            if device_id in self.owned or ring.owner(device_id) != self.worker_id:
+                continue
+            # Held by the previous owner until it notices the new ring
+            if not self._advisory_lock("pg_try_advisory_lock", device_id):
+                continue
+            logger.info(f"Taking over device {device_id}")
+            self.owned.add(device_id)
+            self.data_pipeline.start_local_collection(
+                device_id, device.get_image, device.catch_up
+            )
+
+        if devices:
+            for listener in self._activity_listeners:
+                listener()
+
+    def _release_all(self):
+        """Stop every device owned by this worker, in parallel."""
+        self.data_pipeline.stop_pipelines(list(self.owned))
+        for device_id in list(self.owned):
+            self._advisory_lock("pg_advisory_unlock", device_id)
+            self.owned.discard(device_id)
+
+    def _release(self, device_id: str):
+        self.data_pipeline.stop_local_collection(device_id)
+        self._advisory_lock("pg_advisory_unlock", device_id)
+        self.owned.discard(device_id)
+
+    def _advisory_lock(self, function: str, device_id: str) -> bool:
+        with self._lock:
+            with self._connection.driver_connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {function}(%s, hashtext(%s))",
+                    (ADVISORY_LOCK_NAMESPACE, device_id),
+                )
+                return cursor.fetchone()[0]
@@ -0,0 +1,315 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Keyframe and delta encoding of the detections streamed to the WebSocket clients.
+
+Each device of a connection has its own stream of frames. A keyframe carries every
+detection, in slots given by their position. The following frames only carry the
+changes since the previous frame of the device: detections added to a free slot,
+detections whose box, score or zone flag changed, and removed slots. Detections are
+matched across frames by class and overlap, scores are quantized to thousandths and
+box coordinates are sent as differences. See the `Detection deltas` section of the
+README for the wire format.
+"""
+import heapq
+import os
+from collections import defaultdict
+from typing import Any
+from typing import Optional
+
+# Scores are sent as integers in thousandths
+SCORE_SCALE = 1000
+# Minimum overlap of the boxes of a detection in consecutive frames
+MATCH_IOU = 0.3
+# Overlap above which a match is taken without looking for a better one
+CLOSE_MATCH_IOU = 0.7
+# Size, in pixels, of the cells in which boxes are looked up by their center
+GRID_SIZE = 32
+# Cells searched for a match, starting with the cell of the box
+NEIGHBOUR_CELLS = [(0, 0)] + [
+    (column, row) for column in (-1, 0, 1) for row in (-1, 0, 1) if column or row
+]
+
+Detection = tuple[int, int, int, Optional[tuple[int, int, int, int]]]
+
+
+def _quantize(detection: dict[str, Any]) -> Detection:
+    box = detection["bounding_box"]
+    return (
+        detection["class_id"],
+        round(detection["score"] * SCORE_SCALE),
+        int(bool(detection["zone_flag"])),
+        (
+            None
+            if box is None
+            else (box["left"], box["top"], box["right"], box["bottom"])
+        ),
+    )
+
+
+def _to_entry(detection: Detection) -> list[int]:
+    class_id, score, zone_flag, box = detection
+    return [class_id, score, zone_flag] + (list(box) if box is not None else [])
+
+
+def _from_entry(entry: list[int]) -> Detection:
+    return (entry[0], entry[1], entry[2], tuple(entry[3:7]) if len(entry) > 3 else None)
+
+
+def _to_json(detection: Detection) -> dict[str, Any]:
+    class_id, score, zone_flag, box = detection
+    return {
+        "class_id": class_id,
+        "score": score / SCORE_SCALE,
+        "zone_flag": bool(zone_flag),
+        "bounding_box": (
+            None
+            if box is None
+            else {"left": box[0], "top": box[1], "right": box[2], "bottom": box[3]}
+        ),
+    }
+
+
+def _get_cell(box: tuple[int, int, int, int]) -> tuple[int, int]:
+    return ((box[0] + box[2]) // (2 * GRID_SIZE), (box[1] + box[3]) // (2 * GRID_SIZE))
+
+
+def _get_iou(box: tuple[int, int, int, int], other: tuple[int, int, int, int]) -> float:
+    width = min(box[2], other[2]) - max(box[0], other[0])
+    height = min(box[3], other[3]) - max(box[1], other[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (
+        (box[2] - box[0]) * (box[3] - box[1])
+        + (other[2] - other[0]) * (other[3] - other[1])
+        - intersection
+    )
+    return intersection / union if union > 0 else 0.0
+
+
+class _DeviceStream:
+    """Detections of a device as last sent to, and decoded by, the client."""
+
+    def __init__(self):
+        self.sequence = -1
+        # Frames sent since the last keyframe, None until a keyframe is sent
+        self.frames_since_keyframe: Optional[int] = None
+        self.slots: dict[int, Detection] = {}
+        self.free_slots: list[int] = []
+
+    def reset(self, detections: list[Detection]):
+        self.slots = dict(enumerate(detections))
+        self.free_slots = []
+        self.frames_since_keyframe = 0
+
+    def allocate_slot(self) -> int:
+        if self.free_slots:
+            return heapq.heappop(self.free_slots)
+        return len(self.slots)
+
+
+class DetectionEncoder:
+    """Encodes the inferences of a WebSocket connection as keyframes and deltas."""
+
+    def __init__(self, keyframe_interval: Optional[int] = None):
+        self.keyframe_interval = keyframe_interval or int(
+            os.getenv("WEBSOCKET_KEYFRAME_INTERVAL", 30)
+        )
+        self.streams: dict[str, _DeviceStream] = {}
+
+    def encode(
+        self, device_id: str, inference: Optional[dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Encode the inference of the next frame of a device.
+
+        Args:
+            device_id (str): Device ID
+            inference (Optional[dict[str, Any]]): Inference, as produced by
+                `detection_data_to_json`, or None if it could not be deserialized
+
+        Returns:
+            dict[str, Any]: Keyframe or delta of the frame
+        """
+        stream = self.streams.setdefault(device_id, _DeviceStream())
+        stream.sequence += 1
+        if inference is None:
+            # The next frame is sent as a keyframe
+            stream.reset([])
+            stream.frames_since_keyframe = None
+            return {"k": 1, "s": stream.sequence, "o": None}
+
+        detections = [
+            _quantize(detection)
+            for detection in inference["perception"]["object_detection_list"]
+        ]
+        if (
+            stream.frames_since_keyframe is not None
+            and stream.frames_since_keyframe < self.keyframe_interval
+        ):
+            delta = self._encode_delta(stream, detections)
+            if delta is not None:
+                stream.frames_since_keyframe += 1
+                return delta
+
+        stream.reset(detections)
+        return {
+            "k": 1,
+            "s": stream.sequence,
+            "o": [_to_entry(detection) for detection in detections],
+        }
+
+    def _match(
+        self, stream: _DeviceStream, detections: list[Detection]
+    ) -> list[Optional[int]]:
+        """Slot of the previous frame matching each detection, if any."""
+        cells = defaultdict(list)
+        for slot, (class_id, _, _, box) in stream.slots.items():
+            if box is None:
+                cells[class_id, None].append(slot)
+            else:
+                cells[(class_id, *_get_cell(box))].append(slot)
+
+        matched = set()
+        matches = []
+        for class_id, _, _, box in detections:
+            best_slot = None
+            if box is None:
+                for slot in cells[class_id, None]:
+                    if slot not in matched:
+                        best_slot = slot
+                        break
+            else:
+                best_iou = MATCH_IOU
+                column, row = _get_cell(box)
+                for column_offset, row_offset in NEIGHBOUR_CELLS:
+                    for slot in cells.get(
+                        (class_id, column + column_offset, row + row_offset), ()
+                    ):
+                        if slot in matched:
+                            continue
+                        iou = _get_iou(box, stream.slots[slot][3])
+                        if iou >= best_iou:
+                            best_slot, best_iou = slot, iou
+                    if best_iou >= CLOSE_MATCH_IOU:
+                        break
+            if best_slot is not None:
+                matched.add(best_slot)
+            matches.append(best_slot)
+        return matches
+
+    def _encode_delta(
+        self, stream: _DeviceStream, detections: list[Detection]
+    ) -> Optional[dict[str, Any]]:
+        """Changes since the previous frame, or None if a keyframe is smaller."""
+        matches = self._match(stream, detections)
+        removed = sorted(set(stream.slots).difference(matches))
+        # Size, in numbers, of the delta and of a keyframe
+        size = len(removed)
+        keyframe_size = 0
+        for detection, slot in zip(detections, matches):
+            keyframe_size += 3 if detection[3] is None else 7
+            if slot is None:
+                size += 4 if detection[3] is None else 8
+            elif detection != stream.slots[slot]:
+                size += 3 if detection[3] is None else 7
+        if size >= keyframe_size and size > 0:
+            return None
+
+        updated = []
+        for detection, slot in zip(detections, matches):
+            if slot is None:
+                continue
+            previous = stream.slots[slot]
+            if detection == previous:
+                continue
+            class_id, score, zone_flag, box = detection
+            entry = [slot, score - previous[1], zone_flag]
+            if box is not None:
+                entry.extend(value - old for value, old in zip(box, previous[3]))
+            updated.append(entry)
+            stream.slots[slot] = detection
+
+        for slot in removed:
+            del stream.slots[slot]
+            heapq.heappush(stream.free_slots, slot)
+        added = []
+        for detection, slot in zip(detections, matches):
+            if slot is None:
+                slot = stream.allocate_slot()
+                stream.slots[slot] = detection
+                added.append([slot] + _to_entry(detection))
+
+        delta = {"s": stream.sequence}
+        if added:
+            delta["a"] = added
+        if updated:
+            delta["u"] = updated
+        if removed:
+            delta["r"] = removed
+        return delta
+
+
+class DetectionDecoder:
+    """Reference decoder of the keyframes and deltas sent by `DetectionEncoder`."""
+
+    def __init__(self):
+        self.streams: dict[str, _DeviceStream] = {}
+
+    def decode(self, device_id: str, frame: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """Decode the next frame of a device.
+
+        Args:
+            device_id (str): Device ID
+            frame (dict[str, Any]): Keyframe or delta, as sent in the `detections`
+                field of the WebSocket messages
+
+        Returns:
+            Optional[dict[str, Any]]: Inference in the format of `detection_data_to_json`,
+                with its detections ordered by slot, or None if it was not deserialized
+
+        Raises:
+            ValueError: If a delta does not follow the previous frame of the device
+        """
+        stream = self.streams.get(device_id)
+        if frame.get("k"):
+            stream = self.streams[device_id] = _DeviceStream()
+            if frame["o"] is None:
+                stream.sequence = frame["s"]
+                return None
+            stream.reset([_from_entry(entry) for entry in frame["o"]])
+        else:
+            if stream is None or frame["s"] != stream.sequence + 1:
+                raise ValueError(
+                    f"Delta {frame['s']} of device {device_id} received without "
+                    "its previous frame"
+                )
+            for entry in frame.get("u", ()):
+                class_id, score, _, box = stream.slots[entry[0]]
+                if box is not None:
+                    box = tuple(value + change for value, change in zip(box, entry[3:]))
+                stream.slots[entry[0]] = (class_id, score + entry[1], entry[2], box)
+            for slot in frame.get("r", ()):
+                del stream.slots[slot]
+            for entry in frame.get("a", ()):
+                stream.slots[entry[0]] = _from_entry(entry[1:])
+        stream.sequence = frame["s"]
+        return {
+            "perception": {
+                "object_detection_list": [
+                    _to_json(stream.slots[slot]) for slot in sorted(stream.slots)
+                ]
+            }
+        }
@@ -0,0 +1,161 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic
+from typing import Optional
+
+from anyio import to_thread
+from app.client.client_factory import get_api_client
+from app.client.client_interface import ClientInferface
+from app.schemas.device import Device
+from app.schemas.device import Devices
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryEntry:
+    """A device list or device details, with the ETag of their JSON representation."""
+
+    def __init__(self, value: BaseModel):
+        self.value = value
+        self.etag = f'"{hashlib.sha1(value.model_dump_json().encode()).hexdigest()}"'
+        self.fetched_at = monotonic()
+
+
+class DeviceInventory:
+    """In-memory inventory of the devices of the console, refreshed in the background.
+
+    The device list and the details of every device already requested are fetched
+    again every `interval` seconds by `run`, so that requests are served from memory.
+    Entries missing or older than twice the interval, e.g. when the refresh fails, are
+    fetched on demand. Details of a device are dropped when the client changes it, and
+    everything is dropped when the client is switched or reloaded.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = (
+            interval
+            if interval is not None
+            else float(os.getenv("DEVICE_INVENTORY_INTERVAL", 30))
+        )
+        self.concurrency = int(os.getenv("DEVICE_INVENTORY_CONCURRENCY", 4))
+        self.client: Optional[ClientInferface] = None
+        self.devices: Optional[InventoryEntry] = None
+        # Details of every device, by device id
+        self.details: dict[str, InventoryEntry] = {}
+        self._subscribed: set[int] = set()
+        self._lock = Lock()
+
+    def _get_client(self) -> ClientInferface:
+        """Current console client, dropping the inventory of the previous one."""
+        client = get_api_client()
+        with self._lock:
+            if client is not self.client:
+                self.client = client
+                self.devices = None
+                self.details.clear()
+                if id(client) not in self._subscribed:
+                    self._subscribed.add(id(client))
+                    client.console_reads.add_invalidation_listener(
+                        functools.partial(self._invalidate, client)
+                    )
+        return client
+
+    def _invalidate(self, client: ClientInferface, device_id: Optional[str]):
+        with self._lock:
+            if client is not self.client:
+                return
+            if device_id is None:
+                self.devices = None
+                self.details.clear()
+            else:
+                self.details.pop(device_id, None)
+
+    def _is_fresh(self, entry: Optional[InventoryEntry]) -> bool:
+        return entry is not None and monotonic() - entry.fetched_at < 2 * self.interval
+
+    def _fetch_devices(self, client: ClientInferface) -> InventoryEntry:
+        entry = InventoryEntry(client.get_devices())
+        with self._lock:
+            if client is self.client:
+                self.devices = entry
+                # Forget the devices no longer enrolled
+                device_ids = {device.device_id for device in entry.value.devices}
+                for device_id in list(self.details):
+                    if device_id not in device_ids:
+                        del self.details[device_id]
+        return entry
+
+    def _fetch_device(self, client: ClientInferface, device_id: str) -> InventoryEntry:
+        entry = InventoryEntry(client.get_device(device_id))
+        with self._lock:
+            if client is self.client:
+                self.details[device_id] = entry
+        return entry
+
+    def get_devices(self) -> InventoryEntry:
+        """Get the device list, fetching it if it is not in the inventory."""
+        client = self._get_client()
+        entry = self.devices
+        if self._is_fresh(entry):
+            return entry
+        return self._fetch_devices(client)
+
+    def get_device(self, device_id: str) -> InventoryEntry:
+        """Get the details of a device, fetching them if they are not in the inventory."""
+        client = self._get_client()
+        entry = self.details.get(device_id)
+        if self._is_fresh(entry):
+            return entry
+        return self._fetch_device(client, device_id)
+
+    def refresh(self):
+        """Fetch again the device list and the details of the known devices."""
+        client = self._get_client()
+        self._fetch_devices(client)
+        device_ids = list(self.details)
+        if not device_ids:
+            return
+
+        def refresh_device(device_id: str):
+            try:
+                self._fetch_device(client, device_id)
+            except Exception as e:
+                logger.warning(f"Failed to refresh device {device_id}: {e}")
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="device-inventory"
+        ) as executor:
+            list(executor.map(refresh_device, device_ids))
+        logger.debug(f"Refreshed the inventory of {len(device_ids)} devices")
+
+    async def run(self):
+        """Refresh the inventory every `interval` seconds until cancelled."""
+        if self.interval <= 0:
+            return
+        while True:
+            try:
+                await to_thread.run_sync(self.refresh)
+            except Exception as e:
+                logger.warning(f"Failed to refresh the device inventory: {e}")
+            await asyncio.sleep(self.interval)
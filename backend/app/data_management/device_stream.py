@@ -14,14 +14,24 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import logging
+import os
+from collections import OrderedDict
 from datetime import datetime
 from datetime import timezone
 from threading import Event
 from threading import Thread
+from time import monotonic
+from time import time
+from typing import Callable
+from typing import Optional
 
 from app.client.client_factory import get_api_client
 from app.client.online_client_v1 import OnlineConsoleClientV1
 from app.client.online_client_v2 import OnlineConsoleClientV2
+from app.client.simulated_client import SimulatedConsoleClient
+from app.data_management.frame_broadcast import FrameBroadcast
+from app.data_management.frame_tracing import FrameTracer
+from app.data_management.image_tiers import FrameImage
 from app.data_management.inference_deserialization import deserialize
 from app.data_management.inference_deserialization import detection_data_to_json
 from app.data_management.inference_deserialization import (
@@ -29,20 +39,70 @@ from app.data_management.inference_deserialization import (
 )
 from app.data_management.inference_deserialization import InferenceFormat
 from app.database.db import get_db
+from app.database.image_store import get_image_store
 from app.database.models import TelemetryTable
-from app.utils.timestamp import convert_iso_timestamp_to_numeric
+from app.database.telemetry_events import publish_telemetry_event
+from app.database.watermarks import watermarks
+from app.schemas.processing import PipelineHealth
+from app.schemas.processing import PipelineState
+from app.utils.metrics import DATA_QUEUE_DEPTH
+from app.utils.metrics import DB_FLUSH_SECONDS
+from app.utils.metrics import DB_ROWS
+from app.utils.metrics import DECODE_SECONDS
+from app.utils.metrics import DROPPED_FRAMES
+from app.utils.metrics import PIPELINE_DUPLICATE_POLLS
+from app.utils.metrics import PIPELINE_ERRORS
+from app.utils.metrics import PIPELINE_FRAMES
+from app.utils.metrics import PIPELINE_POLLS
+from app.utils.timestamp import parse_timestamp
+from app.utils.timestamp import timestamp_to_datetime
 
 logger = logging.getLogger(__name__)
 
 
+def _create_telemetry_entry(
+    device_id: str, timestamp: int, b64_image: str, parsed_inference: dict
+) -> TelemetryTable:
+    """Creates the telemetry table row for a single inference, without persisting it."""
+    image_size_mb = len(b64_image.encode("utf-8")) / 1024 if b64_image else 0
+    inference_size_mb = len(str(parsed_inference).encode("utf-8")) / 1024
+    telemetry_size = image_size_mb + inference_size_mb
+
+    return TelemetryTable(
+        device_id=device_id,
+        timestamp=timestamp_to_datetime(timestamp),
+        size=telemetry_size,
+        telemetry_str=str(parsed_inference),
+        object_count=get_object_count_from_telemetry(
+            parsed_inference, filter_in_zone=False
+        ),
+        object_count_in_zone=get_object_count_from_telemetry(
+            parsed_inference, filter_in_zone=True
+        ),
+        image_digest=_store_image(device_id, b64_image),
+    )
+
+
+def _store_image(device_id: str, b64_image: Optional[str]) -> Optional[str]:
+    """Persists the image in the image store, if enabled, and returns its digest."""
+    image_store = get_image_store()
+    if image_store is None or not b64_image:
+        return None
+    try:
+        return image_store.put(b64_image)
+    except Exception as e:
+        logger.error(f"Error storing image for device_id: {device_id}: {e}")
+        return None
+
+
 def save_telemetry_data(
-    device_id: str, timestamp: str, b64_image: str, parsed_inference: dict
+    device_id: str, timestamp: int, b64_image: str, parsed_inference: dict
 ):
     """Saves telemetry data to the database, including the parsed_inference and the size of the image and inference.
 
     Args:
         device_id (str): The device Id of the device to which the image and parsed inference belong.
-        timestamp (str): The timestamp of the telemetry data.
+        timestamp (int): The timestamp of the telemetry data, in UTC epoch microseconds.
         b64_image (str): The base64 encoded image string.
         parsed_inference (dict): The parsed inference data as a dictionary.
 
@@ -51,51 +111,106 @@ def save_telemetry_data(
     """
     try:
         logger.debug("Starting save_telemetry_data")
-        image_size_mb = len(b64_image.encode("utf-8")) / 1024 if b64_image else 0
-        inference_size_mb = len(str(parsed_inference).encode("utf-8")) / 1024
-        telemetry_size = image_size_mb + inference_size_mb
-
-        telemetry_timestamp = datetime.strptime(timestamp, "%Y%m%d%H%M%S%f").replace(
-            tzinfo=timezone.utc
-        )
-
-        telemetry_entry = TelemetryTable(
-            device_id=device_id,
-            timestamp=telemetry_timestamp,
-            size=telemetry_size,
-            telemetry_str=str(parsed_inference),
-            object_count=get_object_count_from_telemetry(
-                parsed_inference, filter_in_zone=False
-            ),
-            object_count_in_zone=get_object_count_from_telemetry(
-                parsed_inference, filter_in_zone=True
-            ),
+        telemetry_entry = _create_telemetry_entry(
+            device_id, timestamp, b64_image, parsed_inference
         )
 
-        db_session = next(get_db())
-        db_session.add(telemetry_entry)
-        db_session.commit()
+        with DB_FLUSH_SECONDS.labels(operation="single").time():
+            db_session = next(get_db())
+            db_session.add(telemetry_entry)
+            db_session.flush()
+            last_id = telemetry_entry.id
+            publish_telemetry_event(db_session, device_id, [telemetry_entry])
+            db_session.commit()
+        watermarks.advance(device_id, last_id)
+        DB_ROWS.inc()
         logger.info(
             f"Telemetry data saved for device_id: {device_id}, timestamp: {timestamp}"
         )
     except Exception as e:
+        DROPPED_FRAMES.labels(reason="db_error").inc()
         logger.error(
             f"Error saving telemetry data for device_id: {device_id}: {e}",
             exc_info=True,
         )
 
 
+def save_telemetry_batch(device_id: str, telemetries: list[tuple[int, str, dict]]):
+    """Saves several telemetries of the same device to the database in a single commit.
+
+    Args:
+        device_id (str): The device Id of the device to which the telemetries belong.
+        telemetries (list[tuple[int, str, dict]]): (timestamp, b64_image, parsed_inference)
+            tuples, in the order in which they should be inserted. Timestamps are UTC
+            epoch microseconds.
+
+    Returns:
+        None
+    """
+    if not telemetries:
+        return
+    try:
+        logger.debug(f"Starting save_telemetry_batch of {len(telemetries)} entries")
+        telemetry_entries = [
+            _create_telemetry_entry(device_id, timestamp, b64_image, parsed_inference)
+            for timestamp, b64_image, parsed_inference in telemetries
+        ]
+
+        with DB_FLUSH_SECONDS.labels(operation="batch").time():
+            db_session = next(get_db())
+            db_session.add_all(telemetry_entries)
+            db_session.flush()
+            last_id = max(entry.id for entry in telemetry_entries)
+            publish_telemetry_event(db_session, device_id, telemetry_entries)
+            db_session.commit()
+        watermarks.advance(device_id, last_id)
+        DB_ROWS.inc(len(telemetry_entries))
+        logger.info(
+            f"{len(telemetry_entries)} telemetries saved for device_id: {device_id}"
+        )
+    except Exception as e:
+        DROPPED_FRAMES.labels(reason="db_error").inc(len(telemetries))
+        logger.error(
+            f"Error saving telemetry batch for device_id: {device_id}: {e}",
+            exc_info=True,
+        )
+
+
 class DevicePipeline:
     """DevicePipeline manages a thread that collects data from the device identified by device_id."""
 
-    def __init__(self, device_id: str, api_client, data_queue):
+    MAX_CATCH_UP_INFERENCES = 500
+    MAX_SEEN_INFERENCE_IDS = 4096
+
+    def __init__(
+        self,
+        device_id: str,
+        api_client,
+        frames: FrameBroadcast,
+        tracer: Optional[FrameTracer] = None,
+        on_frame: Optional[Callable[[tuple], None]] = None,
+    ):
         self.device_id: str = device_id
         self.data_thread = None
         self.active_pipeline: Event = Event()
-        self.last_seen = None
+        self.stop_requested: Event = Event()
+        self.state = PipelineState.stopped
+        self.consecutive_failures = 0
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self.last_poll: Optional[float] = None
+        self.last_frame: Optional[float] = None
+        # UTC epoch microseconds of the last inference processed
+        self.last_seen: Optional[int] = None
+        self.seen_inference_ids: OrderedDict[str, None] = OrderedDict()
         self.api_client = api_client
-        self.data_queue = data_queue
+        self.frames = frames
+        self.tracer = tracer or FrameTracer()
+        self.on_frame = on_frame
         self.console_type: None | InferenceFormat = self._get_console_type()
+        self._polls = PIPELINE_POLLS.labels(device_id=device_id)
+        self._duplicate_polls = PIPELINE_DUPLICATE_POLLS.labels(device_id=device_id)
+        self._frames = PIPELINE_FRAMES.labels(device_id=device_id)
         logger.debug(f"DevicePipeline initialized for device_id: {device_id}")
 
     def _get_console_type(self) -> None | InferenceFormat:
@@ -103,6 +218,8 @@ class DevicePipeline:
             return InferenceFormat.ZONE_DETECTION
         elif isinstance(self.api_client, OnlineConsoleClientV2):
             return InferenceFormat.OBJECT_DETECTION_EXPANDED
+        elif isinstance(self.api_client, SimulatedConsoleClient):
+            return self.api_client.inference_format
         else:
             return None
 
@@ -118,74 +235,287 @@ class DevicePipeline:
                 raise
         return self.api_client
 
-    def stop_data_collection(self):
-        logger.info(f"Stopping data collection for device_id: {self.device_id}")
+    def request_stop(self):
+        """Signal the collector to stop after its current poll, without waiting."""
         self.active_pipeline.clear()
-        if self.data_thread is not None:
-            self.data_thread.join()
-            self.data_queue.clear()
+        self.stop_requested.set()
+
+    def wait_stopped(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the collector has finished its current poll, and saved it.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait, PIPELINE_STOP_TIMEOUT
+                by default
+
+        Returns:
+            bool: Whether the collector has stopped
+        """
+        if self.data_thread is None:
+            return True
+        if timeout is None:
+            timeout = float(os.getenv("PIPELINE_STOP_TIMEOUT", 10))
+        self.data_thread.join(max(timeout, 0))
+        if self.data_thread.is_alive():
+            logger.warning(
+                f"Data collection of device_id: {self.device_id} did not stop in {timeout:.1f}s"
+            )
+            return False
+        return True
+
+    def clear_queue(self):
+        self.frames.clear(self.device_id)
+
+    def stop_data_collection(self, timeout: Optional[float] = None) -> bool:
+        logger.info(f"Stopping data collection for device_id: {self.device_id}")
+        self.request_stop()
+        stopped = self.wait_stopped(timeout)
+        self.clear_queue()
+        return stopped
 
     def is_active(self):
         return self.active_pipeline.is_set()
 
-    def start_data_collection(self, get_image: bool = True):
+    def start_data_collection(self, get_image: bool = True, catch_up: bool = False):
+        if catch_up and get_image:
+            logger.warning(
+                "Catch-up mode is only available without images, "
+                f"collecting only the latest data for device_id: {self.device_id}"
+            )
+            catch_up = False
         if not self.active_pipeline.is_set():
+            # A collector stopped with a deadline may still be finishing its poll
+            if not self.wait_stopped():
+                raise Exception(
+                    f"Previous data collection of device {self.device_id} is still running"
+                )
             logger.info(f"Starting data collection for device_id: {self.device_id}")
+            self.stop_requested.clear()
             self.active_pipeline.set()
-            self.data_thread = Thread(target=self.collect_data, args=(get_image,))
+            self.data_thread = Thread(
+                target=self.collect_data, args=(get_image, catch_up), daemon=True
+            )
             self.data_thread.start()
 
-    def collect_data(self, get_image: bool = True):
-        while self.active_pipeline.is_set():
+    def _parse_inference(self, content: str) -> dict:
+        with DECODE_SECONDS.time():
+            deserialize_inference = deserialize(
+                content, inference_format=self.console_type
+            )
+            return detection_data_to_json(deserialize_inference)
+
+    def _mark_as_seen(self, inference_id: str) -> bool:
+        """Registers an inference id, returning False if it was already processed."""
+        if inference_id in self.seen_inference_ids:
+            return False
+        self.seen_inference_ids[inference_id] = None
+        if len(self.seen_inference_ids) > DevicePipeline.MAX_SEEN_INFERENCE_IDS:
+            self.seen_inference_ids.popitem(last=False)
+        return True
+
+    def _enqueue(self, frame: tuple):
+        # Frames collected while stopping are saved, but no longer streamed
+        if not self.active_pipeline.is_set():
+            return
+        self.frames.publish(frame)
+        if self.on_frame is not None:
             try:
-                api_client = self.get_client()
-                b64_image, raw_inference = api_client.get_latest_data(
-                    device_id=self.device_id,
-                    get_image=get_image,
+                self.on_frame(frame)
+            except Exception as e:
+                logger.warning(
+                    f"Error relaying frame of device_id: {self.device_id}: {e}"
                 )
 
-                if (
-                    raw_inference["timestamp"]
-                    and raw_inference["timestamp"] != self.last_seen
-                ):
-                    # Process datetime for better handling
-                    processed_timestamp = convert_iso_timestamp_to_numeric(
-                        raw_inference["timestamp"]
-                    )
+    def _collect_latest_data(self, get_image: bool):
+        """Fetches the latest inference and stores it if it has not been seen yet."""
+        api_client = self.get_client()
+        polled = time()
+        b64_image, raw_inference = api_client.get_latest_data(
+            device_id=self.device_id,
+            get_image=get_image,
+        )
+        self._polls.inc()
+
+        if not raw_inference["timestamp"]:
+            self._duplicate_polls.inc()
+            return
+        try:
+            processed_timestamp = parse_timestamp(raw_inference["timestamp"])
+        except ValueError as e:
+            DROPPED_FRAMES.labels(reason="invalid_timestamp").inc()
+            logger.warning(f"Inference of device_id: {self.device_id} dropped: {e}")
+            return
+        if processed_timestamp == self.last_seen:
+            self._duplicate_polls.inc()
+            return
+
+        logger.debug(f"New data received for device_id: {self.device_id}")
+        trace = self.tracer.start(self.device_id, processed_timestamp, polled)
+        trace.mark("fetched")
+        parsed_inference = self._parse_inference(raw_inference["content"])
+        trace.mark("decoded")
+        trace.mark("enqueued")
+        self._enqueue(
+            (
+                FrameImage(b64_image) if b64_image else None,
+                parsed_inference,
+                processed_timestamp,
+                self.device_id,
+                trace,
+            )
+        )
+        save_telemetry_data(
+            device_id=self.device_id,
+            timestamp=processed_timestamp,
+            b64_image=b64_image,
+            parsed_inference=parsed_inference,
+        )
+        trace.mark("persisted")
+        self.tracer.record(trace, ["console", "fetch", "decode", "persist"])
+        self._frames.inc()
+        self.last_frame = time()
+
+        self.last_seen = processed_timestamp
+
+    def _collect_missed_data(self):
+        """Fetches every inference newer than the last seen one and stores them in order."""
+        api_client = self.get_client()
+        polled = time()
+        raw_inferences = api_client.get_inferences_since(
+            device_id=self.device_id,
+            since=self.last_seen,
+            limit=DevicePipeline.MAX_CATCH_UP_INFERENCES,
+        )
+        self._polls.inc()
+        fetched = time()
+
+        telemetries = []
+        traces = []
+        for raw_inference in raw_inferences:
+            processed_timestamp = raw_inference["timestamp_us"]
+            if self.last_seen and processed_timestamp < self.last_seen:
+                continue
+            if not self._mark_as_seen(raw_inference["id"]):
+                continue
+
+            trace = self.tracer.start(self.device_id, processed_timestamp, polled)
+            trace.mark("fetched", fetched)
+            parsed_inference = self._parse_inference(raw_inference["content"])
+            trace.mark("decoded")
+            trace.mark("enqueued")
+            self._enqueue(
+                (None, parsed_inference, processed_timestamp, self.device_id, trace)
+            )
+            telemetries.append((processed_timestamp, None, parsed_inference))
+            traces.append(trace)
+            self.last_seen = processed_timestamp
 
-                    logger.debug(f"New data received for device_id: {self.device_id}")
-                    deserialize_inference = deserialize(
-                        raw_inference["content"], inference_format=self.console_type
-                    )
-                    parsed_inference = detection_data_to_json(deserialize_inference)
-                    self.data_queue.append(
-                        (
-                            b64_image,
-                            parsed_inference,
-                            processed_timestamp,
-                            self.device_id,
+        if not telemetries:
+            self._duplicate_polls.inc()
+        else:
+            self._frames.inc(len(telemetries))
+            self.last_frame = time()
+            logger.debug(
+                f"{len(telemetries)} new inferences received for device_id: {self.device_id}"
+            )
+            save_telemetry_batch(device_id=self.device_id, telemetries=telemetries)
+            persisted = time()
+            for trace in traces:
+                trace.mark("persisted", persisted)
+                self.tracer.record(trace, ["console", "fetch", "decode", "persist"])
+
+    def collect_data(self, get_image: bool = True, catch_up: bool = False):
+        """Collects data until stopped, resuming after failures with exponential backoff.
+
+        Failed polls are retried after PIPELINE_BACKOFF_INITIAL seconds, doubled after
+        each consecutive failure up to PIPELINE_BACKOFF_MAX. The collector gives up
+        after PIPELINE_MAX_RESTARTS consecutive failures, if set, and can then be
+        started again.
+        """
+        initial_backoff = float(os.getenv("PIPELINE_BACKOFF_INITIAL", 1))
+        max_backoff = float(os.getenv("PIPELINE_BACKOFF_MAX", 60))
+        max_restarts = int(os.getenv("PIPELINE_MAX_RESTARTS", 0))
+        backoff = initial_backoff
+        self.state = PipelineState.running
+        self.consecutive_failures = 0
+        try:
+            while self.active_pipeline.is_set():
+                try:
+                    if catch_up:
+                        self._collect_missed_data()
+                    else:
+                        self._collect_latest_data(get_image)
+                except Exception as e:
+                    PIPELINE_ERRORS.labels(device_id=self.device_id).inc()
+                    self.consecutive_failures += 1
+                    self.last_error = str(e)
+                    if max_restarts and self.consecutive_failures > max_restarts:
+                        logger.error(
+                            f"Data pipeline of device_id: {self.device_id} failed "
+                            f"{self.consecutive_failures} times in a row, giving up: {e}"
                         )
+                        self.state = PipelineState.failed
+                        return
+                    logger.error(
+                        f"Data pipeline error in collect_data, retrying in {backoff:.1f}s: {e}",
+                        # The traceback of repeated failures is not logged again
+                        exc_info=self.consecutive_failures == 1,
                     )
-                    save_telemetry_data(
-                        device_id=self.device_id,
-                        timestamp=processed_timestamp,
-                        b64_image=b64_image,
-                        parsed_inference=parsed_inference,
+                    self.state = PipelineState.backing_off
+                    if self.stop_requested.wait(backoff):
+                        return
+                    self.restarts += 1
+                    backoff = min(backoff * 2, max_backoff)
+                    continue
+
+                self.last_poll = time()
+                if self.consecutive_failures:
+                    logger.info(
+                        f"Data pipeline of device_id: {self.device_id} recovered after "
+                        f"{self.consecutive_failures} failures"
                     )
-
-                    self.last_seen = raw_inference["timestamp"]
-            except Exception as e:
-                logger.error(f"Data pipeline error in collect_data: {e}", exc_info=True)
-                raise
+                    self.consecutive_failures = 0
+                    backoff = initial_backoff
+                    self.state = PipelineState.running
+        finally:
+            # Whatever stopped the collector, the device can be started again
+            self.active_pipeline.clear()
+            if self.state != PipelineState.failed:
+                self.state = PipelineState.stopped
+
+    def health(self) -> PipelineHealth:
+        def to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+            if timestamp is None:
+                return None
+            return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+        return PipelineHealth(
+            device_id=self.device_id,
+            state=self.state,
+            consecutive_failures=self.consecutive_failures,
+            restarts=self.restarts,
+            last_error=self.last_error,
+            last_poll=to_datetime(self.last_poll),
+            last_frame=to_datetime(self.last_frame),
+        )
 
 
 class DataPipeline:
-    """DataPipeline is in charge of centralizing the access to data from all devices."""
+    """DataPipeline is in charge of centralizing the access to data from all devices.
+
+    The frames of every device are broadcast to the subscribed WebSocket clients, see
+    `FrameBroadcast`. Stopping a device only drops its frames.
+
+    With worker coordination, data collection requests are forwarded to the
+    coordinator, which runs each device pipeline in a single worker.
+    """
 
     def __init__(self):
-        self.data_queue = []
+        self.frames = FrameBroadcast()
         self.device_pipelines: dict[str, DevicePipeline] = {}
         self.api_client = None
+        self.tracer = FrameTracer()
+        self.coordinator = None
+        DATA_QUEUE_DEPTH.set_function(self.frames.queue_depth)
         logger.debug("DataPipeline initialized")
 
     def get_client(self):
@@ -200,6 +530,8 @@ class DataPipeline:
         return self.api_client
 
     def is_active(self, device_id=None):
+        if self.coordinator is not None:
+            return self.coordinator.is_active(device_id)
         if device_id:
             if device_id in self.device_pipelines:
                 return self.device_pipelines[device_id].is_active()
@@ -211,41 +543,118 @@ class DataPipeline:
                     return True
             return False
 
+    def _publish_frame(self, frame: tuple):
+        if self.coordinator is not None:
+            self.coordinator.publish_frame(frame)
+
+    @property
+    def subscribers(self) -> int:
+        """Number of WebSocket clients receiving the frames."""
+        return len(self.frames)
+
+    def enqueue(self, frame: tuple):
+        """Broadcast a frame collected by another worker."""
+        self.frames.publish(frame)
+
     def get_device_pipeline(self, device_id: str):
         device_pipeline = self.device_pipelines.get(device_id, None)
         if not device_pipeline:
             logger.debug(f"Creating new DevicePipeline for device_id: {device_id}")
             device_pipeline = DevicePipeline(
-                device_id, self.get_client(), self.data_queue
+                device_id,
+                self.get_client(),
+                self.frames,
+                self.tracer,
+                on_frame=self._publish_frame,
             )
             self.device_pipelines[device_id] = device_pipeline
         return device_pipeline
 
-    def start_data_collection(self, device_id: str, get_image: bool = True):
+    def start_data_collection(
+        self, device_id: str, get_image: bool = True, catch_up: bool = False
+    ):
+        if self.coordinator is not None:
+            logger.info(f"Requesting data collection for device_id: {device_id}")
+            self.coordinator.request_start(device_id, get_image, catch_up)
+            return
+        self.start_local_collection(device_id, get_image, catch_up)
+
+    def start_local_collection(
+        self, device_id: str, get_image: bool = True, catch_up: bool = False
+    ):
         logger.info(f"Starting data collection for device_id: {device_id}")
         device_pipeline = self.get_device_pipeline(device_id)
-        device_pipeline.start_data_collection(get_image)
+        device_pipeline.start_data_collection(get_image, catch_up)
 
     def stop_data_collection(self, device_id: str):
-        logger.info(f"Stopping data collection for device_id: {device_id}")
-        device_pipeline = self.get_device_pipeline(device_id)
-        device_pipeline.stop_data_collection()
-
-    def reset_client(self) -> None:
+        if self.coordinator is not None:
+            logger.info(
+                f"Requesting stop of data collection for device_id: {device_id}"
+            )
+            self.coordinator.request_stop(device_id)
+            return
+        self.stop_local_collection(device_id)
+
+    def stop_local_collection(self, device_id: str):
+        self.stop_pipelines([device_id])
+
+    def stop_pipelines(
+        self, device_ids: list[str], timeout: Optional[float] = None
+    ) -> list[str]:
+        """Stop the data collection of several devices at once.
+
+        Every collector is signalled first, then awaited until a shared deadline, so
+        stopping many devices takes as long as the slowest one. Each collector
+        finishes and saves its current poll before stopping.
+
+        Args:
+            device_ids (list[str]): Devices to stop
+            timeout (Optional[float]): Maximum seconds to wait for all of them,
+                PIPELINE_STOP_TIMEOUT by default
+
+        Returns:
+            list[str]: Devices whose collector did not stop before the deadline
+        """
+        if timeout is None:
+            timeout = float(os.getenv("PIPELINE_STOP_TIMEOUT", 10))
+        device_pipelines = [
+            self.device_pipelines[device_id]
+            for device_id in device_ids
+            if device_id in self.device_pipelines
+        ]
+        for device_pipeline in device_pipelines:
+            logger.info(
+                f"Stopping data collection for device_id: {device_pipeline.device_id}"
+            )
+            device_pipeline.request_stop()
+
+        deadline = monotonic() + timeout
+        not_stopped = []
+        for device_pipeline in device_pipelines:
+            if not device_pipeline.wait_stopped(deadline - monotonic()):
+                not_stopped.append(device_pipeline.device_id)
+            device_pipeline.clear_queue()
+        return not_stopped
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """Stop every data collection of this worker."""
+        not_stopped = self.stop_pipelines(list(self.device_pipelines), timeout)
+        if not_stopped:
+            logger.warning(f"Data collection still running at shutdown: {not_stopped}")
+
+    def reset_client(self, client_type: Optional[str] = None) -> None:
+        if self.coordinator is not None:
+            self.coordinator.request_reset(client_type)
+        self.reset_local_client()
+
+    def reset_local_client(self) -> None:
         logger.info("Resetting the API client")
 
         logger.info(
             "Resetting device pipelines: "
             + str([elem.api_client for elem in self.device_pipelines.values()])
         )
-        for device_pipeline in self.device_pipelines.values():
-            device_pipeline.stop_data_collection()
+        self.stop_pipelines(list(self.device_pipelines))
         self.device_pipelines.clear()
 
         self.api_client = None
-
-    def get_data(self):
-        if self.data_queue:
-            logger.debug("Retrieving data from data queue")
-            return self.data_queue.pop(0)
-        return None
@@ -0,0 +1,139 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Broadcast of the collected frames to every WebSocket client."""
+import asyncio
+import logging
+import os
+from collections import deque
+from threading import Lock
+from typing import Optional
+
+from app.utils.metrics import DROPPED_FRAMES
+
+logger = logging.getLogger(__name__)
+
+
+class FrameSubscription:
+    """Frames waiting to be sent to one client, in a bounded queue per device.
+
+    Devices are read in turn, so that a busy device doesn't delay the others. When a
+    client falls behind, the oldest frames of its queue are dropped.
+    """
+
+    def __init__(self, max_frames: int, loop: asyncio.AbstractEventLoop):
+        self.max_frames = max_frames
+        self.queues: dict[str, deque] = {}
+        self._next_queue = 0
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._lock = Lock()
+
+    def put(self, frame: tuple):
+        """Queue a frame, from any thread."""
+        with self._lock:
+            queue = self.queues.get(frame[3])
+            if queue is None:
+                queue = self.queues[frame[3]] = deque()
+            if len(queue) >= self.max_frames:
+                queue.popleft()
+                DROPPED_FRAMES.labels(reason="slow_subscriber").inc()
+            queue.append(frame)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # Event loop closed
+
+    def clear(self, device_id: str) -> int:
+        """Drop the queued frames of a device, returning how many were dropped."""
+        with self._lock:
+            queue = self.queues.pop(device_id, None)
+        return len(queue) if queue else 0
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in list(self.queues.values()))
+
+    def get_nowait(self) -> Optional[tuple]:
+        """Pop the oldest frame of the next device with queued frames."""
+        with self._lock:
+            device_ids = list(self.queues)
+            for offset in range(len(device_ids)):
+                index = (self._next_queue + offset) % len(device_ids)
+                queue = self.queues[device_ids[index]]
+                if queue:
+                    self._next_queue = index + 1
+                    return queue.popleft()
+        return None
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[tuple]:
+        """Wait for the next frame, returning None if none arrived within `timeout`."""
+        frame = self.get_nowait()
+        if frame is not None:
+            return frame
+        self._ready.clear()
+        # A frame may have been queued before the event was cleared
+        frame = self.get_nowait()
+        if frame is not None:
+            return frame
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except TimeoutError:
+            return None
+        return self.get_nowait()
+
+
+class FrameBroadcast:
+    """Delivers every collected frame to every subscribed client.
+
+    Each subscriber has its own queues, holding up to `SUBSCRIBER_QUEUE_SIZE` frames
+    per device (default 100). Frames are only queued while clients are subscribed,
+    they are saved to the database whether or not they are sent.
+    """
+
+    def __init__(self, max_frames: Optional[int] = None):
+        self.max_frames = max_frames or int(os.getenv("SUBSCRIBER_QUEUE_SIZE", 100))
+        self._subscriptions: list[FrameSubscription] = []
+        self._lock = Lock()
+
+    def subscribe(self) -> FrameSubscription:
+        """Subscribe a client running in the current event loop."""
+        subscription = FrameSubscription(self.max_frames, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: FrameSubscription):
+        with self._lock:
+            self._subscriptions = [
+                other for other in self._subscriptions if other is not subscription
+            ]
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, frame: tuple):
+        """Queue a frame for every subscriber."""
+        for subscription in self._subscriptions:
+            subscription.put(frame)
+
+    def clear(self, device_id: str):
+        """Drop the queued frames of a device, e.g. when its collection stops."""
+        dropped = sum(
+            subscription.clear(device_id) for subscription in self._subscriptions
+        )
+        DROPPED_FRAMES.labels(reason="queue_cleared").inc(dropped)
+
+    def queue_depth(self) -> int:
+        return sum(len(subscription) for subscription in self._subscriptions)
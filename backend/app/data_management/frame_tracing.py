@@ -0,0 +1,172 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import json
+import logging
+import os
+import random
+import statistics
+from collections import defaultdict
+from collections import deque
+from threading import Lock
+from time import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Duration of each stage, as the time between two marks of the frame
+STAGES = {
+    "console": ("inference", "fetched"),
+    "fetch": ("polled", "fetched"),
+    "decode": ("fetched", "decoded"),
+    "persist": ("enqueued", "persisted"),
+    "delivery": ("enqueued", "sent"),
+    "total": ("inference", "sent"),
+}
+
+
+class FrameTrace:
+    """Times, in seconds since the epoch, at which a frame went through each stage.
+
+    Marks: `inference` (device inference time), `polled` (console poll started),
+    `fetched` (console poll returned, including the image download), `decoded`,
+    `enqueued` (waiting for the WebSocket), `persisted` (committed to the database)
+    and `sent` (delivered through the WebSocket).
+    """
+
+    __slots__ = ("device_id", "marks", "sampled")
+
+    def __init__(self, device_id: str, marks: dict[str, float], sampled: bool):
+        self.device_id = device_id
+        self.marks = marks
+        self.sampled = sampled
+
+    def mark(self, stage: str, at: Optional[float] = None):
+        self.marks[stage] = time() if at is None else at
+
+    def durations(self, stages: list[str]) -> dict[str, float]:
+        """Duration of the given stages, in seconds, when both of their marks are set."""
+        durations = {}
+        for stage in stages:
+            start, end = STAGES[stage]
+            if start in self.marks and end in self.marks:
+                durations[stage] = self.marks[end] - self.marks[start]
+        return durations
+
+
+class FrameTracer:
+    """Keeps rolling per-device stage latencies of the frames, and exports a sample.
+
+    The last `window` durations of every stage and device are kept in memory. If a
+    trace file is configured, a `sample_rate` fraction of the frames is appended to
+    it as JSON lines once delivered through the WebSocket.
+    """
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        trace_file: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+    ):
+        self.window = window or int(os.getenv("FRAME_TRACE_WINDOW", 1000))
+        self.trace_file = trace_file or os.getenv("FRAME_TRACE_FILE")
+        self.sample_rate = (
+            sample_rate
+            if sample_rate is not None
+            else float(os.getenv("FRAME_TRACE_SAMPLE_RATE", 0.01))
+        )
+        self._durations: dict[str, dict[str, deque]] = defaultdict(
+            lambda: defaultdict(lambda: deque(maxlen=self.window))
+        )
+        self._lock = Lock()
+
+    def start(self, device_id: str, inference_timestamp: int, polled: float):
+        """Create the trace of a frame fetched by a poll started at `polled`.
+
+        Args:
+            device_id (str): Device ID
+            inference_timestamp (int): Timestamp of the inference, in UTC epoch microseconds
+            polled (float): Time at which the console poll started
+
+        Returns:
+            FrameTrace: Trace of the frame
+        """
+        inference = inference_timestamp / 1_000_000
+        sampled = self.trace_file is not None and random.random() < self.sample_rate
+        return FrameTrace(
+            device_id, {"inference": inference, "polled": polled}, sampled
+        )
+
+    def record(self, trace: FrameTrace, stages: list[str]):
+        """Add the duration of the given stages of a frame to the rolling windows."""
+        durations = trace.durations(stages)
+        with self._lock:
+            device_durations = self._durations[trace.device_id]
+            for stage, duration in durations.items():
+                device_durations[stage].append(duration)
+
+    def complete(self, trace: FrameTrace):
+        """Record the first delivery of a frame, exporting it if it was sampled."""
+        if "sent" in trace.marks:
+            return
+        trace.mark("sent")
+        self.record(trace, ["delivery", "total"])
+        if trace.sampled:
+            self._export(trace)
+
+    def _export(self, trace: FrameTrace):
+        record = {
+            "device_id": trace.device_id,
+            "marks": trace.marks,
+            "durations": trace.durations(list(STAGES)),
+        }
+        try:
+            with self._lock, open(self.trace_file, "a") as file:
+                file.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to export frame trace to {self.trace_file}: {e}")
+
+    def summary(self, device_id: Optional[str] = None) -> dict[str, dict[str, dict]]:
+        """Latency breakdown, in milliseconds, of the frames in the rolling windows.
+
+        Args:
+            device_id (Optional[str]): Only summarize this device
+
+        Returns:
+            dict[str, dict[str, dict]]: Count, mean, p50, p95 and max of each stage, by device
+        """
+        with self._lock:
+            snapshot = {
+                device: {stage: list(values) for stage, values in stages.items()}
+                for device, stages in self._durations.items()
+                if device_id is None or device == device_id
+            }
+
+        summary = {}
+        for device, stages in snapshot.items():
+            summary[device] = {}
+            for stage in STAGES:
+                values = sorted(stages.get(stage, []))
+                if not values:
+                    continue
+                summary[device][stage] = {
+                    "count": len(values),
+                    "mean_ms": statistics.fmean(values) * 1000,
+                    "p50_ms": values[len(values) // 2] * 1000,
+                    "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))]
+                    * 1000,
+                    "max_ms": values[-1] * 1000,
+                }
+        return summary
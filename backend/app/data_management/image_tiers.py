@@ -0,0 +1,127 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Resolution tiers of the frame images streamed to the WebSocket clients."""
+import base64
+import io
+import logging
+import os
+from threading import Lock
+from typing import NamedTuple
+from typing import Optional
+
+from app.utils.metrics import IMAGE_ENCODE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Tier streaming the image as received from the console, without re-encoding
+FULL_TIER = "full"
+DEFAULT_IMAGE_TIERS = "preview:640x480:jpeg:80,thumbnail:160x120:webp:70"
+
+
+class ImageTier(NamedTuple):
+    name: str
+    max_width: int
+    max_height: int
+    codec: str
+    quality: int
+
+
+def parse_image_tiers(spec: str) -> dict[str, ImageTier]:
+    """Parse tiers given as comma separated `name:WIDTHxHEIGHT:codec:quality` entries.
+
+    Example:
+        >>> parse_image_tiers("preview:640x480:jpeg:80")
+        {'preview': ImageTier(name='preview', max_width=640, max_height=480, codec='jpeg', quality=80)}
+    """
+    tiers = {}
+    for entry in filter(None, (entry.strip() for entry in spec.split(","))):
+        try:
+            name, size, codec, quality = entry.split(":")
+            width, height = size.lower().split("x")
+            tier = ImageTier(name, int(width), int(height), codec.lower(), int(quality))
+        except ValueError:
+            raise ValueError(
+                f"Invalid image tier '{entry}', expected name:WIDTHxHEIGHT:codec:quality"
+            )
+        if tier.codec not in ("jpeg", "webp", "png"):
+            raise ValueError(
+                f"Unsupported codec '{tier.codec}' in image tier '{entry}'"
+            )
+        if name == FULL_TIER:
+            raise ValueError(f"The '{FULL_TIER}' image tier cannot be redefined")
+        tiers[name] = tier
+    return tiers
+
+
+IMAGE_TIERS = parse_image_tiers(os.getenv("IMAGE_TIERS", DEFAULT_IMAGE_TIERS))
+
+
+def get_tier_names() -> list[str]:
+    return [FULL_TIER, *IMAGE_TIERS]
+
+
+def encode_tier(b64_image: str, tier: ImageTier) -> str:
+    """Downscale a base64 image to fit the tier and re-encode it in the tier codec.
+
+    Requires the optional `Pillow` dependency (`pip install .[images]`).
+
+    Args:
+        b64_image (str): Base64 encoded source image
+        tier (ImageTier): Target tier
+
+    Returns:
+        str: Base64 encoded image of the tier
+    """
+    from PIL import Image
+
+    with IMAGE_ENCODE_SECONDS.labels(tier=tier.name).time():
+        image = Image.open(io.BytesIO(base64.b64decode(b64_image)))
+        # JPEG sources are decoded directly at a reduced scale
+        image.draft("RGB", (tier.max_width, tier.max_height))
+        image.thumbnail((tier.max_width, tier.max_height), Image.Resampling.BILINEAR)
+        if tier.codec == "jpeg" and image.mode != "RGB":
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format=tier.codec, quality=tier.quality)
+        return base64.b64encode(output.getvalue()).decode("utf-8")
+
+
+class FrameImage:
+    """Image of a frame, encoded at most once per tier however many clients read it."""
+
+    def __init__(self, b64_image: str):
+        self.b64_image = b64_image
+        self._encoded = {FULL_TIER: b64_image}
+        self._lock = Lock()
+
+    def get(self, tier_name: str = FULL_TIER) -> Optional[str]:
+        """Base64 image of the tier, falling back to the full image if it can't be encoded."""
+        encoded = self._encoded.get(tier_name)
+        if encoded is not None:
+            return encoded
+        with self._lock:
+            encoded = self._encoded.get(tier_name)
+            if encoded is None:
+                try:
+                    encoded = encode_tier(self.b64_image, IMAGE_TIERS[tier_name])
+                except ImportError:
+                    logger.warning("Image tiers require Pillow, sending full images")
+                    encoded = self.b64_image
+                except Exception as e:
+                    logger.warning(f"Couldn't encode the {tier_name} image tier: {e}")
+                    encoded = self.b64_image
+                self._encoded[tier_name] = encoded
+        return encoded
@@ -0,0 +1,164 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from base64 import b64encode
+from collections import Counter
+from typing import Any
+
+import flatbuffers
+from app.data_management.inference_deserialization import InferenceFormat
+from app.data_management.SmartCamera import BoundingBox2d
+from app.data_management.SmartCamera import GeneralObject
+from app.data_management.SmartCamera import ObjectDetectionData
+from app.data_management.SmartCamera import ObjectDetectionTop
+from app.data_management.SmartCamera.BoundingBox import BoundingBox
+from app.data_management.SmartCameraV2 import BoundingBox2d as BoundingBox2dV2
+from app.data_management.SmartCameraV2 import CountData as CountDataV2
+from app.data_management.SmartCameraV2 import GeneralObject as GeneralObjectV2
+from app.data_management.SmartCameraV2 import (
+    ObjectDetectionData as ObjectDetectionDataV2,
+)
+from app.data_management.SmartCameraV2 import (
+    ObjectDetectionTop as ObjectDetectionTopV2,
+)
+from app.data_management.SmartCameraV2.BoundingBox import (
+    BoundingBox as BoundingBoxV2,
+)
+
+
+def _build_bounding_box(
+    builder: flatbuffers.Builder, module, bounding_box: dict
+) -> int:
+    module.BoundingBox2dStart(builder)
+    module.BoundingBox2dAddLeft(builder, bounding_box["left"])
+    module.BoundingBox2dAddTop(builder, bounding_box["top"])
+    module.BoundingBox2dAddRight(builder, bounding_box["right"])
+    module.BoundingBox2dAddBottom(builder, bounding_box["bottom"])
+    return module.BoundingBox2dEnd(builder)
+
+
+def _build_zone_detection(
+    builder: flatbuffers.Builder, detections: list[dict[str, Any]]
+) -> int:
+    objects = []
+    for detection in detections:
+        bounding_box = _build_bounding_box(
+            builder, BoundingBox2d, detection["bounding_box"]
+        )
+        GeneralObject.GeneralObjectStart(builder)
+        GeneralObject.GeneralObjectAddClassId(builder, detection["class_id"])
+        GeneralObject.GeneralObjectAddBoundingBoxType(
+            builder, BoundingBox.BoundingBox2d
+        )
+        GeneralObject.GeneralObjectAddBoundingBox(builder, bounding_box)
+        GeneralObject.GeneralObjectAddScore(builder, detection["score"])
+        GeneralObject.GeneralObjectAddZoneflag(builder, detection["zone_flag"])
+        objects.append(GeneralObject.GeneralObjectEnd(builder))
+
+    ObjectDetectionData.ObjectDetectionDataStartObjectDetectionListVector(
+        builder, len(objects)
+    )
+    for obj in reversed(objects):
+        builder.PrependUOffsetTRelative(obj)
+    object_list = builder.EndVector()
+
+    ObjectDetectionData.ObjectDetectionDataStart(builder)
+    ObjectDetectionData.ObjectDetectionDataAddObjectDetectionList(builder, object_list)
+    perception = ObjectDetectionData.ObjectDetectionDataEnd(builder)
+
+    ObjectDetectionTop.ObjectDetectionTopStart(builder)
+    ObjectDetectionTop.ObjectDetectionTopAddPerception(builder, perception)
+    return ObjectDetectionTop.ObjectDetectionTopEnd(builder)
+
+
+def _build_expanded_object_detection(
+    builder: flatbuffers.Builder, detections: list[dict[str, Any]]
+) -> int:
+    objects = []
+    for detection in detections:
+        bounding_box = _build_bounding_box(
+            builder, BoundingBox2dV2, detection["bounding_box"]
+        )
+        GeneralObjectV2.GeneralObjectStart(builder)
+        GeneralObjectV2.GeneralObjectAddClassId(builder, detection["class_id"])
+        GeneralObjectV2.GeneralObjectAddBoundingBoxType(
+            builder, BoundingBoxV2.BoundingBox2d
+        )
+        GeneralObjectV2.GeneralObjectAddBoundingBox(builder, bounding_box)
+        GeneralObjectV2.GeneralObjectAddScore(builder, detection["score"])
+        objects.append(GeneralObjectV2.GeneralObjectEnd(builder))
+
+    ObjectDetectionDataV2.ObjectDetectionDataStartObjectDetectionListVector(
+        builder, len(objects)
+    )
+    for obj in reversed(objects):
+        builder.PrependUOffsetTRelative(obj)
+    object_list = builder.EndVector()
+
+    ObjectDetectionDataV2.ObjectDetectionDataStart(builder)
+    ObjectDetectionDataV2.ObjectDetectionDataAddObjectDetectionList(
+        builder, object_list
+    )
+    perception = ObjectDetectionDataV2.ObjectDetectionDataEnd(builder)
+
+    area_counts = []
+    for class_id, count in sorted(
+        Counter(detection["class_id"] for detection in detections).items()
+    ):
+        CountDataV2.CountDataStart(builder)
+        CountDataV2.CountDataAddClassId(builder, class_id)
+        CountDataV2.CountDataAddCount(builder, count)
+        area_counts.append(CountDataV2.CountDataEnd(builder))
+
+    ObjectDetectionTopV2.ObjectDetectionTopStartAreaCountVector(
+        builder, len(area_counts)
+    )
+    for area_count in reversed(area_counts):
+        builder.PrependUOffsetTRelative(area_count)
+    area_count_list = builder.EndVector()
+
+    ObjectDetectionTopV2.ObjectDetectionTopStart(builder)
+    ObjectDetectionTopV2.ObjectDetectionTopAddPerception(builder, perception)
+    ObjectDetectionTopV2.ObjectDetectionTopAddAreaCount(builder, area_count_list)
+    return ObjectDetectionTopV2.ObjectDetectionTopEnd(builder)
+
+
+def serialize(
+    detections: list[dict[str, Any]], inference_format: InferenceFormat
+) -> str:
+    """
+    Serialize detections into base64-encoded inference data, as uploaded by the devices.
+
+    This is the inverse of `deserialize` followed by `detection_data_to_json`.
+
+    Args:
+        detections (list[dict[str, Any]]): Detections in the format of the
+            "object_detection_list" produced by `detection_data_to_json`.
+        inference_format (InferenceFormat): FlatBuffers schema to serialize to.
+
+    Returns:
+        str: Base64-encoded ObjectDetectionTop or ObjectDetectionTopV2 FlatBuffer.
+    """
+    builder = flatbuffers.Builder(64 + 64 * len(detections))
+    if inference_format == InferenceFormat.ZONE_DETECTION:
+        root = _build_zone_detection(builder, detections)
+    elif inference_format == InferenceFormat.OBJECT_DETECTION_EXPANDED:
+        root = _build_expanded_object_detection(builder, detections)
+    else:
+        raise ValueError(
+            f"Given inference format {inference_format} not in supported values: {[elem.value for elem in InferenceFormat]}"
+        )
+    builder.Finish(root)
+    return b64encode(builder.Output()).decode("utf-8")
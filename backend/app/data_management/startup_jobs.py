@@ -0,0 +1,183 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+from threading import Event
+from threading import Lock
+from threading import Thread
+from time import time
+from typing import Callable
+from typing import Optional
+
+from app.client.client_interface import ClientInferface
+from app.data_management.device_stream import DataPipeline
+from app.schemas.common import StatusResponse
+from app.schemas.processing import StartupJobState
+from app.schemas.processing import StartupJobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class StartupJob:
+    """StartupJob starts the inference of a device and its data collection in a background thread."""
+
+    def __init__(
+        self,
+        device_id: str,
+        api_client: ClientInferface,
+        data_pipeline: DataPipeline,
+        get_image: bool = False,
+        catch_up: bool = False,
+        on_started: Optional[Callable[[], None]] = None,
+    ):
+        self.device_id = device_id
+        self.api_client = api_client
+        self.data_pipeline = data_pipeline
+        self.get_image = get_image
+        self.catch_up = catch_up
+        self.on_started = on_started
+        self.cancel_event: Event = Event()
+        self.state = StartupJobState.waiting
+        self.attempts = 0
+        self.start_time = time()
+        self.end_time: Optional[float] = None
+        self.response: Optional[StatusResponse] = None
+        self.detail: Optional[str] = None
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def _progress(self, attempts: int, elapsed: float):
+        self.attempts = attempts
+        logger.debug(
+            f"Device {self.device_id} not started after {attempts} checks ({elapsed:.1f}s)"
+        )
+
+    def run(self):
+        try:
+            self.api_client.stop_upload_inference_data(device_id=self.device_id)
+            self.response = self.api_client.start_upload_inference_data(
+                device_id=self.device_id,
+                get_image=self.get_image,
+                cancel_event=self.cancel_event,
+                progress=self._progress,
+            )
+            # Cancelled once the device started, its upload is stopped like on a timeout
+            if self.cancel_event.is_set():
+                raise Exception("Cancelled after the device started.")
+            self.data_pipeline.start_data_collection(
+                device_id=self.device_id,
+                get_image=self.get_image,
+                catch_up=self.catch_up,
+            )
+            if self.on_started:
+                self.on_started()
+            self.detail = self.response.status
+            self.state = StartupJobState.started
+            logger.info(f"Data processing started for device: {self.device_id}")
+        except Exception as e:
+            self.detail = str(e)
+            if self.cancel_event.is_set():
+                self.state = StartupJobState.cancelled
+                self._stop_upload()
+            else:
+                self.state = StartupJobState.failed
+            logger.error(
+                f"Error while starting processing for device {self.device_id}: {e}",
+                exc_info=not self.cancel_event.is_set(),
+            )
+        finally:
+            self.end_time = time()
+
+    def _stop_upload(self):
+        try:
+            self.api_client.stop_upload_inference_data(device_id=self.device_id)
+        except Exception as e:
+            logger.warning(f"Could not stop upload for device {self.device_id}: {e}")
+
+    def start(self):
+        self.thread.start()
+
+    def join(self, timeout: Optional[float] = None):
+        self.thread.join(timeout)
+
+    def is_running(self) -> bool:
+        return self.state == StartupJobState.waiting
+
+    def cancel(self):
+        logger.info(f"Cancelling start-up of device: {self.device_id}")
+        self.cancel_event.set()
+
+    def status(self) -> StartupJobStatus:
+        return StartupJobStatus(
+            device_id=self.device_id,
+            state=self.state,
+            attempts=self.attempts,
+            elapsed=(self.end_time or time()) - self.start_time,
+            detail=self.detail,
+        )
+
+
+class StartupJobManager:
+    """StartupJobManager keeps track of the latest start-up job of every device."""
+
+    def __init__(self):
+        self.jobs: dict[str, StartupJob] = {}
+        self.lock = Lock()
+
+    def start(
+        self,
+        device_id: str,
+        api_client: ClientInferface,
+        data_pipeline: DataPipeline,
+        get_image: bool = False,
+        catch_up: bool = False,
+        on_started: Optional[Callable[[], None]] = None,
+    ) -> StartupJob:
+        """Starts a new job for the device, unless one is already waiting for it.
+
+        Raises:
+            RuntimeError: If the job waiting for the device has other parameters
+        """
+        with self.lock:
+            job = self.jobs.get(device_id)
+            if job is not None and job.is_running():
+                if (job.get_image, job.catch_up) != (get_image, catch_up):
+                    raise RuntimeError(
+                        f"Start-up of device {device_id} already in progress with "
+                        f"receive_image={job.get_image} and catch_up={job.catch_up}"
+                    )
+                logger.debug(f"Start-up of device {device_id} already in progress")
+                return job
+
+            job = StartupJob(
+                device_id, api_client, data_pipeline, get_image, catch_up, on_started
+            )
+            self.jobs[device_id] = job
+            job.start()
+            return job
+
+    def get(self, device_id: str) -> Optional[StartupJob]:
+        return self.jobs.get(device_id)
+
+    def cancel_all(self):
+        """Cancels every start-up job still waiting for its device."""
+        for job in list(self.jobs.values()):
+            if job.is_running():
+                job.cancel()
+
+    def cancel(self, device_id: str) -> Optional[StartupJob]:
+        job = self.jobs.get(device_id)
+        if job is not None and job.is_running():
+            job.cancel()
+        return job
@@ -0,0 +1,374 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Time buckets of the telemetries, kept in memory and updated with the new rows only.
+
+The rate and object count routes split the telemetries in buckets of `average_range`
+milliseconds, aligned on the Unix epoch. Instead of querying every bucket on every
+request, a `TelemetrySeries` keeps the aggregates of every bucket of a device and
+bucket length, whatever the time range of the requests, and only reads the
+telemetries stored since its last update. Requests then slice their time range out of
+the buckets. Cursors let clients get only the buckets changed since a previous
+response.
+"""
+import asyncio
+import os
+import uuid
+from collections import deque
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from time import monotonic
+from typing import NamedTuple
+from typing import Optional
+
+from app.database.models import TelemetryTable
+from app.database.watermarks import watermarks
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Rows committed out of id order, e.g. by concurrent writers, show up within this delay
+SETTLE_SECONDS = 10
+# Origin of the buckets, in UTC like the telemetry timestamps
+EPOCH = datetime(1970, 1, 1)
+
+
+def _to_utc(timestamp: datetime) -> datetime:
+    """Naive UTC datetime of a timestamp, naive timestamps being UTC already."""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _align(timestamp: datetime, interval: timedelta) -> datetime:
+    """Start of the bucket of length interval holding a timestamp, in naive UTC."""
+    return EPOCH + ((_to_utc(timestamp) - EPOCH) // interval) * interval
+
+
+class Bucket:
+    """Aggregates of the telemetries of a device in a bucket."""
+
+    __slots__ = ("count", "size", "object_count", "object_count_in_zone", "updated")
+
+    def __init__(self):
+        self.count = 0
+        self.size = 0.0
+        self.object_count = 0
+        self.object_count_in_zone = 0
+        # Sequence number of the last update of the series that changed the bucket
+        self.updated = 0
+
+
+class Cursor(NamedTuple):
+    """Position of a client in a series: its sequence number and its last bucket."""
+
+    sequence: int
+    last_index: int
+
+
+class TelemetrySeries:
+    """Buckets of the telemetries of a device, or of every device, by device.
+
+    Bucket `index` holds the telemetries from `EPOCH + index * interval`, so buckets
+    never move. The series only counts the telemetries from its `floor`, the start of
+    the earliest time range requested, None meaning all of them. Requesting a time
+    range before the floor computes the series again, with a new token invalidating
+    the cursors of its previous buckets. Deleting the expired telemetries only drops
+    the buckets before the cleanup cutoff and counts the bucket of the cutoff again.
+    """
+
+    def __init__(
+        self,
+        device_id: Optional[str],
+        interval: timedelta,
+        start_time: Optional[datetime],
+    ):
+        self.device_id = device_id
+        self.interval = interval
+        self.floor = _align(start_time, interval) if start_time else None
+        self.lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.token = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.deletions = watermarks.deletions
+        # Time zone of the timestamps read from the database
+        self.tzinfo = None
+        self.oldest: Optional[datetime] = None
+        self.newest: Optional[datetime] = None
+        # Buckets by device id and bucket index
+        self.buckets: dict[str, dict[int, Bucket]] = {}
+        # Rows up to settled_id are counted, rows over it are read again and skipped
+        # if they are in recent_ids
+        self.settled_id = 0
+        self.recent_ids: set[int] = set()
+        self._updates: deque[tuple[float, int]] = deque()
+
+    def get_index(self, timestamp: datetime) -> int:
+        """Index of the bucket holding a timestamp."""
+        return (_to_utc(timestamp) - EPOCH) // self.interval
+
+    def extend(self, start_time: Optional[datetime]):
+        """Count the telemetries from start_time on, or all of them if None."""
+        if self.floor is None:
+            return
+        if start_time is None:
+            self.floor = None
+        elif _to_utc(start_time) < self.floor:
+            self.floor = _align(start_time, self.interval)
+        else:
+            return
+        self._reset()
+
+    def _select(self):
+        query = select(
+            TelemetryTable.id,
+            TelemetryTable.device_id,
+            TelemetryTable.timestamp,
+            TelemetryTable.size,
+            TelemetryTable.object_count,
+            TelemetryTable.object_count_in_zone,
+        )
+        if self.device_id is not None:
+            query = query.where(TelemetryTable.device_id == self.device_id)
+        if self.floor is not None:
+            query = query.where(
+                TelemetryTable.timestamp >= self.floor.replace(tzinfo=timezone.utc)
+            )
+        return query
+
+    def _add(self, row, sequence: int):
+        self.tzinfo = row.timestamp.tzinfo
+        buckets = self.buckets.setdefault(row.device_id, {})
+        index = self.get_index(row.timestamp)
+        bucket = buckets.get(index)
+        if bucket is None:
+            bucket = buckets[index] = Bucket()
+        bucket.count += 1
+        bucket.size += row.size
+        bucket.object_count += row.object_count
+        bucket.object_count_in_zone += row.object_count_in_zone
+        bucket.updated = sequence
+        timestamp = _to_utc(row.timestamp)
+        if self.oldest is None or timestamp < self.oldest:
+            self.oldest = timestamp
+        if self.newest is None or self.newest < timestamp:
+            self.newest = timestamp
+
+    async def _drop_deleted(self, db: AsyncSession, before: datetime):
+        """Drop the telemetries deleted for being created before a cutoff.
+
+        Telemetries are created after their timestamp, so the deleted ones are in the
+        buckets up to the bucket of the cutoff. Those buckets are dropped, and the
+        telemetries left in them, such as late ones caught up after an outage, are
+        counted again. Responses skip empty buckets, so the series is computed again
+        if a bucket after the oldest telemetry left was emptied.
+        """
+        sequence = self.sequence + 1
+        end = self.get_index(before) + 1
+        dropped = {
+            device_id: [index for index in buckets if index < end]
+            for device_id, buckets in self.buckets.items()
+        }
+        for device_id, indexes in dropped.items():
+            buckets = self.buckets[device_id]
+            for index in indexes:
+                del buckets[index]
+        self.oldest = None
+        if self.newest is not None and self.get_index(self.newest) < end:
+            self.newest = None
+
+        counted_id = max(self.recent_ids, default=self.settled_id)
+        query = self._select().where(
+            TelemetryTable.id <= counted_id,
+            TelemetryTable.timestamp
+            < (EPOCH + end * self.interval).replace(tzinfo=timezone.utc),
+        )
+        for row in (await db.exec(query)).all():
+            if row.id <= self.settled_id or row.id in self.recent_ids:
+                self._add(row, sequence)
+        self.sequence = sequence
+
+        first = min(
+            (min(buckets) for buckets in self.buckets.values() if buckets),
+            default=None,
+        )
+        if first is None:
+            self.oldest = self.newest = None
+            return
+        if self.oldest is None:
+            # Only the bucket of the oldest telemetry matters to the time ranges
+            self.oldest = EPOCH + first * self.interval
+        if self.newest is None:
+            last = max(max(buckets) for buckets in self.buckets.values() if buckets)
+            self.newest = EPOCH + last * self.interval
+        for device_id, indexes in dropped.items():
+            buckets = self.buckets[device_id]
+            if any(first <= index and index not in buckets for index in indexes):
+                self._reset()
+                return
+
+    async def update(self, db: AsyncSession):
+        """Add the telemetries stored since the last update to the buckets."""
+        if self.deletions != watermarks.deletions:
+            self.deletions = watermarks.deletions
+            await self._drop_deleted(db, watermarks.deleted_before)
+
+        query = self._select().where(TelemetryTable.id > self.settled_id)
+        rows = (await db.exec(query.order_by(TelemetryTable.id))).all()
+
+        sequence = self.sequence + 1
+        changed = False
+        last_id = self.settled_id
+        for row in rows:
+            last_id = row.id
+            if row.id in self.recent_ids:
+                continue
+            self.recent_ids.add(row.id)
+            self._add(row, sequence)
+            changed = True
+        if changed:
+            self.sequence = sequence
+
+        now = monotonic()
+        self._updates.append((now, last_id))
+        while self._updates and self._updates[0][0] < now - SETTLE_SECONDS:
+            self.settled_id = self._updates.popleft()[1]
+        self.recent_ids = {
+            row_id for row_id in self.recent_ids if row_id > self.settled_id
+        }
+
+    def get_indexes(
+        self,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        complete: bool,
+    ) -> range:
+        """Indexes of the buckets of a time range, up to the newest telemetry by default.
+
+        Args:
+            start_time (Optional[datetime]): Start of the range, the oldest telemetry if None
+            end_time (Optional[datetime]): End of the range, the newest telemetry if None
+            complete (bool): Only count the buckets ending before the end time
+
+        Returns:
+            range: Bucket indexes
+        """
+        if self.oldest is None:
+            return range(0)
+        start = self.oldest
+        if start_time is not None:
+            start = max(_to_utc(start_time), self.oldest)
+        first = self.get_index(start)
+        if end_time is None:
+            last = self.get_index(self.newest)
+            stop = last if complete else last + 1
+        else:
+            end = _to_utc(end_time)
+            # Buckets starting before the end, or ending by it if complete
+            stop = (
+                self.get_index(end) if complete else -((EPOCH - end) // self.interval)
+            )
+        return range(first, max(first, stop))
+
+    def get_timestamp(self, index: int) -> datetime:
+        timestamp = EPOCH + index * self.interval
+        if self.tzinfo is not None:
+            return timestamp.replace(tzinfo=timezone.utc)
+        return timestamp
+
+    def get_cursor(self, indexes: range) -> str:
+        return f"{self.token}.{self.sequence}.{indexes.stop - 1}"
+
+    def parse_cursor(self, since: Optional[str]) -> Optional[Cursor]:
+        """Position of a cursor of this series, None if it is from a previous one.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        if since is None:
+            return None
+        try:
+            token, sequence, last_index = since.split(".")
+            cursor = Cursor(int(sequence), int(last_index))
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {since}")
+        return cursor if token == self.token else None
+
+    def is_changed(self, index: int, bucket: Optional[Bucket], cursor: Cursor) -> bool:
+        """Whether a bucket changed since the response of the cursor.
+
+        The last bucket of that response, which may have been incomplete, and the
+        following ones are always considered changed.
+        """
+        return index >= cursor.last_index or (
+            bucket is not None and bucket.updated > cursor.sequence
+        )
+
+
+class SeriesCache:
+    """Least recently used series, by device and bucket length."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("SERIES_CACHE_SIZE", 64))
+        self._series: OrderedDict[tuple, TelemetrySeries] = OrderedDict()
+
+    async def get_series(
+        self,
+        db: AsyncSession,
+        device_id: Optional[str],
+        average_range: int,
+        start_time: Optional[datetime],
+        since: Optional[str] = None,
+    ) -> tuple[TelemetrySeries, Optional[Cursor]]:
+        """Get the series of a query, updated with the telemetries stored since.
+
+        Requests of the same device and bucket length share their series whatever
+        their time range, such as the sliding ranges of dashboards.
+
+        Args:
+            db (AsyncSession): Database session
+            device_id (Optional[str]): Device of the telemetries, all devices if None
+            average_range (int): Bucket length, in milliseconds
+            start_time (Optional[datetime]): Start of the requested range, all the
+                telemetries if None
+            since (Optional[str]): Cursor of a previous response of the series
+
+        Returns:
+            tuple[TelemetrySeries, Optional[Cursor]]: The series, and the position of
+                the cursor in it, None if the whole series should be returned
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        key = (device_id, average_range)
+        series = self._series.get(key)
+        if series is None:
+            series = TelemetrySeries(
+                device_id, timedelta(milliseconds=average_range), start_time
+            )
+            self._series[key] = series
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_entries:
+            self._series.popitem(last=False)
+        async with series.lock:
+            series.extend(start_time)
+            await series.update(db)
+        return series, series.parse_cursor(since)
+
+
+series_cache = SeriesCache()
@@ -0,0 +1,219 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import os
+import uuid
+from collections.abc import Iterator
+from datetime import datetime
+from datetime import timezone
+from typing import Optional
+
+from app.database.models import TelemetryTable
+from sqlalchemy import delete
+from sqlmodel import select
+from sqlmodel import Session
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = [
+    "device_id",
+    "timestamp",
+    "id",
+    "size",
+    "telemetry_str",
+    "object_count",
+    "object_count_in_zone",
+    "image_digest",
+    "created_at",
+]
+# Hive partitioning keys of the archive, e.g. device_id=abc/hour=2025-01-01T13
+PARTITION_COLUMNS = ["device_id", "hour"]
+HOUR_FORMAT = "%Y-%m-%dT%H"
+
+
+def get_archive_dir() -> Optional[str]:
+    """Directory of the telemetry archive, None if archival is disabled."""
+    return os.getenv("ARCHIVE_DIR") or None
+
+
+def get_arrow_schema(columns: list[str]):
+    """Arrow schema of the given telemetry columns.
+
+    Requires the optional `pyarrow` dependency (`pip install .[export]`).
+    """
+    import pyarrow as pa
+
+    types = {
+        "id": pa.int64(),
+        "device_id": pa.string(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "size": pa.float64(),
+        "telemetry_str": pa.string(),
+        "object_count": pa.int64(),
+        "object_count_in_zone": pa.int64(),
+        "image_digest": pa.string(),
+        "created_at": pa.timestamp("us", tz="UTC"),
+        "hour": pa.string(),
+    }
+    return pa.schema([(column, types[column]) for column in columns])
+
+
+def _to_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes, which are stored in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def archive_and_delete_expired(
+    session: Session, cutoff_time: datetime, archive_dir: str
+) -> int:
+    """Move telemetries created before cutoff_time to the Parquet archive.
+
+    Expired telemetries are processed in batches of ARCHIVE_BATCH_SIZE rows. Each
+    batch is deleted from the database and written as zstd compressed Parquet files,
+    partitioned by device and hour of the telemetry timestamp. The deletion is only
+    committed once the files are written, so a failed archival keeps the telemetries
+    in the database until the next cleanup.
+
+    Args:
+        session (Session): Database session
+        cutoff_time (datetime): Telemetries created before this time are archived
+        archive_dir (str): Root directory of the archive
+
+    Returns:
+        int: Number of archived telemetries
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    batch_size = int(os.getenv("ARCHIVE_BATCH_SIZE", 50000))
+    schema = get_arrow_schema(ARCHIVE_COLUMNS + ["hour"])
+    file_format = ds.ParquetFileFormat()
+    write_options = file_format.make_write_options(compression="zstd")
+    columns = [getattr(TelemetryTable, column) for column in ARCHIVE_COLUMNS]
+
+    archived = 0
+    while True:
+        # Rows are deleted and returned at once, so that concurrent cleanups never
+        # archive the same rows twice
+        expired_ids = (
+            select(TelemetryTable.id)
+            .where(TelemetryTable.created_at < cutoff_time)
+            .order_by(TelemetryTable.id)
+            .limit(batch_size)
+        )
+        rows = session.exec(
+            delete(TelemetryTable)
+            .where(TelemetryTable.id.in_(expired_ids))
+            .returning(*columns)
+        ).all()
+        if not rows:
+            session.rollback()
+            return archived
+
+        records = []
+        for row in rows:
+            record = dict(row._mapping)
+            record["timestamp"] = _to_utc(record["timestamp"])
+            record["created_at"] = _to_utc(record["created_at"])
+            record["hour"] = record["timestamp"].strftime(HOUR_FORMAT)
+            records.append(record)
+
+        try:
+            ds.write_dataset(
+                pa.Table.from_pylist(records, schema=schema),
+                archive_dir,
+                format=file_format,
+                file_options=write_options,
+                partitioning=PARTITION_COLUMNS,
+                partitioning_flavor="hive",
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+        except Exception:
+            session.rollback()
+            raise
+        session.commit()
+        archived += len(rows)
+        logger.info(f"Archived {len(rows)} telemetries to {archive_dir}")
+
+
+def scan_archive(
+    archive_dir: str,
+    columns: list[str],
+    device_ids: Optional[list[str]] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    batch_size: int = 5000,
+) -> Iterator[list[dict]]:
+    """Read archived telemetries in batches.
+
+    Device and time filters prune whole partitions and are pushed down to the Parquet
+    row group statistics. Files are memory-mapped rather than read into buffers.
+
+    Args:
+        archive_dir (str): Root directory of the archive
+        columns (list[str]): Columns to read
+        device_ids (Optional[list[str]]): Only read telemetries of these devices
+        start_time (Optional[datetime]): Only read telemetries from this time
+        end_time (Optional[datetime]): Only read telemetries until this time
+        limit (Optional[int]): Maximum number of telemetries to read
+        batch_size (int): Maximum number of rows per batch
+
+    Yields:
+        list[dict]: Rows of the batch, as column to value dictionaries
+    """
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    if not os.path.isdir(archive_dir):
+        return
+
+    dataset = ds.dataset(
+        archive_dir,
+        schema=get_arrow_schema(ARCHIVE_COLUMNS + ["hour"]),
+        format="parquet",
+        partitioning="hive",
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    conditions = []
+    if device_ids:
+        conditions.append(ds.field("device_id").isin(device_ids))
+    if start_time:
+        start_time = _to_utc(start_time)
+        conditions.append(ds.field("hour") >= start_time.strftime(HOUR_FORMAT))
+        conditions.append(ds.field("timestamp") >= start_time)
+    if end_time:
+        end_time = _to_utc(end_time)
+        conditions.append(ds.field("hour") <= end_time.strftime(HOUR_FORMAT))
+        conditions.append(ds.field("timestamp") <= end_time)
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+
+    remaining = limit
+    for batch in dataset.to_batches(
+        columns=columns, filter=condition, batch_size=batch_size
+    ):
+        if remaining is not None:
+            batch = batch.slice(0, remaining)
+            remaining -= batch.num_rows
+        if batch.num_rows:
+            yield batch.to_pylist()
+        if remaining == 0:
+            return
@@ -21,43 +21,139 @@ from datetime import timedelta
 from datetime import timezone
 
 from app.database import models
+from app.database.archive import archive_and_delete_expired
+from app.database.archive import get_archive_dir
+from app.database.watermarks import watermarks
+from sqlalchemy import inspect
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine import make_url
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import create_engine
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 logger = logging.getLogger(__name__)
-engine = create_engine(os.environ.get("SQLALCHEMY_DATABASE_URI"))
+
+# Advisory lock held while creating or upgrading the schema
+SCHEMA_LOCK_KEY = 0x5A4453
+
+
+def _get_engine_options() -> dict:
+    """Connection pool and statement cache settings shared by both engines."""
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "True") == "True",
+        "query_cache_size": int(os.getenv("DB_QUERY_CACHE_SIZE", 500)),
+    }
+
+
+def _get_async_database_url() -> URL:
+    """Async database URL, derived from SQLALCHEMY_DATABASE_URI unless given explicitly."""
+    async_uri = os.environ.get("SQLALCHEMY_ASYNC_DATABASE_URI")
+    if async_uri:
+        url = make_url(async_uri)
+    else:
+        url = make_url(os.environ.get("SQLALCHEMY_DATABASE_URI"))
+        if url.get_backend_name() == "postgresql":
+            url = url.set(drivername="postgresql+asyncpg")
+
+    if url.get_driver_name() == "asyncpg":
+        # Prepared statements cached per connection by asyncpg
+        url = url.update_query_dict(
+            {
+                "prepared_statement_cache_size": os.getenv(
+                    "DB_PREPARED_STATEMENT_CACHE_SIZE", "100"
+                )
+            }
+        )
+    return url
+
+
+engine = create_engine(
+    os.environ.get("SQLALCHEMY_DATABASE_URI"), **_get_engine_options()
+)
+async_engine = create_async_engine(_get_async_database_url(), **_get_engine_options())
 
 
 def cleanup_old_entries():
-    """Removes telemetry entries older than 1 hour."""
+    """Removes telemetry entries older than 1 hour, archiving them first if enabled."""
     with Session(engine) as session:
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=1)
-        logger.info("Cleaning old entries")
-        session.exec(
-            text("DELETE FROM TelemetryTable WHERE created_at < :cutoff_time"),
-            params={"cutoff_time": cutoff_time},
-        )
-        session.commit()
+        archive_dir = get_archive_dir()
+        if archive_dir:
+            logger.info("Archiving old entries")
+            deleted = archive_and_delete_expired(session, cutoff_time, archive_dir)
+        else:
+            logger.info("Cleaning old entries")
+            deleted = session.exec(
+                text("DELETE FROM TelemetryTable WHERE created_at < :cutoff_time"),
+                params={"cutoff_time": cutoff_time},
+            ).rowcount
+            session.commit()
+    # Cleanups of other workers may have deleted the expired entries already
+    if deleted or os.getenv("WORKER_COORDINATION") == "postgres":
+        watermarks.mark_deleted(cutoff_time)
 
 
 async def periodic_cleanup():
     """Runs the cleanup task every minute in the background."""
     while True:
         try:
-            cleanup_old_entries()
+            await asyncio.to_thread(cleanup_old_entries)
         except Exception as e:
-            logger.error(f"Error during cleanup: {e}", flush=True)
+            logger.error(f"Error during cleanup: {e}")
         await asyncio.sleep(60)
 
 
+def _add_missing_columns(connection: Connection):
+    """Add the nullable columns introduced since the tables were created."""
+    inspector = inspect(connection)
+    for table in models.SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            logger.info(f"Adding column {column.name} to table {table.name}")
+            connection.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            )
+
+
 def init_db():
     """Initialize the database schema."""
-    models.SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Serializes the schema changes of backend workers starting together
+            connection.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY}
+            )
+        models.SQLModel.metadata.create_all(connection)
+        _add_missing_columns(connection)
+        # create_all skips existing tables, so add indexes introduced since their creation
+        for index in models.TelemetryTable.__table__.indexes:
+            index.create(connection, checkfirst=True)
 
 
 def get_db():
     """Provides a new session for each request and ensures it's closed afterwards."""
     with Session(engine) as session:
         yield session
+
+
+async def get_async_db():
+    """Provides a new async session for each request and ensures it's closed afterwards."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def dispose_engines():
+    """Closes every pooled database connection."""
+    engine.dispose()
+    await async_engine.dispose()
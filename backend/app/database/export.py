@@ -0,0 +1,186 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Optional
+
+from app.database.archive import get_arrow_schema
+from app.database.db import async_engine
+from app.database.models import TelemetryTable
+from sqlalchemy import select
+from sqlalchemy import tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Columns identifying a row, always exported so that an export can be resumed
+KEY_COLUMNS = ["device_id", "timestamp", "id"]
+EXPORT_COLUMNS = KEY_COLUMNS + [
+    "size",
+    "telemetry_str",
+    "object_count",
+    "object_count_in_zone",
+    "image_digest",
+    "created_at",
+]
+
+
+def get_export_columns(columns: Optional[list[str]]) -> list[str]:
+    """Validate the requested columns, adding the key columns to them.
+
+    Args:
+        columns (Optional[list[str]]): Requested columns, all of them if None
+
+    Returns:
+        list[str]: Columns to export, in table order
+    """
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    unknown = set(columns) - set(EXPORT_COLUMNS)
+    if unknown:
+        raise ValueError(
+            f"Unknown columns {sorted(unknown)}, allowed columns are {EXPORT_COLUMNS}"
+        )
+    return [
+        column
+        for column in EXPORT_COLUMNS
+        if column in columns or column in KEY_COLUMNS
+    ]
+
+
+async def iter_telemetry_pages(
+    columns: list[str],
+    device_ids: Optional[list[str]] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    after: Optional[tuple[str, datetime, int]] = None,
+    limit: Optional[int] = None,
+    page_size: int = 5000,
+) -> AsyncIterator[list[dict]]:
+    """Yield telemetries in pages, ordered by (device_id, timestamp, id).
+
+    Pages are fetched with keyset pagination, each in its own short transaction,
+    and streamed from a server-side cursor, so memory use does not depend on the
+    size of the export.
+
+    Args:
+        columns (list[str]): Columns to retrieve, including the key columns
+        device_ids (Optional[list[str]]): Only export these devices
+        start_time (Optional[datetime]): Only export telemetries from this time
+        end_time (Optional[datetime]): Only export telemetries until this time
+        after (Optional[tuple[str, datetime, int]]): Key (device_id, timestamp, id)
+            of the last row already exported
+        limit (Optional[int]): Maximum number of rows to export
+        page_size (int): Number of rows fetched per query
+
+    Yields:
+        list[dict]: Rows of the page, as column to value dictionaries
+    """
+    key = tuple_(TelemetryTable.device_id, TelemetryTable.timestamp, TelemetryTable.id)
+    base_query = select(*(getattr(TelemetryTable, column) for column in columns))
+    if device_ids:
+        base_query = base_query.where(TelemetryTable.device_id.in_(device_ids))
+    if start_time:
+        base_query = base_query.where(TelemetryTable.timestamp >= start_time)
+    if end_time:
+        base_query = base_query.where(TelemetryTable.timestamp <= end_time)
+    base_query = base_query.order_by(
+        TelemetryTable.device_id, TelemetryTable.timestamp, TelemetryTable.id
+    )
+
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        query = base_query.limit(size)
+        if after is not None:
+            query = query.where(key > tuple_(*after))
+
+        page = []
+        async with AsyncSession(async_engine) as session:
+            result = await session.stream(
+                query.execution_options(yield_per=min(size, 1000))
+            )
+            async for row in result.mappings():
+                page.append(dict(row))
+        if not page:
+            return
+
+        yield page
+        last = page[-1]
+        after = (last["device_id"], last["timestamp"], last["id"])
+        if remaining is not None:
+            remaining -= len(page)
+        if len(page) < size:
+            return
+
+
+def _to_json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def encode_ndjson(
+    pages: AsyncIterator[list[dict]], columns: list[str]
+) -> AsyncIterator[bytes]:
+    async for page in pages:
+        yield "".join(
+            json.dumps({key: _to_json_value(value) for key, value in row.items()})
+            + "\n"
+            for row in page
+        ).encode("utf-8")
+
+
+async def encode_csv(
+    pages: AsyncIterator[list[dict]], columns: list[str]
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    yield buffer.getvalue().encode("utf-8")
+    async for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            {key: _to_json_value(value) for key, value in row.items()} for row in page
+        )
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def encode_arrow(
+    pages: AsyncIterator[list[dict]], columns: list[str]
+) -> AsyncIterator[bytes]:
+    """Encode pages as an Arrow IPC stream, one record batch per page.
+
+    Requires the optional `pyarrow` dependency (`pip install .[export]`).
+    """
+    import pyarrow as pa
+
+    schema = get_arrow_schema(columns)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        async for page in pages:
+            writer.write_batch(pa.RecordBatch.from_pylist(page, schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", encode_ndjson),
+    "csv": ("text/csv", encode_csv),
+    "arrow": ("application/vnd.apache.arrow.stream", encode_arrow),
+}
@@ -0,0 +1,180 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import base64
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+from collections import OrderedDict
+from collections.abc import Iterator
+from threading import Lock
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _is_digest(digest: str) -> bool:
+    return len(digest) == 64 and all(char in "0123456789abcdef" for char in digest)
+
+
+def get_media_type(header: bytes) -> str:
+    """Media type of an image, from its first bytes."""
+    if header.startswith(b"\x89PNG"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class ImageStore:
+    """Content-addressed store of frame images on the local disk.
+
+    Images are stored once per SHA-256 digest of their content, so identical frames
+    of static scenes share a single file. When the store grows over `max_bytes`, the
+    least recently stored or read images are evicted.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        # Digest to size, least recently used first
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self.total_bytes = 0
+        self._load_entries()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _load_entries(self):
+        """Index the images already on disk, ordered by last use."""
+        os.makedirs(self.root, exist_ok=True)
+        entries = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if _is_digest(name):
+                    stat = os.stat(os.path.join(directory, name))
+                    entries.append((stat.st_mtime, name, stat.st_size))
+        for _, digest, size in sorted(entries):
+            self._entries[digest] = size
+            self.total_bytes += size
+        logger.info(
+            f"Image store {self.root} holds {len(self._entries)} images ({self.total_bytes} bytes)"
+        )
+
+    def _touch(self, digest: str):
+        self._entries.move_to_end(digest)
+        try:
+            # The modification time keeps the usage order across restarts
+            os.utime(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def put(self, b64_image: str) -> str:
+        """Store a base64 encoded image, unless an identical one is already stored.
+
+        Args:
+            b64_image (str): Base64 encoded image
+
+        Returns:
+            str: Hex SHA-256 digest of the image, which identifies it in the store
+        """
+        data = base64.b64decode(b64_image)
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest in self._entries:
+                self._touch(digest)
+                return digest
+
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so readers never see a partial image
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+
+        with self._lock:
+            if digest not in self._entries:
+                self._entries[digest] = len(data)
+                self.total_bytes += len(data)
+            self._evict()
+        return digest
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            digest, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+            logger.debug(f"Evicted image {digest} from the image store")
+
+    def open(self, digest: str) -> Optional[tuple[str, Iterator[bytes]]]:
+        """Open a stored image for reading through a memory map.
+
+        Args:
+            digest (str): Digest returned by `put`
+
+        Returns:
+            Optional[tuple[str, Iterator[bytes]]]: Media type and content of the image
+                in chunks, or None if it is not stored
+        """
+        if not _is_digest(digest):
+            return None
+        with self._lock:
+            if digest not in self._entries:
+                return None
+            self._touch(digest)
+        try:
+            with open(self._path(digest), "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # Evicted meanwhile, or empty
+            return None
+        return get_media_type(mapped[:12]), self._iter_chunks(mapped)
+
+    @staticmethod
+    def _iter_chunks(mapped: mmap.mmap) -> Iterator[bytes]:
+        try:
+            for offset in range(0, len(mapped), CHUNK_SIZE):
+                yield mapped[offset : offset + CHUNK_SIZE]
+        finally:
+            mapped.close()
+
+
+__image_store__: None | ImageStore = None
+__image_store_lock__ = Lock()
+
+
+def get_image_store() -> Optional[ImageStore]:
+    """Image store configured by IMAGE_STORE_DIR, None if images are not persisted."""
+    global __image_store__
+    root = os.getenv("IMAGE_STORE_DIR")
+    if not root:
+        return None
+    with __image_store_lock__:
+        if __image_store__ is None:
+            __image_store__ = ImageStore(
+                root, int(os.getenv("IMAGE_STORE_MAX_BYTES", 1024**3))
+            )
+    return __image_store__
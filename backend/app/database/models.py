@@ -15,12 +15,21 @@
 # SPDX-License-Identifier: Apache-2.0
 from datetime import datetime
 from datetime import timezone
+from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field
 from sqlmodel import SQLModel
 
 
 class TelemetryTable(SQLModel, table=True):
+    # Keyset pagination of exports, ordered by (device_id, timestamp, id)
+    __table_args__ = (
+        Index(
+            "ix_telemetrytable_device_id_timestamp_id", "device_id", "timestamp", "id"
+        ),
+    )
+
     id: int = Field(default=None, primary_key=True)
     device_id: str = Field(
         description="Device ID of the device that sent the telemetry"
@@ -37,7 +46,37 @@ class TelemetryTable(SQLModel, table=True):
     object_count_in_zone: int = Field(
         description="Number of detected objects in telemetry with zone_flag=True"
     )
+    image_digest: Optional[str] = Field(
+        default=None,
+        description="SHA-256 digest of the image in the image store, if images are stored",
+    )
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
         description="Time when the telemetry was created",
     )
+
+
+class WorkerTable(SQLModel, table=True):
+    """Backend worker processes sharing the device pipelines, see WORKER_COORDINATION."""
+
+    worker_id: str = Field(primary_key=True, description="ID of the worker process")
+    heartbeat_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Last time the worker reported itself alive",
+    )
+    has_subscribers: bool = Field(
+        default=False,
+        description="Whether the worker has WebSocket clients to relay frames to",
+    )
+
+
+class ActiveDeviceTable(SQLModel, table=True):
+    """Devices whose data collection is requested, run by one of the workers."""
+
+    device_id: str = Field(primary_key=True, description="Device ID")
+    get_image: bool = Field(description="Whether images are collected")
+    catch_up: bool = Field(description="Whether every missed inference is collected")
+    requested_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="Time when the data collection was requested",
+    )
@@ -0,0 +1,255 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Notifications of new telemetry rows, published with PostgreSQL NOTIFY.
+
+Every commit of telemetries publishes one compact event per device on the
+TELEMETRY_CHANNEL channel, which any process connected to the database can receive
+with `listen_telemetry` (blocking) or `subscribe_telemetry` (asyncio) instead of
+polling the table.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
+from datetime import datetime
+from typing import NamedTuple
+from typing import Optional
+
+from app.database.db import async_engine
+from app.database.db import engine
+from app.database.models import TelemetryTable
+from app.database.watermarks import watermarks
+from sqlalchemy import text
+from sqlmodel import Session
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_CHANNEL = "zone_detection_telemetry"
+
+
+class TelemetryEvent(NamedTuple):
+    """New telemetry rows of a device, committed together.
+
+    The rows are those of the device with an id between first_id and last_id.
+    """
+
+    device_id: str
+    first_id: int
+    last_id: int
+    count: int
+    last_timestamp: datetime
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "TelemetryEvent":
+        data = json.loads(payload)
+        return cls(
+            device_id=data["d"],
+            first_id=data["f"],
+            last_id=data["l"],
+            count=data["n"],
+            last_timestamp=datetime.fromisoformat(data["t"]),
+        )
+
+    def to_payload(self) -> str:
+        return json.dumps(
+            {
+                "d": self.device_id,
+                "f": self.first_id,
+                "l": self.last_id,
+                "n": self.count,
+                "t": self.last_timestamp.isoformat(),
+            },
+            separators=(",", ":"),
+        )
+
+
+def is_enabled() -> bool:
+    return (
+        engine.dialect.name == "postgresql"
+        and os.getenv("TELEMETRY_NOTIFICATIONS", "True") == "True"
+    )
+
+
+def publish_telemetry_event(
+    session: Session, device_id: str, entries: list[TelemetryTable]
+):
+    """Announce flushed telemetries, delivered to listeners when the session commits.
+
+    Args:
+        session (Session): Session in which the telemetries were flushed
+        device_id (str): Device of the telemetries
+        entries (list[TelemetryTable]): Flushed telemetries, with their ids
+    """
+    if not entries or not is_enabled():
+        return
+    event = TelemetryEvent(
+        device_id=device_id,
+        first_id=min(entry.id for entry in entries),
+        last_id=max(entry.id for entry in entries),
+        count=len(entries),
+        last_timestamp=max(entry.timestamp for entry in entries),
+    )
+    session.exec(
+        text("SELECT pg_notify(:channel, :payload)"),
+        params={"channel": TELEMETRY_CHANNEL, "payload": event.to_payload()},
+    )
+
+
+def listen_telemetry(
+    device_ids: Optional[set[str]] = None, timeout: Optional[float] = None
+) -> Iterator[TelemetryEvent]:
+    """Wait for telemetry events, blocking.
+
+    Args:
+        device_ids (Optional[set[str]]): Only yield events of these devices
+        timeout (Optional[float]): Stop after this many seconds without events
+
+    Yields:
+        TelemetryEvent: Events, in commit order
+    """
+    # Pooled connections get their isolation level back when returned to the pool
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"LISTEN {TELEMETRY_CHANNEL}"))
+        try:
+            driver_connection = connection.connection.driver_connection
+            while True:
+                readable, _, _ = select.select([driver_connection], [], [], timeout)
+                if not readable:
+                    return
+                driver_connection.poll()
+                while driver_connection.notifies:
+                    notification = driver_connection.notifies.pop(0)
+                    event = TelemetryEvent.from_payload(notification.payload)
+                    if device_ids is None or event.device_id in device_ids:
+                        yield event
+        finally:
+            if not connection.closed and not connection.invalidated:
+                connection.execute(text(f"UNLISTEN {TELEMETRY_CHANNEL}"))
+                connection.connection.driver_connection.notifies.clear()
+
+
+class TelemetryListener:
+    """Receives the telemetry events of the process on a single connection.
+
+    The connection is opened with the first subscriber and closed after the last one
+    leaves, and every event is put in the queues of the subscribers following its
+    device. The connection is opened again if it is lost.
+    """
+
+    def __init__(self, queue_size: int = 1000, retry_delay: float = 1.0):
+        self.queue_size = queue_size
+        self.retry_delay = retry_delay
+        self._subscribers: dict[asyncio.Queue, Optional[set[str]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Cancelled listening tasks, referenced until they closed their connection
+        self._stopping: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(
+        self, device_ids: Optional[set[str]] = None
+    ) -> AsyncIterator[TelemetryEvent]:
+        events: asyncio.Queue[TelemetryEvent] = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[events] = device_ids
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+        try:
+            while True:
+                yield await events.get()
+        finally:
+            del self._subscribers[events]
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._stopping.add(self._task)
+                self._task.add_done_callback(self._stopping.discard)
+                self._task = None
+
+    def _on_notification(self, connection, pid, channel, payload):
+        event = TelemetryEvent.from_payload(payload)
+        for events, device_ids in self._subscribers.items():
+            if device_ids is None or event.device_id in device_ids:
+                try:
+                    events.put_nowait(event)
+                except asyncio.QueueFull:
+                    logger.warning("Telemetry subscriber too slow, dropping events")
+
+    async def _listen(self):
+        while True:
+            try:
+                async with async_engine.connect() as connection:
+                    raw_connection = await connection.get_raw_connection()
+                    driver_connection = raw_connection.driver_connection
+                    await driver_connection.add_listener(
+                        TELEMETRY_CHANNEL, self._on_notification
+                    )
+                    try:
+                        while not driver_connection.is_closed():
+                            await asyncio.sleep(self.retry_delay)
+                    finally:
+                        if not driver_connection.is_closed():
+                            await driver_connection.remove_listener(
+                                TELEMETRY_CHANNEL, self._on_notification
+                            )
+                logger.warning("Telemetry events connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error listening to telemetry events: {e}")
+                await asyncio.sleep(self.retry_delay)
+
+
+telemetry_listener = TelemetryListener()
+
+
+async def subscribe_telemetry(
+    device_ids: Optional[set[str]] = None,
+) -> AsyncIterator[TelemetryEvent]:
+    """Wait for telemetry events, on the running event loop.
+
+    Every subscriber of the process shares the connection of `telemetry_listener`.
+
+    Args:
+        device_ids (Optional[set[str]]): Only yield events of these devices
+
+    Yields:
+        TelemetryEvent: Events, in commit order
+    """
+    events = telemetry_listener.subscribe(device_ids)
+    try:
+        async for event in events:
+            yield event
+    finally:
+        await events.aclose()
+
+
+async def follow_watermarks():
+    """Advance the telemetry watermarks with the telemetries of every worker.
+
+    Enables the validation of cached responses when several workers share the
+    database, until cancelled.
+    """
+    events = subscribe_telemetry()
+    try:
+        watermarks.enabled = True
+        async for event in events:
+            watermarks.advance(event.device_id, event.last_id)
+    finally:
+        watermarks.enabled = False
+        await events.aclose()
@@ -0,0 +1,108 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""High-water marks of the telemetry table, used to validate cached responses.
+
+Responses computed from the telemetries only change when telemetries are added or
+deleted. The marks record the last telemetry id committed for every device and the
+number of cleanups that deleted telemetries, so that a response can be reused for as
+long as the marks it depends on haven't moved.
+"""
+import logging
+import os
+import uuid
+from datetime import datetime
+from datetime import timezone
+from threading import Lock
+from typing import NamedTuple
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Validator(NamedTuple):
+    """Version of the telemetries a response depends on, and when they last changed."""
+
+    version: str
+    last_modified: datetime
+
+
+class TelemetryWatermarks:
+    """Per-device high-water marks of the telemetries committed to the database.
+
+    Marks are kept in memory, advanced by the telemetry writer of this process and, when
+    several workers share the database, by the telemetry events of the other workers.
+    Versions start with an id of the process, as telemetries written before it started
+    are unknown to it.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self.process_id = uuid.uuid4().hex[:8]
+        # Responses can't be validated while writes of other workers are not followed
+        self.enabled = os.getenv("WORKER_COORDINATION") != "postgres"
+        self.last_id = 0
+        self.modified_at = self.started_at
+        self.deletions = 0
+        self.deleted_at = self.started_at
+        # Telemetries created before it were deleted by the last deletion
+        self.deleted_before: Optional[datetime] = None
+        # Last telemetry id and commit time, by device id
+        self._devices: dict[str, tuple[int, datetime]] = {}
+        self._lock = Lock()
+
+    def advance(self, device_id: str, last_id: int):
+        """Record committed telemetries of a device, up to the id `last_id`."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            current = self._devices.get(device_id)
+            if current is None or current[0] < last_id:
+                self._devices[device_id] = (last_id, now)
+            if self.last_id < last_id:
+                self.last_id = last_id
+                self.modified_at = now
+
+    def mark_deleted(self, before: datetime):
+        """Record that the telemetries created before a time were deleted.
+
+        Deletions change the version of every response.
+        """
+        with self._lock:
+            self.deletions += 1
+            self.deleted_at = datetime.now(timezone.utc)
+            self.deleted_before = before
+
+    def get_validator(self, device_id: Optional[str] = None) -> Optional[Validator]:
+        """Version of the telemetries of a device, or of all of them if `device_id` is None.
+
+        Returns:
+            Optional[Validator]: The version, None if it can't be known
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if device_id is None:
+                last_id, modified_at = self.last_id, self.modified_at
+            else:
+                last_id, modified_at = self._devices.get(
+                    device_id, (0, self.started_at)
+                )
+            return Validator(
+                version=f"{self.process_id}.{self.deletions}.{last_id}",
+                last_modified=max(modified_at, self.deleted_at),
+            )
+
+
+watermarks = TelemetryWatermarks()
@@ -18,6 +18,9 @@ import logging
 import os
 from contextlib import asynccontextmanager
 
+from anyio import to_thread
+from app.database import telemetry_events
+from app.database.db import dispose_engines
 from app.database.db import init_db
 from app.database.db import periodic_cleanup
 from app.debugger import initialize_server_debugger_if_needed
@@ -25,9 +28,16 @@ from app.routers import client
 from app.routers import configuration
 from app.routers import connection
 from app.routers import device
+from app.routers import export
 from app.routers import health
+from app.routers import metrics
 from app.routers import object_detection
 from app.routers import processing
+from app.routers import profiler
+from app.routers.dependencies import get_coordinator
+from app.routers.dependencies import get_data_pipeline
+from app.routers.dependencies import get_device_inventory
+from app.routers.dependencies import get_startup_jobs
 from app.utils.logger import configure_logger
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -39,12 +49,39 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage app startup and shutdown."""
+    # Blocking console and database calls run in this pool, off the event loop
+    to_thread.current_default_thread_limiter().total_tokens = int(
+        os.getenv("THREADPOOL_SIZE", 40)
+    )
     init_db()
 
+    background_tasks = []
+    coordinator = get_coordinator()
+    if coordinator is not None:
+        coordinator.add_activity_listener(
+            processing.mark_data_pipeline_active_callback()
+        )
+        await to_thread.run_sync(coordinator.start)
+        if telemetry_events.is_enabled():
+            # Cached responses follow the telemetries written by every worker
+            background_tasks.append(
+                asyncio.create_task(telemetry_events.follow_watermarks())
+            )
+
     task = asyncio.create_task(periodic_cleanup())
+    background_tasks.append(asyncio.create_task(get_device_inventory().run()))
 
     yield
     logger.debug("Entering shutdown phase")
+    get_startup_jobs().cancel_all()
+    if coordinator is not None:
+        await to_thread.run_sync(coordinator.stop)
+    # Lets every collector save its current poll before the engines are closed
+    await to_thread.run_sync(get_data_pipeline().shutdown)
+    for background_task in background_tasks:
+        background_task.cancel()
+    if background_tasks:
+        await asyncio.wait(background_tasks, timeout=5)
     task.cancel()
     try:
         await task
@@ -52,6 +89,7 @@ async def lifespan(app: FastAPI):
         pass
     except Exception as e:
         logger.warning(f"Exception during cleanup task cancellation: {e}")
+    await dispose_engines()
     logger.info("Server has stopped")
 
 
@@ -65,6 +103,9 @@ app.include_router(health.router)
 app.include_router(connection.router)
 app.include_router(client.router)
 app.include_router(object_detection.router)
+app.include_router(metrics.router)
+app.include_router(profiler.router)
+app.include_router(export.router)
 
 
 origins = [
@@ -34,7 +34,7 @@ router = APIRouter(prefix="/client", tags=["Client"])
 
 
 @router.put("/", response_model=StatusResponse)
-async def set_client_type(
+def set_client_type(
     client_type_request: ClientTypeRequest, data_pipeline: InjectDataPipeline
 ) -> StatusResponse:
     """
@@ -54,7 +54,7 @@ async def set_client_type(
             status_code=404, detail=f"Unknown client type: {client_type}"
         )
     if os.environ.get("CLIENT_TYPE", None) != client_type:
-        data_pipeline.reset_client()
+        data_pipeline.reset_client(client_type)
     os.environ["CLIENT_TYPE"] = client_type
     return StatusResponse(status="success")
 
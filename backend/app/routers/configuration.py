@@ -17,6 +17,7 @@ import logging
 
 from app.client.client_factory import get_api_client
 from app.client.client_interface import ClientInferface
+from app.routers.dependencies import console_concurrency_limit
 from app.schemas.common import StatusResponse
 from app.schemas.configuration import DeviceConfiguration
 from fastapi import APIRouter
@@ -24,11 +25,15 @@ from fastapi import Depends
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/configurations", tags=["Configurations"])
+router = APIRouter(
+    prefix="/configurations",
+    tags=["Configurations"],
+    dependencies=[Depends(console_concurrency_limit)],
+)
 
 
 @router.get("/{device_id}", response_model=DeviceConfiguration)
-async def get_configuration_file(
+def get_configuration_file(
     device_id: str, api_client: ClientInferface = Depends(get_api_client)
 ) -> DeviceConfiguration:
     """
@@ -52,7 +57,7 @@ async def get_configuration_file(
 
 
 @router.put("/{device_id}", response_model=StatusResponse)
-async def put_configuration(
+def put_configuration(
     device_id: str,
     configuration: DeviceConfiguration,
     api_client: ClientInferface = Depends(get_api_client),
@@ -69,7 +74,7 @@ async def put_configuration(
     """
     logger.info(f"Replacing configuration in device_id: {device_id}")
     try:
-        return await api_client.set_configuration(
+        return api_client.set_configuration(
             device_id=device_id, configuration=configuration
         )
     except Exception as e:
@@ -81,7 +86,7 @@ async def put_configuration(
 
 
 @router.patch("/{device_id}", response_model=StatusResponse)
-async def update_configuration(
+def update_configuration(
     device_id: str,
     configuration: DeviceConfiguration,
     api_client: ClientInferface = Depends(get_api_client),
@@ -98,7 +103,7 @@ async def update_configuration(
     """
     logger.info(f"Updating configuration for device_id: {device_id}")
     try:
-        return await api_client.update_configuration(
+        return api_client.update_configuration(
             device_id=device_id, configuration=configuration
         )
     except Exception as e:
@@ -19,6 +19,7 @@ from app.client.client_factory import get_api_client
 from app.client.client_interface import ClientInferface
 from app.config.get_console_settings import load_settings_from_yaml
 from app.config.get_console_settings import save_settings_to_yaml
+from app.routers.dependencies import console_concurrency_limit
 from app.schemas.common import StatusResponse
 from app.schemas.connection import ConsoleSettings
 from fastapi import APIRouter
@@ -29,8 +30,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/connection", tags=["Connection"])
 
 
-@router.put("/", response_model=StatusResponse)
-async def set_console_settings(
+@router.put(
+    "/",
+    response_model=StatusResponse,
+    dependencies=[Depends(console_concurrency_limit)],
+)
+def set_console_settings(
     settings: ConsoleSettings, api_client: ClientInferface = Depends(get_api_client)
 ) -> StatusResponse:
     """
@@ -57,7 +62,7 @@ async def set_console_settings(
     "/",
     response_model=ConsoleSettings,
 )
-async def get_console_settings() -> ConsoleSettings:
+def get_console_settings() -> ConsoleSettings:
     """
     Retrieve the console settings from the configuration YAML file.
     \f
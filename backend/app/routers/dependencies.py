@@ -13,13 +13,30 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import asyncio
+import os
+from collections.abc import AsyncIterator
 from typing import Annotated
+from typing import Optional
 
+from app.data_management.coordination import WorkerCoordinator
+from app.data_management.device_inventory import DeviceInventory
 from app.data_management.device_stream import DataPipeline
+from app.data_management.startup_jobs import StartupJobManager
+from app.database.image_store import get_image_store
+from app.database.image_store import ImageStore
+from app.utils.profiler import StackSampler
 from fastapi import Depends
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 
 __data_pipeline__: None | DataPipeline = None
+__startup_jobs__: None | StartupJobManager = None
+__profiler__: None | StackSampler = None
+__coordinator__: None | WorkerCoordinator = None
+__device_inventory__: None | DeviceInventory = None
 
 
 def get_data_pipeline() -> DataPipeline:
@@ -29,4 +46,105 @@ def get_data_pipeline() -> DataPipeline:
     return __data_pipeline__
 
 
+def get_startup_jobs() -> StartupJobManager:
+    global __startup_jobs__
+    if __startup_jobs__ is None:
+        __startup_jobs__ = StartupJobManager()
+    return __startup_jobs__
+
+
+def get_coordinator() -> Optional[WorkerCoordinator]:
+    """Worker coordinator, None unless WORKER_COORDINATION is `postgres`."""
+    global __coordinator__
+    if __coordinator__ is None and os.getenv("WORKER_COORDINATION") == "postgres":
+        data_pipeline = get_data_pipeline()
+        __coordinator__ = WorkerCoordinator(data_pipeline)
+        data_pipeline.coordinator = __coordinator__
+    return __coordinator__
+
+
+def get_device_inventory() -> DeviceInventory:
+    global __device_inventory__
+    if __device_inventory__ is None:
+        __device_inventory__ = DeviceInventory()
+    return __device_inventory__
+
+
+def get_profiler() -> StackSampler:
+    global __profiler__
+    if __profiler__ is None:
+        __profiler__ = StackSampler()
+    return __profiler__
+
+
 InjectDataPipeline = Annotated[DataPipeline, Depends(get_data_pipeline)]
+InjectStartupJobs = Annotated[StartupJobManager, Depends(get_startup_jobs)]
+InjectProfiler = Annotated[StackSampler, Depends(get_profiler)]
+InjectDeviceInventory = Annotated[DeviceInventory, Depends(get_device_inventory)]
+InjectImageStore = Annotated[Optional[ImageStore], Depends(get_image_store)]
+
+
+class ConcurrencyLimit:
+    """Dependency limiting how many requests of the routes using it are served at once.
+
+    Requests over the limit wait up to `timeout` seconds for a free slot and are
+    rejected with a 503 afterwards.
+    """
+
+    def __init__(self, name: str, limit: int, timeout: float = 30.0):
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self):
+        """Wait for a free slot, raising a 503 after `timeout` seconds."""
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+        except TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Too many concurrent {self.name} requests, try again later",
+            )
+
+    async def __call__(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+    def hold_while_streaming(self, response: StreamingResponse) -> StreamingResponse:
+        """Keep a slot acquired with `acquire` until the response body is streamed.
+
+        Dependencies are torn down before the body of a streaming response is sent, so
+        streaming routes acquire their slot in the handler instead. The slot is
+        released when the body ends or is closed, or by the background task of the
+        response if the body was never started.
+        """
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.semaphore.release()
+
+        async def body(iterator: AsyncIterator) -> AsyncIterator:
+            try:
+                async for chunk in iterator:
+                    yield chunk
+            finally:
+                release()
+
+        response.body_iterator = body(response.body_iterator)
+        response.background = BackgroundTask(release)
+        return response
+
+
+console_concurrency_limit = ConcurrencyLimit(
+    "console", int(os.getenv("CONSOLE_CONCURRENCY_LIMIT", 8))
+)
+database_concurrency_limit = ConcurrencyLimit(
+    "database", int(os.getenv("DATABASE_CONCURRENCY_LIMIT", 16))
+)
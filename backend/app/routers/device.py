@@ -15,49 +15,83 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 from typing import Annotated
+from typing import Optional
 
-from app.client.client_factory import get_api_client
-from app.client.client_interface import ClientInferface
+from app.data_management.device_inventory import InventoryEntry
+from app.routers.dependencies import console_concurrency_limit
+from app.routers.dependencies import InjectDeviceInventory
 from app.schemas.device import Device
 from app.schemas.device import Devices
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import HTTPException
 from fastapi import Path
+from fastapi import Response
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/devices", tags=["Devices"])
+router = APIRouter(
+    prefix="/devices",
+    tags=["Devices"],
+    dependencies=[Depends(console_concurrency_limit)],
+)
+
+
+def _conditional_response(
+    entry: InventoryEntry, response: Response, if_none_match: Optional[str]
+) -> Optional[Response]:
+    """Set the ETag of an inventory entry, returning a 304 if the client has it."""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and (
+        if_none_match.strip() == "*"
+        or entry.etag in (tag.strip() for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
 
 
 @router.get("/", response_model=Devices)
-async def get_devices(api_client: ClientInferface = Depends(get_api_client)) -> Devices:
+def get_devices(
+    inventory: InjectDeviceInventory,
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> Devices:
     """
     Get the list of devices.
 
-    This endpoint retrieves the list of available devices through the console access API.
+    This endpoint retrieves the list of available devices from the device inventory,
+    refreshed in the background through the console access API. The response has an
+    ETag, and requests with a matching If-None-Match header get a 304.
+    \f
     Returns:
         Devices: Pydantic model containing a list of Device instances.
     """
     logger.info("Received request to retrieve the list of devices")
     try:
-        devices = api_client.get_devices()
-        logger.debug("Successfully retrieved devices: %s", devices)
-        return devices
+        entry = inventory.get_devices()
+        logger.debug("Successfully retrieved devices: %s", entry.value)
     except Exception as e:
         logger.error("Error retrieving devices: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+    return _conditional_response(entry, response, if_none_match) or entry.value
 
 
 @router.get("/{device_id}", response_model=Device)
-async def get_device(
+def get_device(
     device_id: Annotated[
         str, Path(description="The ID of the device to retrieve information for")
     ],
-    api_client: ClientInferface = Depends(get_api_client),
+    inventory: InjectDeviceInventory,
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ) -> Device:
     """
     Retrieve specific device information.
 
+    The information comes from the device inventory, like the list of devices, and
+    has an ETag.
+    \f
     Args:
         device_id (str): The ID of the device to retrieve models for.
 
@@ -66,9 +100,8 @@ async def get_device(
     """
     logger.info("Received request to retrieve information for device ID: %s", device_id)
     try:
-        device = api_client.get_device(device_id)
-        logger.debug("Successfully retrieved device information: %s", device)
-        return device
+        entry = inventory.get_device(device_id)
+        logger.debug("Successfully retrieved device information: %s", entry.value)
     except Exception as e:
         logger.error(
             "Error retrieving device information for ID %s: %s",
@@ -77,3 +110,4 @@ async def get_device(
             exc_info=True,
         )
         raise HTTPException(status_code=500, detail=str(e))
+    return _conditional_response(entry, response, if_none_match) or entry.value
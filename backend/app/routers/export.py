@@ -0,0 +1,224 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Literal
+from typing import Optional
+
+from app.database.archive import get_archive_dir
+from app.database.archive import scan_archive
+from app.database.export import EXPORT_FORMATS
+from app.database.export import get_export_columns
+from app.database.export import iter_telemetry_pages
+from app.routers.dependencies import database_concurrency_limit
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+@router.get(
+    "/telemetries",
+    response_class=StreamingResponse,
+)
+async def export_telemetries(
+    format: Literal["ndjson", "csv", "arrow"] = Query(
+        "ndjson", description="Format of the exported data"
+    ),
+    device_id: Optional[list[str]] = Query(
+        None, description="Only export telemetries of these devices"
+    ),
+    start_time: Optional[datetime] = Query(
+        None, description="Start time for filtering telemetry data"
+    ),
+    end_time: Optional[datetime] = Query(
+        None, description="End time for filtering telemetry data"
+    ),
+    columns: Optional[list[str]] = Query(
+        None,
+        description="Columns to export. device_id, timestamp and id are always exported",
+    ),
+    after_device_id: Optional[str] = Query(
+        None, description="Device ID of the last telemetry already exported"
+    ),
+    after_timestamp: Optional[datetime] = Query(
+        None, description="Timestamp of the last telemetry already exported"
+    ),
+    after_id: Optional[int] = Query(
+        None, description="ID of the last telemetry already exported"
+    ),
+    limit: Optional[int] = Query(
+        None, gt=0, description="Maximum number of telemetries to export"
+    ),
+) -> StreamingResponse:
+    """
+    Export raw telemetries as NDJSON, CSV or an Arrow IPC stream.
+
+    Telemetries are ordered by (device_id, timestamp, id) and streamed page by page,
+    so the export is not held in memory whatever its size. An interrupted or limited
+    export is resumed by passing the key of the last received telemetry as
+    `after_device_id`, `after_timestamp` and `after_id`.
+    \f
+    Args:
+        format (str): Export format, `ndjson`, `csv` or `arrow`.
+        device_id (Optional[list[str]]): Devices to export, all of them if not set.
+        start_time (Optional[datetime]): Start time for telemetry filtering.
+        end_time (Optional[datetime]): End time for telemetry filtering.
+        columns (Optional[list[str]]): Columns to export, all of them if not set.
+        after_device_id (Optional[str]): Device ID of the last exported telemetry.
+        after_timestamp (Optional[datetime]): Timestamp of the last exported telemetry.
+        after_id (Optional[int]): ID of the last exported telemetry.
+        limit (Optional[int]): Maximum number of telemetries to export.
+
+    Returns:
+        StreamingResponse: The exported telemetries.
+    """
+    if start_time and end_time and start_time > end_time:
+        logger.warning("Start time is after end time")
+        raise HTTPException(
+            status_code=400, detail="Start time cannot be after end time"
+        )
+
+    cursor = (after_device_id, after_timestamp, after_id)
+    if any(value is not None for value in cursor) and None in cursor:
+        raise HTTPException(
+            status_code=400,
+            detail="after_device_id, after_timestamp and after_id must be set together",
+        )
+
+    try:
+        export_columns = get_export_columns(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "arrow":
+        _require_pyarrow("Arrow export")
+
+    logger.info(f"Exporting telemetries as {format}")
+    pages = iter_telemetry_pages(
+        export_columns,
+        device_ids=device_id,
+        start_time=start_time,
+        end_time=end_time,
+        after=cursor if after_id is not None else None,
+        limit=limit,
+    )
+    # The database is read while the body is streamed, after the handler returned
+    await database_concurrency_limit.acquire()
+    return database_concurrency_limit.hold_while_streaming(
+        _stream_export(pages, export_columns, format, "telemetries")
+    )
+
+
+@router.get(
+    "/archive",
+    response_class=StreamingResponse,
+)
+async def export_archive(
+    format: Literal["ndjson", "csv", "arrow"] = Query(
+        "ndjson", description="Format of the exported data"
+    ),
+    device_id: Optional[list[str]] = Query(
+        None, description="Only export telemetries of these devices"
+    ),
+    start_time: Optional[datetime] = Query(
+        None, description="Start time for filtering telemetry data"
+    ),
+    end_time: Optional[datetime] = Query(
+        None, description="End time for filtering telemetry data"
+    ),
+    columns: Optional[list[str]] = Query(
+        None,
+        description="Columns to export. device_id, timestamp and id are always exported",
+    ),
+    limit: Optional[int] = Query(
+        None, gt=0, description="Maximum number of telemetries to export"
+    ),
+) -> StreamingResponse:
+    """
+    Export archived telemetries as NDJSON, CSV or an Arrow IPC stream.
+
+    Telemetries removed from the database by the retention cleanup are archived as
+    Parquet files when `ARCHIVE_DIR` is set. Device and time filters skip the
+    partitions and row groups that cannot match. Telemetries are streamed in
+    archive order, which is not sorted.
+    \f
+    Args:
+        format (str): Export format, `ndjson`, `csv` or `arrow`.
+        device_id (Optional[list[str]]): Devices to export, all of them if not set.
+        start_time (Optional[datetime]): Start time for telemetry filtering.
+        end_time (Optional[datetime]): End time for telemetry filtering.
+        columns (Optional[list[str]]): Columns to export, all of them if not set.
+        limit (Optional[int]): Maximum number of telemetries to export.
+
+    Returns:
+        StreamingResponse: The archived telemetries.
+    """
+    archive_dir = get_archive_dir()
+    if not archive_dir:
+        raise HTTPException(status_code=404, detail="Archival is disabled")
+    _require_pyarrow("Archive export")
+
+    if start_time and end_time and start_time > end_time:
+        logger.warning("Start time is after end time")
+        raise HTTPException(
+            status_code=400, detail="Start time cannot be after end time"
+        )
+
+    try:
+        export_columns = get_export_columns(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Exporting archived telemetries as {format}")
+    batches = scan_archive(
+        archive_dir,
+        export_columns,
+        device_ids=device_id,
+        start_time=start_time,
+        end_time=end_time,
+        limit=limit,
+    )
+    return _stream_export(
+        iterate_in_threadpool(batches), export_columns, format, "archive"
+    )
+
+
+def _require_pyarrow(feature: str):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(
+            status_code=501,
+            detail=f"{feature} requires pyarrow, install the 'export' extra",
+        )
+
+
+def _stream_export(
+    pages: AsyncIterator[list[dict]], columns: list[str], format: str, name: str
+) -> StreamingResponse:
+    media_type, encode = EXPORT_FORMATS[format]
+    extension = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        encode(pages, columns),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'},
+    )
@@ -15,15 +15,19 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 from datetime import datetime
-from datetime import timedelta
 from typing import Annotated
 from typing import Optional
 
+from app.client.circuit_breaker import get_breakers
 from app.client.client_factory import get_api_client
 from app.client.client_interface import ClientInferface
-from app.database.db import get_db
+from app.database.aggregates import series_cache
+from app.database.db import get_async_db
 from app.database.models import TelemetryTable
-from app.database.utils import set_or_adjust_start_and_end_time
+from app.routers.dependencies import console_concurrency_limit
+from app.routers.dependencies import database_concurrency_limit
+from app.routers.dependencies import InjectDataPipeline
+from app.routers.response_cache import TelemetryResponseRoute
 from app.schemas.common import StatusResponse
 from app.schemas.health import DatabaseInfo
 from app.schemas.health import DeviceDataRates
@@ -32,21 +36,28 @@ from app.schemas.health import DeviceTelemetryRates
 from app.schemas.health import DeviceTelemetryRateValueWithTimeStamp
 from app.schemas.health import OverallDataRates
 from app.schemas.health import OverallTelemetryRates
+from app.schemas.processing import CircuitBreakerStatus
+from app.schemas.processing import CollectorHealth
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import Path
 from fastapi import Query
 from sqlalchemy import text
-from sqlalchemy.sql import func
 from sqlmodel import select
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/health", tags=["Health"])
+# Routes computed from the telemetries, with conditional and cached responses
+telemetry_router = APIRouter(route_class=TelemetryResponseRoute)
 
 
-@router.get("/telemetry_rates", response_model=OverallTelemetryRates)
+@telemetry_router.get(
+    "/telemetry_rates",
+    response_model=OverallTelemetryRates,
+    dependencies=[Depends(database_concurrency_limit)],
+)
 async def get_telemetry_rates(
     start_time: Optional[datetime] = Query(
         None, description="Start time for filtering telemetry data"
@@ -58,7 +69,11 @@ async def get_telemetry_rates(
         10000,
         description="Time range (in milliseconds) for averaging the telemetry rate",
     ),
-    db: Session = Depends(get_db),
+    since: Optional[str] = Query(
+        None,
+        description="Cursor of a previous response, to only get the buckets changed since",
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ) -> OverallTelemetryRates:
     """
     Get average telemetry data rates, optionally limited to a time range.
@@ -69,11 +84,14 @@ async def get_telemetry_rates(
     will be filtered to include only telemetries between these timestamps. Otherwise,
     all available telemetry data will be returned. The `average_range` parameter
     allows you to average the data rate over a specific time interval.
+    Passing the `cursor` of a previous response as `since` only returns the buckets
+    changed since that response, the last one of which may have been incomplete.
     \f
     Args:
         start_time (Optional[datetime]): Start time for telemetry filtering.
         end_time (Optional[datetime]): End time for telemetry filtering.
         average_range (Optional[int]): Time range in milliseconds to average telemetry rate (default is 10 seconds).
+        since (Optional[str]): Cursor of a previous response, to only get the buckets changed since.
 
     Returns:
         TelemetryRateResponse: A list of telemetry data responses.
@@ -90,56 +108,48 @@ async def get_telemetry_rates(
             status_code=400, detail="Start time cannot be after end time"
         )
 
-    start_tzaware, end_tzware = set_or_adjust_start_and_end_time(
-        db, TelemetryTable, None, start_time, end_time
-    )
+    try:
+        series, cursor = await series_cache.get_series(
+            db, None, average_range, start_time, since
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     interval_length_seconds: float = float(average_range) / 1000.0
-    interval_duration = timedelta(milliseconds=average_range)
-
-    if not start_tzaware or not end_tzware or end_tzware < start_tzaware:
-        logger.debug("No valid time range found for telemetry rates")
-        return OverallTelemetryRates(grouped_telemetry_rates=[])
+    indexes = series.get_indexes(start_time, end_time, complete=True)
     try:
-        current_interval_start = start_tzaware
-        collected_telemetry_rates = {}
-        while current_interval_start + interval_duration <= end_tzware:
-            current_interval_end = current_interval_start + interval_duration
-
-            grouped_count_query = (
-                select(TelemetryTable.device_id, func.count(TelemetryTable.timestamp))
-                .where(
-                    TelemetryTable.timestamp >= current_interval_start,
-                    TelemetryTable.timestamp < current_interval_end,
-                )
-                .group_by(TelemetryTable.device_id)
-            )
-            telemetry_count_groups: list = db.exec(grouped_count_query).all()
-            for device_id, telemetry_count in telemetry_count_groups:
-                telemetry_rate: float = (
-                    telemetry_count / interval_length_seconds
-                    if interval_length_seconds > 0
-                    else 0.0
+        grouped_telemetry_rates = []
+        for device_id, buckets in series.buckets.items():
+            telemetry_rates = [
+                DeviceTelemetryRateValueWithTimeStamp(
+                    value=bucket.count / interval_length_seconds,
+                    timestamp=series.get_timestamp(index),
                 )
-                telemRateWithTS = DeviceTelemetryRateValueWithTimeStamp(
-                    value=telemetry_rate, timestamp=current_interval_start
+                for index, bucket in sorted(buckets.items())
+                if index in indexes
+                and (cursor is None or series.is_changed(index, bucket, cursor))
+            ]
+            if telemetry_rates:
+                grouped_telemetry_rates.append(
+                    DeviceTelemetryRates(
+                        device_id=device_id, telemetry_rates=telemetry_rates
+                    )
                 )
-                if device_id not in collected_telemetry_rates:
-                    collected_telemetry_rates[device_id] = []
-                collected_telemetry_rates[device_id].append(telemRateWithTS)
-            current_interval_start = current_interval_end
-
-        grouped_telemetry_rates = [
-            DeviceTelemetryRates(device_id=device_id, telemetry_rates=telemetry_rates)
-            for device_id, telemetry_rates in collected_telemetry_rates.items()
-        ]
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-    return OverallTelemetryRates(grouped_telemetry_rates=grouped_telemetry_rates)
+    return OverallTelemetryRates(
+        grouped_telemetry_rates=grouped_telemetry_rates,
+        cursor=series.get_cursor(indexes),
+        delta=cursor is not None,
+    )
 
 
-@router.get("/{device_id}/telemetry_rates", response_model=DeviceTelemetryRates)
+@telemetry_router.get(
+    "/{device_id}/telemetry_rates",
+    response_model=DeviceTelemetryRates,
+    dependencies=[Depends(database_concurrency_limit)],
+)
 async def get_device_telemetry_rates(
     device_id: Annotated[
         str, Path(description="The ID of the device to retrieve telemetries")
@@ -154,7 +164,11 @@ async def get_device_telemetry_rates(
         10000,
         description="Time range (in milliseconds) for averaging the telemetry rate",
     ),
-    db: Session = Depends(get_db),
+    since: Optional[str] = Query(
+        None,
+        description="Cursor of a previous response, to only get the buckets changed since",
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ) -> DeviceTelemetryRates:
     """
     Get average telemetry data rates, optionally limited to a time range.
@@ -165,12 +179,15 @@ async def get_device_telemetry_rates(
     will be filtered to include only telemetries between these timestamps. Otherwise,
     all available telemetry data will be returned. The `average_range` parameter
     allows you to average the data rate over a specific time interval.
+    Passing the `cursor` of a previous response as `since` only returns the buckets
+    changed since that response, the last one of which may have been incomplete.
     \f
     Args:
         device_id (str): The ID of the device to retrieve telemetries
         start_time (Optional[datetime]): Start time for telemetry filtering.
         end_time (Optional[datetime]): End time for telemetry filtering.
         average_range (Optional[int]): Time range in milliseconds to average telemetry rate (default is 10 seconds).
+        since (Optional[str]): Cursor of a previous response, to only get the buckets changed since.
 
     Returns:
         DeviceTelemetryRates: A list of telemetry data responses.
@@ -184,39 +201,27 @@ async def get_device_telemetry_rates(
             status_code=400, detail="Start time cannot be after end time"
         )
 
-    start_tzaware, end_tzware = set_or_adjust_start_and_end_time(
-        db, TelemetryTable, device_id, start_time, end_time
-    )
+    try:
+        series, cursor = await series_cache.get_series(
+            db, device_id, average_range, start_time, since
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     interval_length_seconds: float = float(average_range) / 1000.0
-    interval_duration = timedelta(milliseconds=average_range)
-
-    if not start_tzaware or not end_tzware or end_tzware < start_tzaware:
-        logger.debug("No valid time range found for telemetry rates")
-        return DeviceTelemetryRates(device_id=device_id, telemetry_rates=[])
+    indexes = series.get_indexes(start_time, end_time, complete=True)
     try:
-        current_interval_start = start_tzaware
+        buckets = series.buckets.get(device_id, {})
         telemetry_rates = []
-        while current_interval_start + interval_duration <= end_tzware:
-            current_interval_end = current_interval_start + interval_duration
-
-            count_query = select(func.count(TelemetryTable.timestamp)).where(
-                TelemetryTable.device_id == device_id,
-                TelemetryTable.timestamp >= current_interval_start,
-                TelemetryTable.timestamp < current_interval_end,
-            )
-            telemetry_count: int = db.exec(count_query).all()[0]
-
-            telemetry_rate: float = (
-                telemetry_count / interval_length_seconds
-                if interval_length_seconds > 0
-                else 0.0
-            )
-            telemRateWithTS = DeviceTelemetryRateValueWithTimeStamp(
-                value=telemetry_rate, timestamp=current_interval_start
+        for index in indexes:
+            bucket = buckets.get(index)
+            if cursor is not None and not series.is_changed(index, bucket, cursor):
+                continue
+            telemetry_rates.append(
+                DeviceTelemetryRateValueWithTimeStamp(
+                    value=(bucket.count if bucket else 0) / interval_length_seconds,
+                    timestamp=series.get_timestamp(index),
+                )
             )
-            telemetry_rates.append(telemRateWithTS)
-
-            current_interval_start = current_interval_end
 
         logger.debug("Telemetry rates calculated successfully")
 
@@ -224,10 +229,19 @@ async def get_device_telemetry_rates(
         logger.error("Error calculating telemetry rates: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-    return DeviceTelemetryRates(device_id=device_id, telemetry_rates=telemetry_rates)
+    return DeviceTelemetryRates(
+        device_id=device_id,
+        telemetry_rates=telemetry_rates,
+        cursor=series.get_cursor(indexes),
+        delta=cursor is not None,
+    )
 
 
-@router.get("/data_rates", response_model=OverallDataRates)
+@telemetry_router.get(
+    "/data_rates",
+    response_model=OverallDataRates,
+    dependencies=[Depends(database_concurrency_limit)],
+)
 async def get_data_bandwidth_rates(
     start_time: Optional[datetime] = Query(
         None, description="Start time for data rate calculation"
@@ -238,7 +252,11 @@ async def get_data_bandwidth_rates(
     average_range: Optional[int] = Query(
         10000, description="Time range (in milliseconds) for averaging the data rate"
     ),
-    db: Session = Depends(get_db),
+    since: Optional[str] = Query(
+        None,
+        description="Cursor of a previous response, to only get the buckets changed since",
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ) -> OverallDataRates:
     """
     Calculate the network bandwidth (data rate).
@@ -248,11 +266,14 @@ async def get_data_bandwidth_rates(
     period during which the data rate will be calculated. The `average_range` parameter
     allows you to average the data rate over a specific time interval. Each element of data_rate is
     calculated as sum_over_all_telemetries_in_interval(telemetry_size_in_Kb) / interval_size_in_seconds.
+    Passing the `cursor` of a previous response as `since` only returns the buckets
+    changed since that response, the last one of which may have been incomplete.
     \f
     Args:
         start_time (Optional[datetime]): Start time for data rate calculation.
         end_time (Optional[datetime]): End time for data rate calculation.
         average_range (Optional[int]): Time range in milliseconds to average the data rate (default is 10 seconds).
+        since (Optional[str]): Cursor of a previous response, to only get the buckets changed since.
 
     Returns:
         DataRateResponse: Data rate statistics for the specified time range.
@@ -269,56 +290,46 @@ async def get_data_bandwidth_rates(
         logger.warning("Invalid average range: %d", average_range)
         raise HTTPException(status_code=400, detail="Average range must be positive")
 
-    start_tzaware, end_tzware = set_or_adjust_start_and_end_time(
-        db, TelemetryTable, None, start_time, end_time
-    )
-
+    try:
+        series, cursor = await series_cache.get_series(
+            db, None, average_range, start_time, since
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     interval_length_seconds: float = float(average_range) / 1000.0
-    interval_duration = timedelta(milliseconds=average_range)
-
-    if not start_tzaware or not end_tzware or end_tzware < start_tzaware:
-        logger.debug("No valid time range found for data rates")
-        return OverallDataRates(grouped_data_rates=[])
+    indexes = series.get_indexes(start_time, end_time, complete=False)
     try:
-        current_interval_start = start_tzaware
-        collected_data_rates = {}
-        while current_interval_start < end_tzware:
-            current_interval_end = current_interval_start + interval_duration
-
-            grouped_size_sum_query = (
-                select(
-                    TelemetryTable.device_id,
-                    func.sum(TelemetryTable.size) / interval_length_seconds,
+        grouped_data_rates = []
+        for device_id, buckets in series.buckets.items():
+            data_rates = [
+                DeviceDataRateValueWithTimeStamp(
+                    value=bucket.size / interval_length_seconds,
+                    timestamp=series.get_timestamp(index),
                 )
-                .where(
-                    TelemetryTable.timestamp >= current_interval_start,
-                    TelemetryTable.timestamp < current_interval_end,
+                for index, bucket in sorted(buckets.items())
+                if index in indexes
+                and (cursor is None or series.is_changed(index, bucket, cursor))
+            ]
+            if data_rates:
+                grouped_data_rates.append(
+                    DeviceDataRates(device_id=device_id, data_rates=data_rates)
                 )
-                .group_by(TelemetryTable.device_id)
-            )
-            data_rate_groups = db.exec(grouped_size_sum_query).all()
-            for device_id, data_rate in data_rate_groups:
-                dataRateWithTimeStamp = DeviceDataRateValueWithTimeStamp(
-                    value=data_rate if data_rate else 0,
-                    timestamp=current_interval_start,
-                )
-                if device_id not in collected_data_rates:
-                    collected_data_rates[device_id] = []
-                collected_data_rates[device_id].append(dataRateWithTimeStamp)
-            current_interval_start = current_interval_end
-
-        grouped_data_rates = [
-            DeviceDataRates(device_id=device_id, data_rates=data_rates)
-            for device_id, data_rates in collected_data_rates.items()
-        ]
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-    return OverallDataRates(grouped_data_rates=grouped_data_rates)
+    return OverallDataRates(
+        grouped_data_rates=grouped_data_rates,
+        cursor=series.get_cursor(indexes),
+        delta=cursor is not None,
+    )
 
 
-@router.get("/{device_id}/data_rates", response_model=DeviceDataRates)
+@telemetry_router.get(
+    "/{device_id}/data_rates",
+    response_model=DeviceDataRates,
+    dependencies=[Depends(database_concurrency_limit)],
+)
 async def get_device_data_bandwidth_rates(
     device_id: Annotated[
         str, Path(description="The ID of the device to retrieve telemetries")
@@ -332,7 +343,11 @@ async def get_device_data_bandwidth_rates(
     average_range: Optional[int] = Query(
         10000, description="Time range (in milliseconds) for averaging the data rate"
     ),
-    db: Session = Depends(get_db),
+    since: Optional[str] = Query(
+        None,
+        description="Cursor of a previous response, to only get the buckets changed since",
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ) -> DeviceDataRates:
     """
     Calculate the network bandwidth (data rate).
@@ -342,12 +357,15 @@ async def get_device_data_bandwidth_rates(
     period during which the data rate will be calculated. The `average_range` parameter
     allows you to average the data rate over a specific time interval. Each element of data_rate is
     calculated as sum_over_all_telemetries_in_interval(telemetry_size_in_Kb) / interval_size_in_seconds.
+    Passing the `cursor` of a previous response as `since` only returns the buckets
+    changed since that response, the last one of which may have been incomplete.
     \f
     Args:
         device_id (str): The ID of the device to retrieve telemetries
         start_time (Optional[datetime]): Start time for data rate calculation.
         end_time (Optional[datetime]): End time for data rate calculation.
         average_range (Optional[int]): Time range in milliseconds to average the data rate (default is 10 seconds).
+        since (Optional[str]): Cursor of a previous response, to only get the buckets changed since.
 
     Returns:
         DeviceDataRates: Data rate statistics for the specified time range.
@@ -360,33 +378,26 @@ async def get_device_data_bandwidth_rates(
     if average_range <= 0:
         raise HTTPException(status_code=400, detail="Average range must be positive")
 
-    start_tzaware, end_tzware = set_or_adjust_start_and_end_time(
-        db, TelemetryTable, device_id, start_time, end_time
-    )
-
-    if not start_tzaware or not end_tzware or end_tzware < start_tzaware:
-        return DeviceDataRates(device_id=device_id, data_rates=[])
     try:
-        interval_duration = timedelta(milliseconds=average_range)
-        current_interval_start = start_tzaware
+        series, cursor = await series_cache.get_series(
+            db, device_id, average_range, start_time, since
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    indexes = series.get_indexes(start_time, end_time, complete=False)
+    try:
+        buckets = series.buckets.get(device_id, {})
         data_rates = []
-
-        while current_interval_start < end_tzware:
-            current_interval_end = current_interval_start + interval_duration
-
-            size_sum_query = select(func.avg(TelemetryTable.size)).where(
-                TelemetryTable.device_id == device_id,
-                TelemetryTable.timestamp >= current_interval_start,
-                TelemetryTable.timestamp < current_interval_end,
-            )
-            data_rate = db.exec(size_sum_query).one_or_none()
-            dataRateWithTimeStamp = DeviceDataRateValueWithTimeStamp(
-                value=data_rate if data_rate else 0,
-                timestamp=current_interval_start,
+        for index in indexes:
+            bucket = buckets.get(index)
+            if cursor is not None and not series.is_changed(index, bucket, cursor):
+                continue
+            data_rates.append(
+                DeviceDataRateValueWithTimeStamp(
+                    value=bucket.size / bucket.count if bucket else 0,
+                    timestamp=series.get_timestamp(index),
+                )
             )
-            data_rates.append(dataRateWithTimeStamp)
-
-            current_interval_start = current_interval_end
 
         logger.debug("Data bandwidth rates calculated successfully")
 
@@ -396,11 +407,20 @@ async def get_device_data_bandwidth_rates(
         )
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-    return DeviceDataRates(device_id=device_id, data_rates=data_rates)
+    return DeviceDataRates(
+        device_id=device_id,
+        data_rates=data_rates,
+        cursor=series.get_cursor(indexes),
+        delta=cursor is not None,
+    )
 
 
-@router.get("/database_info", response_model=DatabaseInfo)
-async def get_database_info(db: Session = Depends(get_db)):
+@telemetry_router.get(
+    "/database_info",
+    response_model=DatabaseInfo,
+    dependencies=[Depends(database_concurrency_limit)],
+)
+async def get_database_info(db: AsyncSession = Depends(get_async_db)):
     """
     Fetch database latest telemetry and used storage.
     \f
@@ -413,11 +433,10 @@ async def get_database_info(db: Session = Depends(get_db)):
         statement = select(TelemetryTable.timestamp).order_by(
             TelemetryTable.timestamp.asc()
         )
-        oldest_timestamp = db.exec(statement).first()
+        oldest_timestamp = (await db.exec(statement)).first()
         storage_size = (
-            db.exec(text("SELECT pg_total_relation_size('TelemetryTable');")).scalar()
-            / 1024
-        )
+            await db.execute(text("SELECT pg_total_relation_size('TelemetryTable');"))
+        ).scalar() / 1024
         logger.debug("Successfully fetched database information")
     except Exception as e:
         logger.error("Error fetching database information: %s", str(e), exc_info=True)
@@ -436,8 +455,12 @@ async def get_database_info(db: Session = Depends(get_db)):
     )
 
 
-@router.delete("/data/{device_id}", response_model=StatusResponse)
-async def delete_device_data(
+@router.delete(
+    "/data/{device_id}",
+    response_model=StatusResponse,
+    dependencies=[Depends(console_concurrency_limit)],
+)
+def delete_device_data(
     device_id: Annotated[
         str, Path(description="The ID of the device to delete data from")
     ],
@@ -457,3 +480,31 @@ async def delete_device_data(
             exc_info=True,
         )
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/pipelines", response_model=CollectorHealth)
+def get_pipelines_health(data_pipeline: InjectDataPipeline) -> CollectorHealth:
+    """
+    Get the state of the data collectors of this worker and of the console circuit breakers.
+
+    A collector is `BackingOff` while it waits to retry after failed polls, and
+    `Failed` once it gave up after `PIPELINE_MAX_RESTARTS` consecutive failures. An
+    `Open` circuit breaker fails the calls to its console endpoint immediately, until
+    a trial call succeeds.
+    \f
+    Returns:
+        CollectorHealth: Health of every device pipeline and circuit breaker.
+    """
+    return CollectorHealth(
+        pipelines=[
+            device_pipeline.health()
+            for device_pipeline in list(data_pipeline.device_pipelines.values())
+        ],
+        circuit_breakers=[
+            CircuitBreakerStatus(endpoint=name, state=breaker.state)
+            for name, breaker in get_breakers().items()
+        ],
+    )
+
+
+router.include_router(telemetry_router)
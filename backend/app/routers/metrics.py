@@ -0,0 +1,39 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+
+from fastapi import APIRouter
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/", response_class=Response)
+def get_metrics() -> Response:
+    """
+    Expose the backend metrics in the Prometheus text format.
+
+    Covers the data pipelines (polls, duplicate polls, frames, decode time, queue depth
+    and dropped frames), the latency of the console client methods, the database writes
+    and the WebSocket streaming.
+    \f
+    Returns:
+        Response: Metrics in the Prometheus exposition format.
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,14 +1,15 @@
 import logging
 from datetime import datetime
-from datetime import timedelta
 from typing import Annotated
 from typing import Optional
 
-from app.database.db import get_db
+from app.database.aggregates import series_cache
+from app.database.db import get_async_db
 from app.database.models import TelemetryTable
-from app.database.utils import set_or_adjust_start_and_end_time
+from app.routers.dependencies import database_concurrency_limit
 from app.routers.processing import logger
 from app.routers.processing import router
+from app.routers.response_cache import TelemetryResponseRoute
 from app.schemas.processing import ObjectCounts
 from app.schemas.processing import ObjectCountsWithTimeStamp
 from fastapi import APIRouter
@@ -17,13 +18,17 @@ from fastapi import HTTPException
 from fastapi import Path
 from fastapi import Query
 from sqlalchemy.sql import desc
-from sqlalchemy.sql import func
 from sqlmodel import select
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/object_detection", tags=["Object Detection"])
+router = APIRouter(
+    prefix="/object_detection",
+    tags=["Object Detection"],
+    dependencies=[Depends(database_concurrency_limit)],
+    route_class=TelemetryResponseRoute,
+)
 
 
 @router.get("/counts/{device_id}", response_model=ObjectCountsWithTimeStamp | None)
@@ -31,7 +36,7 @@ async def get_object_counts(
     device_id: Annotated[
         str, Path(description="The ID of the device to retrieve information for")
     ],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> ObjectCountsWithTimeStamp | None:
     """
     Get last available number of detected objects.
@@ -53,7 +58,7 @@ async def get_object_counts(
             .order_by(desc(TelemetryTable.timestamp))
             .limit(1)
         )
-        result_row = db.exec(db_query).one_or_none()
+        result_row = (await db.exec(db_query)).one_or_none()
 
         if result_row:
             object_count = ObjectCountsWithTimeStamp(
@@ -92,7 +97,11 @@ async def get_last_object_count(
         10000,
         description="Time range (in milliseconds) for averaging the telemetry rate",
     ),
-    db: Session = Depends(get_db),
+    since: Optional[str] = Query(
+        None,
+        description="Cursor of a previous response, to only get the buckets changed since",
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ) -> ObjectCounts:
     """
     Get average number of detected objects, optionally limited to a time range.
@@ -101,11 +110,14 @@ async def get_last_object_count(
     will be filtered to include only information between these timestamps. Otherwise,
     all available data will be returned. The `average_range` parameter
     allows you to average the data rate over a specific time interval.
+    Passing the `cursor` of a previous response as `since` only returns the buckets
+    changed since that response, the last one of which may have been incomplete.
     \f
     Args:
         start_time (Optional[datetime]): Start time for filtering.
         end_time (Optional[datetime]): End time for filtering.
         average_range (Optional[int]): Time range in milliseconds to average object counts (default is 10 seconds).
+        since (Optional[str]): Cursor of a previous response, to only get the buckets changed since.
 
     Returns:
         ObjectCounts: A list of object count data responses.
@@ -122,40 +134,25 @@ async def get_last_object_count(
             status_code=400, detail="Start time cannot be after end time"
         )
 
-    start_tzaware, end_tzware = set_or_adjust_start_and_end_time(
-        db, TelemetryTable, device_id, start_time, end_time
-    )
-
-    if not start_tzaware or not end_tzware or end_tzware < start_tzaware:
-        logger.info("No object counts available for the provided time range")
-        return ObjectCounts(object_counts=[])
+    try:
+        series, cursor = await series_cache.get_series(
+            db, device_id, average_range, start_time, since
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    indexes = series.get_indexes(start_time, end_time, complete=True)
 
     try:
-        interval_duration = timedelta(milliseconds=average_range)
-        current_interval_start = start_tzaware
-        object_counts = []
-        while current_interval_start + interval_duration <= end_tzware:
-            current_interval_end = current_interval_start + interval_duration
-
-            db_query = select(
-                func.avg(TelemetryTable.object_count),
-                func.avg(TelemetryTable.object_count_in_zone),
-            ).where(
-                TelemetryTable.timestamp >= current_interval_start,
-                TelemetryTable.timestamp < current_interval_end,
-                TelemetryTable.device_id == device_id,
+        object_counts = [
+            ObjectCountsWithTimeStamp(
+                object_count=bucket.object_count / bucket.count,
+                object_count_in_zone=bucket.object_count_in_zone / bucket.count,
+                timestamp=series.get_timestamp(index),
             )
-            result_tuple = db.exec(db_query).one_or_none()
-            if result_tuple != (None, None):
-                object_counts.append(
-                    ObjectCountsWithTimeStamp(
-                        object_count=result_tuple[0],
-                        object_count_in_zone=result_tuple[1],
-                        timestamp=current_interval_start,
-                    )
-                )
-
-            current_interval_start = current_interval_end
+            for index, bucket in sorted(series.buckets.get(device_id, {}).items())
+            if index in indexes
+            and (cursor is None or series.is_changed(index, bucket, cursor))
+        ]
 
         logger.info(f"Successfully retrieved object counts for device: {device_id}")
     except Exception as e:
@@ -165,4 +162,8 @@ async def get_last_object_count(
         )
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-    return ObjectCounts(object_counts=object_counts)
+    return ObjectCounts(
+        object_counts=object_counts,
+        cursor=series.get_cursor(indexes),
+        delta=cursor is not None,
+    )
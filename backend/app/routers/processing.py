@@ -14,30 +14,51 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import asyncio
+import json
 import logging
 from datetime import datetime
 from datetime import timedelta
 from typing import Annotated
+from typing import Callable
 from typing import Optional
 
 from app.client.client_factory import get_api_client
 from app.client.client_interface import ClientInferface
-from app.database.db import get_db
+from app.data_management.detection_delta import DetectionEncoder
+from app.data_management.image_tiers import FULL_TIER
+from app.data_management.image_tiers import get_tier_names
+from app.database import telemetry_events
+from app.database.db import get_async_db
 from app.database.models import TelemetryTable
 from app.database.utils import set_or_adjust_start_and_end_time
+from app.routers.dependencies import console_concurrency_limit
+from app.routers.dependencies import database_concurrency_limit
 from app.routers.dependencies import InjectDataPipeline
+from app.routers.dependencies import InjectImageStore
+from app.routers.dependencies import InjectStartupJobs
 from app.schemas.common import StatusResponse
+from app.schemas.processing import FrameTimings
+from app.schemas.processing import StartupJobState
+from app.schemas.processing import StartupJobStatus
+from app.schemas.processing import StreamEncoding
 from app.schemas.processing import Telemetries
 from app.schemas.processing import TelemetryWithTimeStamp
+from app.utils.metrics import WEBSOCKET_CLIENTS
+from app.utils.metrics import WEBSOCKET_SEND_SECONDS
+from app.utils.metrics import WEBSOCKET_SENT_BYTES
+from app.utils.timestamp import format_numeric_timestamp
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import Path
 from fastapi import Query
+from fastapi import status
 from fastapi import WebSocket
 from fastapi import WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlmodel import select
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/processing", tags=["Processing"])
@@ -45,8 +66,12 @@ router = APIRouter(prefix="/processing", tags=["Processing"])
 active_data_pipeline = asyncio.Event()
 
 
-@router.get("/image/{device_id}", response_model=str)
-async def get_image(
+@router.get(
+    "/image/{device_id}",
+    response_model=str,
+    dependencies=[Depends(console_concurrency_limit)],
+)
+def get_image(
     device_id: str, api_client: ClientInferface = Depends(get_api_client)
 ) -> str:
     """Get image from device.
@@ -73,53 +98,184 @@ async def get_image(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/images/{digest}", response_class=StreamingResponse)
+def get_stored_image(
+    digest: Annotated[
+        str, Path(description="Digest of the image, from the telemetry image_digest")
+    ],
+    image_store: InjectImageStore,
+) -> StreamingResponse:
+    """Get a frame image persisted in the image store.
+
+    Images are persisted when `IMAGE_STORE_DIR` is set, and identified by the SHA-256
+    digest of their content. They are immutable, so they can be cached indefinitely.
+    \f
+    Args:
+        digest (str): Hex SHA-256 digest of the image
+
+    Returns:
+        StreamingResponse: The image
+    """
+    if image_store is None:
+        raise HTTPException(status_code=404, detail="Image storage is disabled")
+    image = image_store.open(digest)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    media_type, content = image
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{digest}"',
+        },
+    )
+
+
+def mark_data_pipeline_active_callback() -> Callable[[], None]:
+    """Returns a thread-safe callback that flags the data pipeline as active."""
+    loop = asyncio.get_running_loop()
+    return lambda: loop.call_soon_threadsafe(active_data_pipeline.set)
+
+
 @router.post("/start_processing/{device_id}", response_model=StatusResponse)
 async def start_processing(
     device_id: str,
     data_pipeline: InjectDataPipeline,
+    startup_jobs: InjectStartupJobs,
     receive_image: bool = Query(False),
+    catch_up: bool = Query(
+        False,
+        description="Collect every inference produced since the last poll instead of only the latest one",
+    ),
     api_client: ClientInferface = Depends(get_api_client),
 ) -> StatusResponse:
     """This endpoint starts the data processing for a specific device,
        as well as the data collection.
 
+    The request completes once the device has started producing data.
+    The wait happens off the event loop, so other requests are served meanwhile.
+    Requests joining a start-up already in progress for the device with other
+    parameters are rejected with 409.
+
     Args:
         device_id (str): Device ID
         receive_image (bool): Whether or not to receive image data
+        catch_up (bool): Whether or not to collect every missed inference (only without image data)
 
     Returns:
         StatusResponse: Status of the operation
     """
     logger.debug(f"Received request to start processing for device: {device_id}")
     try:
-        api_client.stop_upload_inference_data(device_id=device_id)
+        job = startup_jobs.start(
+            device_id=device_id,
+            api_client=api_client,
+            data_pipeline=data_pipeline,
+            get_image=receive_image,
+            catch_up=catch_up,
+            on_started=mark_data_pipeline_active_callback(),
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    await run_in_threadpool(job.join)
+
+    if job.state != StartupJobState.started:
+        raise HTTPException(status_code=500, detail=job.detail)
+    return job.response
+
+
+@router.post("/start_processing/{device_id}/job", response_model=StartupJobStatus)
+async def start_processing_job(
+    device_id: str,
+    data_pipeline: InjectDataPipeline,
+    startup_jobs: InjectStartupJobs,
+    receive_image: bool = Query(False),
+    catch_up: bool = Query(
+        False,
+        description="Collect every inference produced since the last poll instead of only the latest one",
+    ),
+    api_client: ClientInferface = Depends(get_api_client),
+) -> StartupJobStatus:
+    """This endpoint starts the data processing for a specific device in the background.
+
+    It returns immediately. The progress of the start-up can be followed with
+    `GET /processing/start_processing/{device_id}/job`.
+    Requests joining a start-up already in progress for the device with other
+    parameters are rejected with 409.
 
-        response = api_client.start_upload_inference_data(
-            device_id=device_id, get_image=receive_image
+    Args:
+        device_id (str): Device ID
+        receive_image (bool): Whether or not to receive image data
+        catch_up (bool): Whether or not to collect every missed inference (only without image data)
+
+    Returns:
+        StartupJobStatus: Status of the start-up job
+    """
+    logger.debug(f"Received request to start processing job for device: {device_id}")
+    try:
+        job = startup_jobs.start(
+            device_id=device_id,
+            api_client=api_client,
+            data_pipeline=data_pipeline,
+            get_image=receive_image,
+            catch_up=catch_up,
+            on_started=mark_data_pipeline_active_callback(),
         )
-        if not active_data_pipeline.is_set() or not data_pipeline.is_active(device_id):
-            logger.info(f"Starting data collection for device: {device_id}")
-            data_pipeline.start_data_collection(
-                device_id=device_id, get_image=receive_image
-            )
-            if not active_data_pipeline.is_set():
-                active_data_pipeline.set()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job.status()
 
-        logger.info(f"Data processing started for device: {device_id}")
-        return response
 
-    except Exception as e:
-        logger.error(
-            f"Error while starting processing for device {device_id}: {e}",
-            exc_info=True,
+@router.get("/start_processing/{device_id}/job", response_model=StartupJobStatus)
+async def get_start_processing_job(
+    device_id: str, startup_jobs: InjectStartupJobs
+) -> StartupJobStatus:
+    """This endpoint reports the progress of the latest start-up job of a device.
+
+    Args:
+        device_id (str): Device ID
+
+    Returns:
+        StartupJobStatus: Status of the start-up job
+    """
+    job = startup_jobs.get(device_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail=f"No start-up job found for device: {device_id}"
         )
-        raise HTTPException(status_code=500, detail=str(e))
+    return job.status()
+
+
+@router.delete("/start_processing/{device_id}/job", response_model=StartupJobStatus)
+async def cancel_start_processing_job(
+    device_id: str, startup_jobs: InjectStartupJobs
+) -> StartupJobStatus:
+    """This endpoint cancels the start-up job of a device, if it is still waiting.
+
+    Args:
+        device_id (str): Device ID
+
+    Returns:
+        StartupJobStatus: Status of the start-up job
+    """
+    job = startup_jobs.cancel(device_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail=f"No start-up job found for device: {device_id}"
+        )
+    return job.status()
 
 
-@router.post("/stop_processing/{device_id}", response_model=StatusResponse)
+@router.post(
+    "/stop_processing/{device_id}",
+    response_model=StatusResponse,
+    dependencies=[Depends(console_concurrency_limit)],
+)
 async def stop_processing(
     device_id: str,
     data_pipeline: InjectDataPipeline,
+    startup_jobs: InjectStartupJobs,
     api_client: ClientInferface = Depends(get_api_client),
 ) -> StatusResponse:
     """This endpoint stops the data processing for a specific device, as well as the data collection.
@@ -131,14 +287,17 @@ async def stop_processing(
         StatusResponse: Status of the operation
     """
     logger.debug(f"Received request to stop processing for device: {device_id}")
+    startup_jobs.cancel(device_id)
     try:
         if active_data_pipeline.is_set():
             logger.info(f"Stopping data collection for device: {device_id}")
-            data_pipeline.stop_data_collection(device_id)
+            await run_in_threadpool(data_pipeline.stop_data_collection, device_id)
             if not data_pipeline.is_active():
                 active_data_pipeline.clear()
         logger.info(f"Data processing stopped for device: {device_id}")
-        return api_client.stop_upload_inference_data(device_id=device_id)
+        return await run_in_threadpool(
+            api_client.stop_upload_inference_data, device_id=device_id
+        )
     except Exception as e:
         logger.error(
             f"Error while stopping processing for device {device_id}: {e}",
@@ -148,28 +307,64 @@ async def stop_processing(
 
 
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, data_pipeline: InjectDataPipeline):
-    """This endpoint handles the WebSocket connection for real-time data streaming."""
+async def websocket_endpoint(
+    websocket: WebSocket,
+    data_pipeline: InjectDataPipeline,
+    image_tier: str = Query(FULL_TIER),
+    encoding: StreamEncoding = Query(StreamEncoding.json),
+):
+    """This endpoint handles the WebSocket connection for real-time data streaming.
+
+    Images are sent in the resolution tier given by `image_tier`, either `full` or
+    one of the tiers configured by `IMAGE_TIERS`. With `encoding` set to `delta`,
+    inferences are replaced by keyframes and deltas of their detections, decoded by
+    `app.data_management.detection_delta.DetectionDecoder`.
+    """
     logger.debug("WebSocket connection initiated")
+    if image_tier not in get_tier_names():
+        logger.warning(f"WebSocket connection with unknown image tier: {image_tier}")
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"Unknown image tier, available tiers are {get_tier_names()}",
+        )
+        return
     await websocket.accept()
     websocket_closed = False
+    encoder = DetectionEncoder() if encoding == StreamEncoding.delta else None
+    sent_bytes = WEBSOCKET_SENT_BYTES.labels(encoding=encoding.value)
+    WEBSOCKET_CLIENTS.inc()
+    # Every client receives every frame, in its own queues
+    subscription = data_pipeline.frames.subscribe()
 
     try:
         await active_data_pipeline.wait()
 
         logger.info("WebSocket data streaming started")
         while active_data_pipeline.is_set():
-            data = data_pipeline.get_data()
+            data = await subscription.get(timeout=1.0)
             if data:
-                image, inference, timestamp, device_id = data
+                image, inference, timestamp, device_id, trace = data
+                if image:
+                    # Downscaling is CPU bound, keep it off the event loop
+                    image = await run_in_threadpool(image.get, image_tier)
                 data_to_send = {
                     "image": image,
-                    "inference": inference,
-                    "timestamp": timestamp,
+                    "timestamp": format_numeric_timestamp(timestamp),
                     "deviceId": device_id,
                 }
-                await websocket.send_json(data_to_send)
-            await asyncio.sleep(0.1)
+                if encoder is None:
+                    data_to_send["inference"] = inference
+                else:
+                    data_to_send["detections"] = encoder.encode(device_id, inference)
+                message = json.dumps(
+                    data_to_send, separators=(",", ":"), ensure_ascii=False
+                )
+                with WEBSOCKET_SEND_SECONDS.time():
+                    await websocket.send_text(message)
+                sent_bytes.inc(len(message))
+                # Frames relayed from other workers are traced by those workers
+                if trace is not None:
+                    data_pipeline.tracer.complete(trace)
 
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
@@ -179,12 +374,76 @@ async def websocket_endpoint(websocket: WebSocket, data_pipeline: InjectDataPipe
         logger.error(f"Unexpected error in WebSocket connection: {e}")
 
     finally:
+        WEBSOCKET_CLIENTS.dec()
+        data_pipeline.frames.unsubscribe(subscription)
         if not websocket_closed:
             logger.debug("Closing WebSocket connection")
             await websocket.close()
 
 
-@router.get("/telemetries/{device_id}", response_model=Telemetries)
+@router.get("/telemetry_events", response_class=StreamingResponse)
+async def stream_telemetry_events(
+    device_id: Optional[list[str]] = Query(
+        None, description="Only send the events of these devices"
+    ),
+) -> StreamingResponse:
+    """Stream the new telemetries of every backend worker as Server-Sent Events.
+
+    Each event announces telemetries of a device committed together: the telemetries
+    of `device_id` whose id is between `first_id` and `last_id`. Requires a
+    PostgreSQL database.
+    \f
+    Args:
+        device_id (Optional[list[str]]): Devices to follow, all of them if not set.
+
+    Returns:
+        StreamingResponse: The event stream.
+    """
+    if not telemetry_events.is_enabled():
+        raise HTTPException(
+            status_code=501,
+            detail="Telemetry events require PostgreSQL and TELEMETRY_NOTIFICATIONS",
+        )
+
+    async def format_events():
+        async for event in telemetry_events.subscribe_telemetry(
+            set(device_id) if device_id else None
+        ):
+            data = {
+                **event._asdict(),
+                "last_timestamp": event.last_timestamp.isoformat(),
+            }
+            yield f"data: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(format_events(), media_type="text/event-stream")
+
+
+@router.get("/frame_timings", response_model=FrameTimings)
+def get_frame_timings(
+    data_pipeline: InjectDataPipeline,
+    device_id: Optional[str] = Query(None, description="Only return this device"),
+) -> FrameTimings:
+    """Get the latency breakdown of the last frames of every device, by stage.
+
+    Stages are: `console` (from the device inference to the end of the poll that
+    fetched it), `fetch` (console poll, including the image download), `decode`,
+    `persist` (database commit), `delivery` (waiting for and sending through the
+    WebSocket) and `total` (from the device inference to the WebSocket).
+    \f
+    Args:
+        device_id (Optional[str]): Only return the timings of this device
+
+    Returns:
+        FrameTimings: Count, mean, p50, p95 and max duration of each stage, by device
+    """
+    return FrameTimings(devices=data_pipeline.tracer.summary(device_id))
+
+
+@router.get(
+    "/telemetries/{device_id}",
+    response_model=Telemetries,
+    dependencies=[Depends(database_concurrency_limit)],
+)
 async def get_telemetries(
     device_id: Annotated[
         str, Path(description="The ID of the device to retrieve information for")
@@ -199,7 +458,7 @@ async def get_telemetries(
         10000,
         description="Time range (in milliseconds) for averaging the telemetry rate",
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Telemetries:
     """
     Get raw telemetries or average number of received objects, optionally limited to a time range.
@@ -231,8 +490,12 @@ async def get_telemetries(
             status_code=400, detail="Start time cannot be after end time"
         )
 
-    start_tzaware, end_tzware = set_or_adjust_start_and_end_time(
-        db, TelemetryTable, start_time, end_time
+    start_tzaware, end_tzware = await db.run_sync(
+        set_or_adjust_start_and_end_time,
+        TelemetryTable,
+        device_id,
+        start_time,
+        end_time,
     )
 
     if not start_tzaware or not end_tzware or end_tzware < start_tzaware:
@@ -251,7 +514,7 @@ async def get_telemetries(
                 TelemetryTable.timestamp < current_interval_end,
                 TelemetryTable.device_id == device_id,
             )
-            result_table = db.exec(retrieve_telemetries_query).all()
+            result_table = (await db.exec(retrieve_telemetries_query)).all()
             telem_list = [row.telemetry_str for row in result_table]
 
             telemetries.append(
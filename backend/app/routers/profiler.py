@@ -0,0 +1,118 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+from os import getenv
+
+from app.routers.dependencies import InjectProfiler
+from app.schemas.profiler import ProfilerStatus
+from app.utils.profiler import StackSampler
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+
+def require_profiler_enabled():
+    if getenv("PROFILER") != "True":
+        raise HTTPException(
+            status_code=403, detail="The profiler is disabled, set PROFILER=True"
+        )
+
+
+router = APIRouter(
+    prefix="/profiler",
+    tags=["Profiler"],
+    dependencies=[Depends(require_profiler_enabled)],
+)
+
+
+def _get_status(profiler: StackSampler) -> ProfilerStatus:
+    return ProfilerStatus(
+        running=profiler.is_running(),
+        interval_ms=profiler.interval * 1000,
+        duration_s=profiler.duration,
+        elapsed_s=profiler.elapsed(),
+        samples=profiler.samples,
+    )
+
+
+@router.get("/", response_model=ProfilerStatus)
+def get_profiler_status(profiler: InjectProfiler) -> ProfilerStatus:
+    """
+    Get the status of the sampling profiler.
+    \f
+    Returns:
+        ProfilerStatus: Status of the profiler.
+    """
+    return _get_status(profiler)
+
+
+@router.post("/start", response_model=ProfilerStatus)
+def start_profiler(
+    profiler: InjectProfiler,
+    interval_ms: float = Query(10, gt=0, description="Time between two samples"),
+    duration_s: float = Query(
+        30,
+        gt=0,
+        le=StackSampler.MAX_DURATION,
+        description="Time after which sampling stops by itself",
+    ),
+) -> ProfilerStatus:
+    """
+    Start sampling the stacks of every thread of the server, discarding the previous profile.
+    \f
+    Args:
+        interval_ms (float): Time between two samples, in ms.
+        duration_s (float): Time after which sampling stops by itself, in seconds.
+
+    Returns:
+        ProfilerStatus: Status of the profiler.
+    """
+    logger.info("Received request to start the profiler")
+    try:
+        profiler.start(interval=interval_ms / 1000, duration=duration_s)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _get_status(profiler)
+
+
+@router.post("/stop", response_model=ProfilerStatus)
+def stop_profiler(profiler: InjectProfiler) -> ProfilerStatus:
+    """
+    Stop the sampling profiler, keeping the profile collected so far.
+    \f
+    Returns:
+        ProfilerStatus: Status of the profiler.
+    """
+    logger.info("Received request to stop the profiler")
+    profiler.stop()
+    return _get_status(profiler)
+
+
+@router.get("/flamegraph", response_class=PlainTextResponse)
+def get_flamegraph(profiler: InjectProfiler) -> PlainTextResponse:
+    """
+    Get the profile in the folded stacks format (`thread;module:function;... count`).
+
+    The output can be rendered with flame graph tools such as `flamegraph.pl` or speedscope.
+    \f
+    Returns:
+        PlainTextResponse: Folded stacks, one per line.
+    """
+    return PlainTextResponse(profiler.folded_stacks())
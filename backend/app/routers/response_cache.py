@@ -0,0 +1,225 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Conditional, compressed and cached responses for routes computed from telemetries.
+
+Routes using `TelemetryResponseRoute` get an ETag and a Last-Modified header derived
+from the telemetry watermarks of their device, or of every device for routes without
+a `device_id` path parameter. Requests still matching them get a 304, and the
+responses are kept, with their compressed encodings, until the telemetries change.
+"""
+import gzip
+import logging
+import os
+import re
+from collections import OrderedDict
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
+from hashlib import sha1
+from threading import Lock
+from time import monotonic
+from typing import Callable
+from typing import Optional
+
+from app.database.watermarks import Validator
+from app.database.watermarks import watermarks
+from app.utils.metrics import RESPONSE_CACHE_REQUESTS
+from fastapi import Request
+from fastapi import Response
+from fastapi.routing import APIRoute
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this are sent uncompressed
+MIN_COMPRESSED_SIZE = 500
+
+
+class CachedResponse:
+    """Body of a response for a version of the telemetries, and its encodings."""
+
+    def __init__(self, body: bytes, media_type: str, validator: Validator, etag: str):
+        self.body = body
+        self.media_type = media_type
+        self.validator = validator
+        self.etag = etag
+        self.expires_at = monotonic() + float(os.getenv("RESPONSE_CACHE_TTL", 10))
+        self._encoded: dict[str, bytes] = {"identity": body}
+        self._lock = Lock()
+
+    def encode(self, encoding: str) -> bytes:
+        """Body compressed with `encoding`, compressed at most once."""
+        encoded = self._encoded.get(encoding)
+        if encoded is not None:
+            return encoded
+        with self._lock:
+            encoded = self._encoded.get(encoding)
+            if encoded is None:
+                if encoding == "br":
+                    encoded = brotli.compress(self.body, quality=5)
+                else:
+                    encoded = gzip.compress(self.body, compresslevel=6)
+                self._encoded[encoding] = encoded
+        return encoded
+
+
+class ResponseCache:
+    """Least recently used cache of responses, by path and normalized query."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_SIZE", 256))
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str, validator: Validator) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.validator != validator or entry.expires_at < monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedResponse):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
+
+
+def get_cache_key(request: Request) -> str:
+    """Path and query of a request, with the query parameters sorted."""
+    query = "&".join(
+        f"{name}={value}" for name, value in sorted(request.query_params.multi_items())
+    )
+    return f"{request.url.path}?{query}"
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """Preferred encoding supported by both the client and the server."""
+    accepted = {
+        match.group(1).lower()
+        for match in re.finditer(r"([\w*-]+)(?:\s*;\s*q=([\d.]+))?", accept_encoding)
+        if match.group(2) is None or float(match.group(2)) > 0
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def is_not_modified(request: Request, etag: str, validator: Validator) -> bool:
+    """Whether the conditional headers of the request match the current response."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, the ETag being the same for every encoding
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return validator.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _build_response(
+    request: Request,
+    status_code: int,
+    body: bytes,
+    media_type: str,
+    headers: dict[str, str],
+    entry: Optional[CachedResponse] = None,
+) -> Response:
+    headers["Vary"] = "Accept-Encoding"
+    encoding = "identity"
+    if len(body) >= MIN_COMPRESSED_SIZE:
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+        if entry is not None:
+            body = entry.encode(encoding)
+        elif encoding == "br":
+            body = brotli.compress(body, quality=5)
+        else:
+            body = gzip.compress(body, compresslevel=6)
+    return Response(
+        content=body, status_code=status_code, media_type=media_type, headers=headers
+    )
+
+
+class TelemetryResponseRoute(APIRoute):
+    """Route whose GET responses only depend on the telemetries in the database."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handler(request)
+            validator = watermarks.get_validator(request.path_params.get("device_id"))
+            if validator is None:
+                RESPONSE_CACHE_REQUESTS.labels(self.name, "uncached").inc()
+                response = await handler(request)
+                return _build_response(
+                    request,
+                    response.status_code,
+                    response.body,
+                    response.media_type,
+                    {},
+                )
+
+            key = get_cache_key(request)
+            etag = f'W/"{sha1(f"{key}#{validator.version}".encode()).hexdigest()}"'
+            headers = {
+                "ETag": etag,
+                "Last-Modified": format_datetime(validator.last_modified, usegmt=True),
+                "Cache-Control": "no-cache",
+            }
+            if is_not_modified(request, etag, validator):
+                RESPONSE_CACHE_REQUESTS.labels(self.name, "not_modified").inc()
+                return Response(status_code=304, headers=headers)
+
+            entry = response_cache.get(key, validator)
+            if entry is not None:
+                RESPONSE_CACHE_REQUESTS.labels(self.name, "hit").inc()
+                return _build_response(
+                    request, 200, entry.body, entry.media_type, headers, entry
+                )
+
+            RESPONSE_CACHE_REQUESTS.labels(self.name, "miss").inc()
+            response = await handler(request)
+            if response.status_code != 200:
+                return response
+            entry = CachedResponse(response.body, response.media_type, validator, etag)
+            response_cache.put(key, entry)
+            return _build_response(
+                request, 200, entry.body, entry.media_type, headers, entry
+            )
+
+        return cached_handler
@@ -14,6 +14,7 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 from datetime import datetime
+from typing import Optional
 
 from pydantic import BaseModel
 from pydantic import Field
@@ -25,7 +26,8 @@ class DeviceTelemetryRateValueWithTimeStamp(BaseModel):
         description="Telemetry rate corresponding to the timestamp and a single device.",
     )
     timestamp: datetime = Field(
-        ..., description="Timestamps, returned as ISO 8601 string."
+        ...,
+        description="Start of the bucket, a multiple of `average_range` since the Unix epoch (UTC), returned as ISO 8601 string. The first bucket may start before `start_time`.",
     )
 
 
@@ -35,12 +37,28 @@ class DeviceTelemetryRates(BaseModel):
         ...,
         description="List of telemetry rates with their timestamps for the single device.",
     )
+    cursor: Optional[str] = Field(
+        None,
+        description="Cursor to pass as `since` to only get the buckets changed after this response.",
+    )
+    delta: bool = Field(
+        False,
+        description="Whether only the buckets changed since the `since` cursor are returned, replacing the previous buckets with the same timestamp.",
+    )
 
 
 class OverallTelemetryRates(BaseModel):
     grouped_telemetry_rates: list[DeviceTelemetryRates] = Field(
         ..., description="List of device-specific collections TelemetryRates."
     )
+    cursor: Optional[str] = Field(
+        None,
+        description="Cursor to pass as `since` to only get the buckets changed after this response.",
+    )
+    delta: bool = Field(
+        False,
+        description="Whether only the buckets changed since the `since` cursor are returned, replacing the previous buckets with the same timestamp.",
+    )
 
 
 class DeviceDataRateValueWithTimeStamp(BaseModel):
@@ -48,7 +66,8 @@ class DeviceDataRateValueWithTimeStamp(BaseModel):
         ..., description="Data rate corresponding to the timestamp and a single device."
     )
     timestamp: datetime = Field(
-        ..., description="Timestamps, returned as ISO 8601 string."
+        ...,
+        description="Start of the bucket, a multiple of `average_range` since the Unix epoch (UTC), returned as ISO 8601 string. The first bucket may start before `start_time`.",
     )
 
 
@@ -58,12 +77,28 @@ class DeviceDataRates(BaseModel):
         ...,
         description="List of data rates with their timestamps for the single device.",
     )
+    cursor: Optional[str] = Field(
+        None,
+        description="Cursor to pass as `since` to only get the buckets changed after this response.",
+    )
+    delta: bool = Field(
+        False,
+        description="Whether only the buckets changed since the `since` cursor are returned, replacing the previous buckets with the same timestamp.",
+    )
 
 
 class OverallDataRates(BaseModel):
     grouped_data_rates: list[DeviceDataRates] = Field(
         ..., description="List of device-specific collections of data rates."
     )
+    cursor: Optional[str] = Field(
+        None,
+        description="Cursor to pass as `since` to only get the buckets changed after this response.",
+    )
+    delta: bool = Field(
+        False,
+        description="Whether only the buckets changed since the `since` cursor are returned, replacing the previous buckets with the same timestamp.",
+    )
 
 
 class DatabaseInfo(BaseModel):
@@ -14,6 +14,8 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 from datetime import datetime
+from enum import Enum
+from typing import Optional
 
 from pydantic import BaseModel
 from pydantic import Field
@@ -43,7 +45,8 @@ class ObjectCountsWithTimeStamp(BaseModel):
         description="Average object count of detected objects that are within the defined zone.",
     )
     timestamp: datetime = Field(
-        ..., description="Timestamps, returned as ISO 8601 string."
+        ...,
+        description="Start of the bucket, a multiple of `average_range` since the Unix epoch (UTC), returned as ISO 8601 string. The first bucket may start before `start_time`.",
     )
 
 
@@ -51,3 +54,93 @@ class ObjectCounts(BaseModel):
     object_counts: list[ObjectCountsWithTimeStamp] = Field(
         ..., description="List of object counts (all and in_zone) with their timestamp."
     )
+    cursor: Optional[str] = Field(
+        None,
+        description="Cursor to pass as `since` to only get the buckets changed after this response.",
+    )
+    delta: bool = Field(
+        False,
+        description="Whether only the buckets changed since the `since` cursor are returned, replacing the previous buckets with the same timestamp.",
+    )
+
+
+class StartupJobState(str, Enum):
+    waiting = "Waiting"
+    started = "Started"
+    failed = "Failed"
+    cancelled = "Cancelled"
+
+
+class StartupJobStatus(BaseModel):
+    device_id: str = Field(..., description="The Id of the device being started.")
+    state: StartupJobState = Field(..., description="Current state of the start-up.")
+    attempts: int = Field(
+        ..., description="Number of checks done while waiting for the device to start."
+    )
+    elapsed: float = Field(
+        ..., description="Time spent starting the device, in seconds."
+    )
+    detail: Optional[str] = Field(
+        None, description="Console response or error message, once finished."
+    )
+
+
+class StageLatency(BaseModel):
+    count: int = Field(..., description="Number of frames in the rolling window.")
+    mean_ms: float = Field(..., description="Mean duration of the stage, in ms.")
+    p50_ms: float = Field(..., description="Median duration of the stage, in ms.")
+    p95_ms: float = Field(..., description="95th percentile of the stage, in ms.")
+    max_ms: float = Field(..., description="Maximum duration of the stage, in ms.")
+
+
+class FrameTimings(BaseModel):
+    devices: dict[str, dict[str, StageLatency]] = Field(
+        ...,
+        description="Latency of each stage (console, fetch, decode, persist, delivery and total), by device.",
+    )
+
+
+class StreamEncoding(str, Enum):
+    json = "json"
+    delta = "delta"
+
+
+class PipelineState(str, Enum):
+    running = "Running"
+    backing_off = "BackingOff"
+    failed = "Failed"
+    stopped = "Stopped"
+
+
+class PipelineHealth(BaseModel):
+    device_id: str = Field(..., description="The Id of the device.")
+    state: PipelineState = Field(..., description="Current state of the collector.")
+    consecutive_failures: int = Field(
+        ..., description="Number of failed polls since the last successful one."
+    )
+    restarts: int = Field(
+        ..., description="Number of times the collector resumed after a failure."
+    )
+    last_error: Optional[str] = Field(
+        None, description="Latest error of the collector."
+    )
+    last_poll: Optional[datetime] = Field(
+        None, description="Time of the last successful poll of the console."
+    )
+    last_frame: Optional[datetime] = Field(
+        None, description="Time at which the last new inference was collected."
+    )
+
+
+class CircuitBreakerStatus(BaseModel):
+    endpoint: str = Field(..., description="Console client and method.")
+    state: str = Field(..., description="Closed, Open or HalfOpen.")
+
+
+class CollectorHealth(BaseModel):
+    pipelines: list[PipelineHealth] = Field(
+        ..., description="Collectors of the devices handled by this worker."
+    )
+    circuit_breakers: list[CircuitBreakerStatus] = Field(
+        ..., description="Circuit breakers of the console endpoints."
+    )
@@ -0,0 +1,27 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from pydantic import BaseModel
+from pydantic import Field
+
+
+class ProfilerStatus(BaseModel):
+    running: bool = Field(..., description="Whether the profiler is sampling.")
+    interval_ms: float = Field(..., description="Time between two samples, in ms.")
+    duration_s: float = Field(
+        ..., description="Time after which sampling stops by itself, in seconds."
+    )
+    elapsed_s: float = Field(..., description="Time spent sampling, in seconds.")
+    samples: int = Field(..., description="Number of samples collected.")
@@ -0,0 +1,62 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from threading import Event
+from time import time
+from typing import Callable
+from typing import Optional
+
+
+def wait_until(
+    condition: Callable[[], bool],
+    timeout: float,
+    cancel_event: Optional[Event] = None,
+    progress: Optional[Callable[[int, float], None]] = None,
+    initial_delay: float = 0.25,
+    max_delay: float = 4.0,
+) -> bool:
+    """
+    Polls `condition` with exponential backoff until it holds.
+
+    Args:
+        condition (Callable[[], bool]): Check to be polled.
+        timeout (float): Maximum time to wait, in seconds.
+        cancel_event (Optional[Event]): Event that interrupts the wait when set.
+        progress (Optional[Callable[[int, float], None]]): Called after every failed check
+            with the number of attempts so far and the elapsed time in seconds.
+        initial_delay (float): Delay before the second check, in seconds.
+        max_delay (float): Upper bound of the delay between two checks, in seconds.
+
+    Returns:
+        bool: True if the condition holds, False on timeout or cancellation.
+    """
+    cancel_event = cancel_event or Event()
+    start_time = time()
+    delay = initial_delay
+    attempts = 0
+    while not cancel_event.is_set():
+        attempts += 1
+        if condition():
+            return True
+
+        elapsed = time() - start_time
+        if progress:
+            progress(attempts, elapsed)
+        if elapsed > timeout:
+            return False
+
+        cancel_event.wait(min(delay, max(timeout - elapsed, 0)))
+        delay = min(delay * 2, max_delay)
+    return False
@@ -0,0 +1,141 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Prometheus metrics of the backend internals, exposed by the `/metrics` endpoint."""
+import functools
+from time import perf_counter
+from typing import Callable
+
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+
+# Buckets from 1ms to 30s, for calls to the Console
+CONSOLE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Buckets from 10us to 1s, for in-process work
+FAST_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+
+PIPELINE_POLLS = Counter(
+    "zone_detection_pipeline_polls_total",
+    "Polls of the console made by the data pipeline of a device",
+    ["device_id"],
+)
+PIPELINE_DUPLICATE_POLLS = Counter(
+    "zone_detection_pipeline_duplicate_polls_total",
+    "Polls that returned no inference newer than the last one seen",
+    ["device_id"],
+)
+PIPELINE_FRAMES = Counter(
+    "zone_detection_pipeline_frames_total",
+    "Inferences collected by the data pipeline of a device",
+    ["device_id"],
+)
+PIPELINE_ERRORS = Counter(
+    "zone_detection_pipeline_errors_total",
+    "Errors that stopped the data pipeline of a device",
+    ["device_id"],
+)
+DROPPED_FRAMES = Counter(
+    "zone_detection_dropped_frames_total",
+    "Inferences dropped before being sent or stored, by reason",
+    ["reason"],
+)
+DECODE_SECONDS = Histogram(
+    "zone_detection_inference_decode_seconds",
+    "Time to deserialize an inference and convert it to JSON",
+    buckets=FAST_BUCKETS,
+)
+IMAGE_ENCODE_SECONDS = Histogram(
+    "zone_detection_image_encode_seconds",
+    "Time to downscale and encode a frame image, by tier",
+    ["tier"],
+    buckets=FAST_BUCKETS,
+)
+CONSOLE_REQUEST_SECONDS = Histogram(
+    "zone_detection_console_request_seconds",
+    "Latency of the console client methods",
+    ["client", "method"],
+    buckets=CONSOLE_BUCKETS,
+)
+CONSOLE_REQUEST_ERRORS = Counter(
+    "zone_detection_console_request_errors_total",
+    "Console client method calls that raised an error",
+    ["client", "method"],
+)
+CONSOLE_COALESCED_READS = Counter(
+    "zone_detection_console_coalesced_reads_total",
+    "Console client reads, by whether they were served from the cache, shared with "
+    "an identical read in flight or sent to the console",
+    ["client", "method", "outcome"],
+)
+CONSOLE_TRUNCATED_READS = Counter(
+    "zone_detection_console_truncated_reads_total",
+    "Console reads of missed inferences that could not reach back to the last "
+    "inference collected",
+    ["client", "method"],
+)
+RESPONSE_CACHE_REQUESTS = Counter(
+    "zone_detection_response_cache_requests_total",
+    "Requests to routes computed from telemetries, by whether they were answered "
+    "with a 304, from the response cache or computed",
+    ["route", "outcome"],
+)
+DB_FLUSH_SECONDS = Histogram(
+    "zone_detection_db_flush_seconds",
+    "Time to write telemetries to the database",
+    ["operation"],
+    buckets=CONSOLE_BUCKETS,
+)
+DB_ROWS = Counter(
+    "zone_detection_db_rows_total",
+    "Telemetries written to the database",
+)
+DATA_QUEUE_DEPTH = Gauge(
+    "zone_detection_data_queue_depth",
+    "Inferences waiting to be sent through the WebSocket",
+)
+WEBSOCKET_CLIENTS = Gauge(
+    "zone_detection_websocket_clients",
+    "Connected WebSocket clients",
+)
+WEBSOCKET_SEND_SECONDS = Histogram(
+    "zone_detection_websocket_send_seconds",
+    "Time to send an inference through the WebSocket",
+    buckets=FAST_BUCKETS,
+)
+WEBSOCKET_SENT_BYTES = Counter(
+    "zone_detection_websocket_sent_bytes_total",
+    "Size of the messages sent through the WebSocket, by encoding of the detections",
+    ["encoding"],
+)
+
+
+def observe_console_call(client: str, method: str, function: Callable) -> Callable:
+    """Wrap a console client method to record its latency and errors."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            CONSOLE_REQUEST_ERRORS.labels(client=client, method=method).inc()
+            raise
+        finally:
+            CONSOLE_REQUEST_SECONDS.labels(client=client, method=method).observe(
+                perf_counter() - start
+            )
+
+    return wrapper
@@ -0,0 +1,119 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import sys
+import threading
+from collections import Counter
+from time import monotonic
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """Sampling profiler of every thread of the process.
+
+    A background thread periodically reads the current stack of every other thread
+    with `sys._current_frames`, without installing any tracing or profiling hook, so
+    the profiled code runs at full speed. This covers the event loop as well as the
+    collector threads. Stacks are aggregated in the folded format used by flame graph
+    tools (`thread;module:function;... count`).
+    """
+
+    MAX_DURATION = 600.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stacks: Counter = Counter()
+        self.samples = 0
+        self.interval = 0.01
+        self.duration = 0.0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.01, duration: float = 30.0):
+        """Start sampling, discarding the previous profile.
+
+        Args:
+            interval (float): Seconds between two samples
+            duration (float): Seconds after which sampling stops by itself, capped
+                at MAX_DURATION
+        """
+        with self._lock:
+            if self.is_running():
+                raise RuntimeError("The profiler is already running.")
+            self._stacks = Counter()
+            self.samples = 0
+            self.interval = interval
+            self.duration = min(duration, StackSampler.MAX_DURATION)
+            self.started_at = monotonic()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._sample_periodically, name="stack-sampler", daemon=True
+            )
+            self._thread.start()
+        logger.info(
+            f"Profiler started, sampling every {interval}s for {self.duration}s"
+        )
+
+    def stop(self):
+        """Stop sampling, keeping the profile collected so far."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.stopped_at or monotonic()) - self.started_at
+
+    def folded_stacks(self) -> str:
+        """Profile in the folded stacks format, one `stack count` line per stack."""
+        with self._lock:
+            stacks = list(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks))
+
+    def _sample_periodically(self):
+        own_id = threading.get_ident()
+        deadline = self.started_at + self.duration
+        while not self._stop.wait(self.interval) and monotonic() < deadline:
+            self._sample(own_id)
+        self.stopped_at = monotonic()
+        logger.info(f"Profiler stopped after {self.samples} samples")
+
+    def _sample(self, own_id: int):
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            functions = []
+            while frame is not None:
+                functions.append(
+                    f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+                )
+                frame = frame.f_back
+            functions.append(thread_names.get(thread_id, str(thread_id)))
+            stacks.append(";".join(reversed(functions)).replace(" ", "_"))
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
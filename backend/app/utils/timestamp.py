@@ -14,6 +14,77 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def parse_timestamp(timestamp: str) -> int:
+    """
+    Parses a timestamp emitted by the Consoles into UTC epoch microseconds.
+
+    Both the numeric format ('%Y%m%d%H%M%S%f') and ISO 8601 are accepted. Timestamps
+    without offset are considered UTC.
+
+    Example:
+        >>> parse_timestamp('20250101000000123')
+        1735689600123000
+        >>> parse_timestamp('2025-01-01T00:00:00.123Z')
+        1735689600123000
+
+    Raises:
+        ValueError: If the timestamp is in neither format
+    """
+    if timestamp.isdigit():
+        # Rewritten in the ISO 8601 basic format, which fromisoformat parses much
+        # faster than strptime or int() on every field since Python 3.11
+        if len(timestamp) < 14:
+            raise ValueError(f"Invalid numeric timestamp: {timestamp}")
+        if len(timestamp) > 14:
+            timestamp = f"{timestamp[:8]}T{timestamp[8:14]}.{timestamp[14:20]}+00:00"
+        else:
+            timestamp = f"{timestamp[:8]}T{timestamp[8:14]}+00:00"
+        dt = datetime.fromisoformat(timestamp)
+    else:
+        dt = datetime.fromisoformat(timestamp)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - EPOCH) // MICROSECOND
+
+
+def timestamp_to_datetime(timestamp: int) -> datetime:
+    """
+    Converts UTC epoch microseconds into a timezone aware datetime.
+
+    Example:
+        >>> timestamp_to_datetime(1735689600123000)
+        datetime.datetime(2025, 1, 1, 0, 0, 0, 123000, tzinfo=datetime.timezone.utc)
+    """
+    return EPOCH + timedelta(microseconds=timestamp)
+
+
+def format_numeric_timestamp(timestamp: int) -> str:
+    """
+    Formats UTC epoch microseconds in the numeric format, with milliseconds.
+
+    Example:
+        >>> format_numeric_timestamp(1735689600123000)
+        '20250101000000123'
+    """
+    return timestamp_to_datetime(timestamp).strftime("%Y%m%d%H%M%S%f")[:-3]
+
+
+def format_iso_timestamp(timestamp: int) -> str:
+    """
+    Formats UTC epoch microseconds in the ISO format accepted by the Console filters.
+
+    Example:
+        >>> format_iso_timestamp(1735689600123000)
+        '2025-01-01T00:00:00.123000'
+    """
+    return timestamp_to_datetime(timestamp).strftime("%Y-%m-%dT%H:%M:%S.%f")
 
 
 def convert_iso_timestamp_to_numeric(timestamp: str) -> str:
@@ -26,6 +97,9 @@ def convert_iso_timestamp_to_numeric(timestamp: str) -> str:
         convert_iso_timestamp_to_numeric('20250101000000000')
         '20250101000000000'
     """
+    if timestamp.isdigit():
+        # Already numeric. Python >= 3.11 would otherwise parse it as a basic ISO date
+        return timestamp
     try:
         dt = datetime.fromisoformat(timestamp)
         return dt.strftime("%Y%m%d%H%M%S%f")[:-3]
@@ -0,0 +1,393 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""End-to-end throughput and latency of the backend against the console simulator.
+
+The backend is served by uvicorn in this process, with `CLIENT_TYPE` set to the
+console simulator and the database given by `SQLALCHEMY_DATABASE_URI`. Two phases
+are measured:
+
+- ingestion: devices stream inferences through the pipelines, the database and the
+  WebSocket, measuring frames/s, frame-to-WebSocket latency, rows/s, CPU and memory.
+- queries: the `/health` and `/object_detection` routes answer over a large table.
+  The first request of each route, which reads the table into the cached series, is
+  reported apart as `first_ms` and not compared, a single request being too noisy.
+
+Results are printed as JSON and compared against a stored baseline, exiting with
+status 1 when a metric regressed beyond the tolerance, or when any request failed.
+Runs with failed requests are never saved as a baseline.
+
+Usage, from the `backend/` directory:
+    python -m benchmarks.end_to_end --devices 4 --rate 5 --duration 30
+    python -m benchmarks.end_to_end --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+import threading
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from time import perf_counter
+from time import process_time
+from time import sleep
+from time import time
+
+import httpx
+import uvicorn
+import websockets
+from app.database.db import engine
+from app.database.models import TelemetryTable
+from app.main import app
+from benchmarks.results import compare_with_baseline
+from benchmarks.results import find_errors
+from benchmarks.results import flatten
+from benchmarks.results import load_results
+from benchmarks.results import save_results
+from benchmarks.results import summarize_latencies
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import text
+from sqlmodel import select
+from sqlmodel import Session
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+HISTORY_DEVICE_ID = "benchmark-history"
+
+HIGHER_IS_BETTER = {"frames_per_s", "rows_per_s"}
+# The p99 of the few requests of each route is their slowest one, too noisy to compare
+LOWER_IS_BETTER = {
+    "p50_ms",
+    "frame_to_websocket.p99_ms",
+    "cpu_percent_per_device",
+    "rss_mb_per_device",
+}
+# Absolute changes below these are run-to-run noise
+NOISE_FLOORS = {"_ms": 5.0, "p99_ms": 30.0, "rss_mb_per_device": 1.0}
+
+
+def _get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _count_rows(device_ids: list[str]) -> int:
+    with Session(engine) as session:
+        return session.exec(
+            select(func.count())
+            .select_from(TelemetryTable)
+            .where(TelemetryTable.device_id.in_(device_ids))
+        ).one()
+
+
+def _timestamp_to_epoch(timestamp: str) -> float:
+    return (
+        datetime.strptime(timestamp, "%Y%m%d%H%M%S%f")
+        .replace(tzinfo=timezone.utc)
+        .timestamp()
+    )
+
+
+class Server:
+    """Serves the backend with uvicorn in a background thread."""
+
+    def __init__(self):
+        self.port = _get_free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "Server":
+        self.thread.start()
+        while not self.server.started:
+            sleep(0.05)
+        return self
+
+    def __exit__(self, *args):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def _receive_frames(
+    url: str, stop: asyncio.Event, latencies_ms: list[float]
+) -> int:
+    frames = 0
+    async with websockets.connect(url, max_size=None) as websocket:
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(websocket.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            received_at = time()
+            data = json.loads(message)
+            frames += 1
+            latencies_ms.append(
+                (received_at - _timestamp_to_epoch(data["timestamp"])) * 1000
+            )
+    return frames
+
+
+async def measure_ingestion(
+    base_url: str, device_ids: list[str], duration: float, catch_up: bool
+) -> dict:
+    """Stream every device through the backend and measure the ingestion path."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    f"/processing/start_processing/{device_id}",
+                    params={"catch_up": catch_up},
+                )
+                for device_id in device_ids
+            )
+        )
+
+        stop = asyncio.Event()
+        latencies_ms = []
+        ws_url = base_url.replace("http", "ws", 1) + "/processing/ws"
+        receiver = asyncio.create_task(_receive_frames(ws_url, stop, latencies_ms))
+
+        rows_before = await asyncio.to_thread(_count_rows, device_ids)
+        rss_before = _get_rss_mb()
+        cpu_before = process_time()
+        start = perf_counter()
+        await asyncio.sleep(duration)
+        elapsed = perf_counter() - start
+        cpu_seconds = process_time() - cpu_before
+        rss_after = _get_rss_mb()
+        rows_after = await asyncio.to_thread(_count_rows, device_ids)
+
+        stop.set()
+        frames = await receiver
+        responses += await asyncio.gather(
+            *(
+                client.post(f"/processing/stop_processing/{device_id}")
+                for device_id in device_ids
+            )
+        )
+
+    return {
+        "frames_per_s": frames / elapsed,
+        "rows_per_s": (rows_after - rows_before) / elapsed,
+        "frame_to_websocket": summarize_latencies(latencies_ms),
+        "cpu_percent_per_device": 100 * cpu_seconds / elapsed / len(device_ids),
+        "rss_mb": rss_after,
+        "rss_mb_per_device": max(rss_after - rss_before, 0) / len(device_ids),
+        "errors": sum(response.status_code != 200 for response in responses),
+    }
+
+
+def fill_history(rows: int, span: timedelta):
+    """Insert `rows` telemetries of a single device, spread over the last `span`."""
+    telemetry_str = str(
+        {
+            "perception": {
+                "object_detection_list": [
+                    {
+                        "class_id": 0,
+                        "score": 0.9,
+                        "zone_flag": True,
+                        "bounding_box": {
+                            "left": 10,
+                            "top": 10,
+                            "right": 50,
+                            "bottom": 80,
+                        },
+                    }
+                ]
+            }
+        }
+    )
+    now = datetime.now(timezone.utc)
+    step = span / rows
+    with Session(engine) as session:
+        session.exec(
+            delete(TelemetryTable).where(TelemetryTable.device_id == HISTORY_DEVICE_ID)
+        )
+        for chunk_start in range(0, rows, 5000):
+            session.exec(
+                insert(TelemetryTable),
+                params=[
+                    {
+                        "device_id": HISTORY_DEVICE_ID,
+                        "timestamp": now - span + index * step,
+                        "size": 0.5,
+                        "telemetry_str": telemetry_str,
+                        "object_count": 1,
+                        "object_count_in_zone": index % 2,
+                        "created_at": now,
+                    }
+                    for index in range(chunk_start, min(chunk_start + 5000, rows))
+                ],
+            )
+        session.commit()
+    if engine.dialect.name == "postgresql":
+        # Every run then reads a table without the dead rows of the previous runs
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            connection.execute(text("VACUUM ANALYZE telemetrytable"))
+
+
+def clear_history():
+    with Session(engine) as session:
+        session.exec(
+            delete(TelemetryTable).where(TelemetryTable.device_id == HISTORY_DEVICE_ID)
+        )
+        session.commit()
+
+
+async def measure_queries(base_url: str, requests: int) -> dict:
+    """Measure the response times of the database routes over the history table."""
+    routes = {
+        "health_telemetry_rates": "/health/telemetry_rates",
+        "health_device_telemetry_rates": f"/health/{HISTORY_DEVICE_ID}/telemetry_rates",
+        "health_data_rates": "/health/data_rates",
+        "health_device_data_rates": f"/health/{HISTORY_DEVICE_ID}/data_rates",
+        "health_database_info": "/health/database_info",
+        "object_detection_counts": f"/object_detection/counts/{HISTORY_DEVICE_ID}",
+        "object_detection_counts_last": f"/object_detection/counts/{HISTORY_DEVICE_ID}/last",
+    }
+    if engine.dialect.name != "postgresql":
+        # The storage size of the table is only available on PostgreSQL
+        del routes["health_database_info"]
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        for name, route in routes.items():
+            latencies_ms = []
+            errors = 0
+            for _ in range(requests):
+                start = perf_counter()
+                response = await client.get(route)
+                latencies_ms.append((perf_counter() - start) * 1000)
+                errors += response.status_code != 200
+            results[name] = {
+                **summarize_latencies(latencies_ms[1:]),
+                "first_ms": latencies_ms[0],
+                "errors": errors,
+            }
+    return results
+
+
+def run(args: argparse.Namespace) -> dict:
+    device_ids = [f"sim-device-{i:03d}" for i in range(args.devices)]
+    with Server() as server:
+        base_url = f"http://127.0.0.1:{server.port}"
+        ingestion = asyncio.run(
+            measure_ingestion(base_url, device_ids, args.duration, args.catch_up)
+        )
+        fill_history(args.rows, timedelta(minutes=50))
+        try:
+            queries = asyncio.run(measure_queries(base_url, args.requests))
+        finally:
+            clear_history()
+
+    return {
+        "parameters": {
+            "console": args.console,
+            "devices": args.devices,
+            "rate": args.rate,
+            "detections": args.detections,
+            "duration_s": args.duration,
+            "catch_up": args.catch_up,
+            "rows": args.rows,
+            "requests": args.requests,
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+        },
+        "ingestion": ingestion,
+        "queries": queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--console", choices=["V1", "V2"], default="V2")
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5.0)
+    parser.add_argument("--detections", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--catch-up", action="store_true")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    os.environ["CLIENT_TYPE"] = f"SIMULATOR {args.console}"
+    os.environ["SIMULATOR_DEVICE_COUNT"] = str(args.devices)
+    os.environ["SIMULATOR_INFERENCE_RATE"] = str(args.rate)
+    os.environ["SIMULATOR_DETECTIONS"] = str(args.detections)
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+
+    errors = find_errors(
+        flatten({"ingestion": results["ingestion"], "queries": results["queries"]})
+    )
+    for error in errors:
+        print(f"Failed requests: {error}", file=sys.stderr)
+    if errors:
+        sys.exit(1)
+
+    if args.save_baseline:
+        save_results(args.save_baseline, results)
+        return
+
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline found at {args.baseline}", file=sys.stderr)
+        return
+    baseline = load_results(args.baseline)
+    if baseline["parameters"] != results["parameters"]:
+        print(
+            "Parameters differ from the baseline, comparison may not be meaningful",
+            file=sys.stderr,
+        )
+    regressions = compare_with_baseline(
+        flatten({"ingestion": results["ingestion"], "queries": results["queries"]}),
+        flatten({"ingestion": baseline["ingestion"], "queries": baseline["queries"]}),
+        HIGHER_IS_BETTER,
+        LOWER_IS_BETTER,
+        args.tolerance,
+        NOISE_FLOORS,
+    )
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Micro-benchmarks of the functions run once per frame and device.
+
+Inferences are generated in both FlatBuffers schemas with 0 to 300 detections.
+The database scenarios insert telemetries in the database given by
+`SQLALCHEMY_DATABASE_URI`, one by one and in batches, and delete them afterwards.
+
+Results are printed as JSON, in microseconds per call (or per row for the database
+scenarios), and compared against a stored baseline, exiting with status 1 when a
+function got slower beyond the tolerance. Every function is measured `--runs` times,
+keeping the fastest run. Every run also times a fixed calibration loop, and timings
+are scaled by the ratio of the calibration of the baseline to the current one, so
+that a baseline recorded on another machine remains comparable. When functions seem
+slower, they are measured `--runs` more times, up to `--confirm` times, before being
+reported as regressions.
+
+Usage, from the `backend/` directory:
+    python -m benchmarks.hot_paths
+    python -m benchmarks.hot_paths --save-baseline benchmarks/hot_paths_baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from typing import Callable
+from typing import Optional
+
+from app.data_management.device_stream import save_telemetry_batch
+from app.data_management.device_stream import save_telemetry_data
+from app.data_management.inference_deserialization import deserialize
+from app.data_management.inference_deserialization import detection_data_to_json
+from app.data_management.inference_deserialization import (
+    get_object_count_from_telemetry,
+)
+from app.data_management.inference_deserialization import InferenceFormat
+from app.data_management.inference_serialization import serialize
+from app.database.db import engine
+from app.database.db import init_db
+from app.database.models import TelemetryTable
+from app.utils.timestamp import format_numeric_timestamp
+from app.utils.timestamp import parse_timestamp
+from benchmarks.results import compare_with_baseline
+from benchmarks.results import flatten
+from benchmarks.results import load_results
+from benchmarks.results import save_results
+from sqlalchemy import delete
+from sqlmodel import Session
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "hot_paths_baseline.json")
+DETECTION_COUNTS = [0, 10, 100, 300]
+DEVICE_ID = "benchmark-hot-paths"
+# Absolute changes below this are run-to-run noise
+NOISE_FLOOR_US = 0.5
+
+
+def generate_detections(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    detections = []
+    for _ in range(count):
+        left, top = rng.randint(0, 300), rng.randint(0, 200)
+        detections.append(
+            {
+                "class_id": rng.randrange(3),
+                "score": rng.random(),
+                "zone_flag": rng.random() < 0.5,
+                "bounding_box": {
+                    "left": left,
+                    "top": top,
+                    "right": left + rng.randint(8, 80),
+                    "bottom": top + rng.randint(8, 80),
+                },
+            }
+        )
+    return detections
+
+
+def time_call(function: Callable[[], object], repeat: int) -> float:
+    """Best time of a call over `repeat` runs, in microseconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def benchmark_calibration(repeat: int) -> dict:
+    """Time of a fixed workload, measuring the speed of the machine."""
+    payload = {"detections": generate_detections(10)}
+    return {"loop_us": time_call(lambda: json.loads(json.dumps(payload)), repeat)}
+
+
+def _keep_fastest(results: dict, other: dict) -> dict:
+    return {
+        key: (
+            _keep_fastest(value, other[key])
+            if isinstance(value, dict)
+            else min(value, other[key])
+        )
+        for key, value in results.items()
+    }
+
+
+def scale_to_baseline(
+    metrics: dict[str, float], baseline: dict[str, float]
+) -> dict[str, float]:
+    """Scale timings by the calibration of the baseline relative to the current one.
+
+    The calibration itself is left out, as it only reflects the machine.
+    """
+    reference = baseline.get("calibration.loop_us")
+    current = metrics.get("calibration.loop_us")
+    scale = 1.0
+    if reference and current:
+        scale = reference / current
+        print(
+            f"Scaling timings by {scale:.2f} to the baseline machine", file=sys.stderr
+        )
+    return {
+        name: value * scale
+        for name, value in metrics.items()
+        if not name.startswith("calibration.")
+    }
+
+
+def _benchmark_inference(
+    payload: str, inference_format: InferenceFormat, repeat: int
+) -> dict:
+    flatbuffer = deserialize(payload, inference_format)
+    parsed = detection_data_to_json(flatbuffer)
+    return {
+        "deserialize_us": time_call(
+            lambda: deserialize(payload, inference_format), repeat
+        ),
+        "detection_data_to_json_us": time_call(
+            lambda: detection_data_to_json(flatbuffer), repeat
+        ),
+        "get_object_count_us": time_call(
+            lambda: get_object_count_from_telemetry(parsed), repeat
+        ),
+        "get_object_count_in_zone_us": time_call(
+            lambda: get_object_count_from_telemetry(parsed, filter_in_zone=True),
+            repeat,
+        ),
+    }
+
+
+def benchmark_deserialization(repeat: int) -> dict:
+    return {
+        f"{inference_format.value.lower()}_{count}": _benchmark_inference(
+            serialize(generate_detections(count), inference_format),
+            inference_format,
+            repeat,
+        )
+        for inference_format in InferenceFormat
+        for count in DETECTION_COUNTS
+    }
+
+
+def benchmark_timestamps(repeat: int) -> dict:
+    return {
+        "parse_timestamp_iso_us": time_call(
+            lambda: parse_timestamp("2025-01-01T12:34:56.789Z"), repeat
+        ),
+        "parse_timestamp_numeric_us": time_call(
+            lambda: parse_timestamp("20250101123456789"), repeat
+        ),
+        "format_numeric_timestamp_us": time_call(
+            lambda: format_numeric_timestamp(1735734896789000), repeat
+        ),
+    }
+
+
+def _delete_rows(expected: Optional[int] = None):
+    """Delete the rows of the benchmark, checking that the expected ones were stored.
+
+    The save functions log and drop the telemetries they fail to store, which would
+    otherwise be measured as a fast database.
+    """
+    with Session(engine) as session:
+        deleted = session.exec(
+            delete(TelemetryTable).where(TelemetryTable.device_id == DEVICE_ID)
+        ).rowcount
+        session.commit()
+    if expected is not None and deleted != expected:
+        raise RuntimeError(f"Only {deleted} of {expected} telemetries were stored")
+
+
+def benchmark_persistence(rows: int, batch_sizes: list[int]) -> dict:
+    parsed = detection_data_to_json(
+        deserialize(
+            serialize(generate_detections(10), InferenceFormat.ZONE_DETECTION),
+            InferenceFormat.ZONE_DETECTION,
+        )
+    )
+    timestamps = [
+        parse_timestamp(f"20250101{index // 60:04d}{index % 60:02d}000")
+        for index in range(rows)
+    ]
+    results = {}
+    try:
+        start = timeit.default_timer()
+        for timestamp in timestamps:
+            save_telemetry_data(DEVICE_ID, timestamp, None, parsed)
+        results["save_telemetry_data_per_row_us"] = (
+            (timeit.default_timer() - start) / rows * 1e6
+        )
+        _delete_rows(rows)
+
+        for batch_size in batch_sizes:
+            telemetries = [(timestamp, None, parsed) for timestamp in timestamps]
+            start = timeit.default_timer()
+            for index in range(0, rows, batch_size):
+                save_telemetry_batch(DEVICE_ID, telemetries[index : index + batch_size])
+            results[f"save_telemetry_batch_{batch_size}_per_row_us"] = (
+                (timeit.default_timer() - start) / rows * 1e6
+            )
+            _delete_rows(rows)
+    finally:
+        _delete_rows()
+    return results
+
+
+def measure(args: argparse.Namespace) -> dict:
+    """Measure every function once, along with the calibration loop."""
+    results = {
+        "calibration": benchmark_calibration(args.repeat),
+        "deserialization": benchmark_deserialization(args.repeat),
+        "timestamps": benchmark_timestamps(args.repeat),
+    }
+    if not args.skip_database:
+        results["persistence"] = benchmark_persistence(args.rows, [100, 1000])
+    return results
+
+
+def run(args: argparse.Namespace, previous: Optional[dict] = None) -> dict:
+    """Measure every function `--runs` times, keeping the fastest timings.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+        previous (Optional[dict]): Results of previous runs, also kept if faster
+
+    Returns:
+        dict: Results, with the parameters of the runs
+    """
+    if not args.skip_database:
+        init_db()
+    measurements = (
+        {key: value for key, value in previous.items() if key != "parameters"}
+        if previous
+        else None
+    )
+    for _ in range(args.runs):
+        run_measurements = measure(args)
+        measurements = (
+            run_measurements
+            if measurements is None
+            else _keep_fastest(measurements, run_measurements)
+        )
+    return {
+        "parameters": {
+            "repeat": args.repeat,
+            "rows": args.rows,
+            "database": engine.dialect.name,
+        },
+        **measurements,
+    }
+
+
+def find_regressions(
+    results: dict, baseline_metrics: dict[str, float], tolerance: float
+) -> list[str]:
+    metrics = scale_to_baseline(
+        flatten({k: v for k, v in results.items() if k != "parameters"}),
+        baseline_metrics,
+    )
+    return compare_with_baseline(
+        metrics,
+        baseline_metrics,
+        higher_is_better=set(),
+        lower_is_better={"_us"},
+        tolerance=tolerance,
+        noise_floors={"_us": NOISE_FLOOR_US},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--confirm", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--skip-database", action="store_true")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.save_baseline:
+        print(json.dumps(results, indent=2))
+        save_results(args.save_baseline, results)
+        return
+
+    if not os.path.isfile(args.baseline):
+        print(json.dumps(results, indent=2))
+        print(f"No baseline found at {args.baseline}", file=sys.stderr)
+        return
+    baseline = load_results(args.baseline)
+    if baseline["parameters"] != results["parameters"]:
+        print(
+            "Parameters differ from the baseline, comparison may not be meaningful",
+            file=sys.stderr,
+        )
+    baseline_metrics = flatten({k: v for k, v in baseline.items() if k != "parameters"})
+    regressions = find_regressions(results, baseline_metrics, args.tolerance)
+    for _ in range(args.confirm):
+        if not regressions:
+            break
+        # Slowdowns caused by the machine rarely persist over more runs
+        print(
+            f"Measuring again to confirm {len(regressions)} regressions",
+            file=sys.stderr,
+        )
+        results = run(args, results)
+        regressions = find_regressions(results, baseline_metrics, args.tolerance)
+
+    print(json.dumps(results, indent=2))
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Helpers to summarize benchmark measurements and compare them with a baseline."""
+import json
+import statistics
+from typing import Any
+from typing import Optional
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize_latencies(latencies_ms: list[float]) -> dict[str, float]:
+    """Summarize latencies in milliseconds as their sample count, p50, p99 and max."""
+    if not latencies_ms:
+        return {"samples": 0}
+    return {
+        "samples": len(latencies_ms),
+        "p50_ms": statistics.median(latencies_ms),
+        "p99_ms": percentile(latencies_ms, 99),
+        "max_ms": max(latencies_ms),
+    }
+
+
+def flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    """Flatten nested results into `section.metric` keys, keeping only numbers."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_with_baseline(
+    metrics: dict[str, float],
+    baseline: dict[str, float],
+    higher_is_better: set[str],
+    lower_is_better: set[str],
+    tolerance: float,
+    noise_floors: Optional[dict[str, float]] = None,
+) -> list[str]:
+    """Compare metrics with a baseline.
+
+    Args:
+        metrics (dict[str, float]): Flattened metrics of the current run.
+        baseline (dict[str, float]): Flattened metrics of the baseline run.
+        higher_is_better (set[str]): Suffixes of the metrics that should not decrease.
+        lower_is_better (set[str]): Suffixes of the metrics that should not increase.
+        tolerance (float): Relative change allowed before reporting a regression.
+        noise_floors (Optional[dict[str, float]]): Absolute change, per metric suffix,
+            below which a change is considered noise.
+
+    Returns:
+        list[str]: One description per regressed metric.
+    """
+    regressions = []
+    for name, value in metrics.items():
+        reference = baseline.get(name)
+        if reference is None or reference == 0:
+            continue
+        noise_floor = max(
+            (
+                floor
+                for suffix, floor in (noise_floors or {}).items()
+                if name.endswith(suffix)
+            ),
+            default=0,
+        )
+        if abs(value - reference) < noise_floor:
+            continue
+        change = (value - reference) / abs(reference)
+        if any(name.endswith(suffix) for suffix in higher_is_better):
+            regressed = change < -tolerance
+        elif any(name.endswith(suffix) for suffix in lower_is_better):
+            regressed = change > tolerance
+        else:
+            continue
+        if regressed:
+            regressions.append(
+                f"{name}: {value:.3f} vs baseline {reference:.3f} ({change:+.0%})"
+            )
+    return regressions
+
+
+def find_errors(metrics: dict[str, float]) -> list[str]:
+    """Describe the flattened `errors` metrics that are not zero.
+
+    A run with errors measured failing requests, so it can't be compared nor be
+    used as a baseline.
+    """
+    return [
+        f"{name}: {value:g}"
+        for name, value in metrics.items()
+        if name.split(".")[-1] == "errors" and value
+    ]
+
+
+def load_results(path: str) -> dict[str, Any]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_results(path: str, results: dict[str, Any]):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+        file.write("\n")
@@ -0,0 +1,98 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Latency of a probe route while slow console requests are in flight.
+
+Every request is served in-process through the ASGI app, on a single event loop,
+so any handler blocking the loop shows up as probe latency.
+
+Usage, from the `backend/` directory:
+    python -m benchmarks.route_latency --concurrency 32 --console-latency 0.5
+"""
+import argparse
+import asyncio
+import json
+from time import perf_counter
+from time import sleep
+
+import httpx
+from app.client.client_factory import get_api_client
+from app.main import app
+from app.schemas.device import Devices
+from benchmarks.results import summarize_latencies
+
+
+class SlowConsoleClient:
+    """Console client whose device list takes `latency` seconds to be returned."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def get_devices(self) -> Devices:
+        sleep(self.latency)
+        return Devices(devices=[])
+
+
+async def _load(client: httpx.AsyncClient, stop: asyncio.Event):
+    while not stop.is_set():
+        await client.get("/devices/")
+
+
+async def run(concurrency: int, console_latency: float, duration: float, probe: str):
+    app.dependency_overrides[get_api_client] = lambda: SlowConsoleClient(
+        console_latency
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        stop = asyncio.Event()
+        load = [asyncio.create_task(_load(client, stop)) for _ in range(concurrency)]
+
+        latencies = []
+        end = perf_counter() + duration
+        while perf_counter() < end:
+            start = perf_counter()
+            await client.get(probe)
+            latencies.append((perf_counter() - start) * 1000)
+            await asyncio.sleep(0.05)
+
+        stop.set()
+        await asyncio.gather(*load, return_exceptions=True)
+
+    return {
+        "probe": probe,
+        "concurrency": concurrency,
+        "console_latency_s": console_latency,
+        **summarize_latencies(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--console-latency", type=float, default=0.5)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--probe", default="/")
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        run(args.concurrency, args.console_latency, args.duration, args.probe)
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
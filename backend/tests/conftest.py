@@ -0,0 +1,43 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""Unit tests of the backend.
+
+The database engines are created when `app.database.db` is imported, so the tests
+point them to a SQLite database of their own before importing the application.
+
+Usage, from the `backend/` directory, with the `test` extra installed:
+    python -m pytest tests
+"""
+import os
+import tempfile
+
+import pytest
+
+_database = os.path.join(tempfile.mkdtemp(prefix="backend-tests-"), "test.db")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{_database}"
+os.environ["SQLALCHEMY_ASYNC_DATABASE_URI"] = f"sqlite+aiosqlite:///{_database}"
+os.environ.pop("WORKER_COORDINATION", None)
+
+from app.database.db import engine
+from sqlmodel import SQLModel
+
+
+@pytest.fixture
+def database():
+    """Empty telemetry tables, dropped after the test."""
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
@@ -0,0 +1,172 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+import pytest
+from app.database import aggregates
+from app.database.aggregates import TelemetrySeries
+from app.database.db import async_engine
+from app.database.models import TelemetryTable
+from app.database.watermarks import watermarks
+from sqlalchemy import delete
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+DEVICE_ID = "device-1"
+NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+INTERVAL = timedelta(minutes=10)
+
+
+@pytest.fixture(autouse=True)
+def settle_immediately(monkeypatch):
+    monkeypatch.setattr(aggregates, "SETTLE_SECONDS", 0)
+
+
+def insert(database, *minutes: int):
+    """Store a telemetry created at its timestamp, minutes after NOW."""
+    with Session(database) as session:
+        for minute in minutes:
+            timestamp = NOW + timedelta(minutes=minute)
+            session.add(
+                TelemetryTable(
+                    device_id=DEVICE_ID,
+                    timestamp=timestamp,
+                    size=1.0,
+                    telemetry_str="{}",
+                    object_count=1,
+                    object_count_in_zone=0,
+                    created_at=timestamp,
+                )
+            )
+        session.commit()
+
+
+def update(series: TelemetrySeries):
+    async def run():
+        async with AsyncSession(async_engine) as db:
+            await series.update(db)
+
+    asyncio.run(run())
+
+
+def start(series: TelemetrySeries, index: int) -> datetime:
+    """Start of a bucket, in UTC whether the database keeps time zones or not."""
+    return series.get_timestamp(index).replace(tzinfo=timezone.utc)
+
+
+def counts(series: TelemetrySeries) -> dict[datetime, int]:
+    buckets = series.buckets.get(DEVICE_ID, {})
+    return {
+        start(series, index): buckets[index].count if index in buckets else 0
+        for index in series.get_indexes(None, None, complete=False)
+    }
+
+
+def changed(series: TelemetrySeries, cursor: str) -> list[datetime]:
+    position = series.parse_cursor(cursor)
+    buckets = series.buckets.get(DEVICE_ID, {})
+    return [
+        start(series, index)
+        for index in series.get_indexes(None, None, complete=False)
+        if series.is_changed(index, buckets.get(index), position)
+    ]
+
+
+def test_buckets_are_aligned_on_the_epoch(database):
+    insert(database, 1, 2, 13, 25)
+    series = TelemetrySeries(DEVICE_ID, INTERVAL, None)
+    update(series)
+
+    assert counts(series) == {
+        NOW: 2,
+        NOW + INTERVAL: 1,
+        NOW + 2 * INTERVAL: 1,
+    }
+
+
+def test_update_only_adds_new_telemetries(database):
+    insert(database, 1, 13)
+    series = TelemetrySeries(DEVICE_ID, INTERVAL, None)
+    update(series)
+    insert(database, 15)
+    update(series)
+    update(series)
+
+    assert counts(series) == {NOW: 1, NOW + INTERVAL: 2}
+
+
+def test_cursor_returns_changed_buckets(database):
+    insert(database, 1, 13, 25)
+    series = TelemetrySeries(DEVICE_ID, INTERVAL, None)
+    update(series)
+    indexes = series.get_indexes(None, None, complete=False)
+    cursor = series.get_cursor(indexes)
+
+    # Nothing changed but the last bucket, which may have been incomplete
+    update(series)
+    assert changed(series, cursor) == [NOW + 2 * INTERVAL]
+
+    # Late telemetry in the first bucket, and a new bucket
+    insert(database, 2, 31)
+    update(series)
+    assert changed(series, cursor) == [NOW, NOW + 2 * INTERVAL, NOW + 3 * INTERVAL]
+
+
+def test_cursor_of_another_series_is_ignored(database):
+    insert(database, 1)
+    series = TelemetrySeries(DEVICE_ID, INTERVAL, None)
+    other = TelemetrySeries(DEVICE_ID, INTERVAL, None)
+    update(series)
+    update(other)
+
+    assert series.parse_cursor(other.get_cursor(range(0, 1))) is None
+    with pytest.raises(ValueError):
+        series.parse_cursor("not-a-cursor")
+
+
+def test_earlier_start_time_computes_the_series_again(database):
+    insert(database, 1, 13)
+    series = TelemetrySeries(DEVICE_ID, INTERVAL, NOW + INTERVAL)
+    update(series)
+    token = series.token
+    assert counts(series) == {NOW + INTERVAL: 1}
+
+    series.extend(NOW)
+    update(series)
+    assert series.token != token
+    assert counts(series) == {NOW: 1, NOW + INTERVAL: 1}
+
+
+def test_cleanup_drops_expired_buckets_and_keeps_cursors(database):
+    insert(database, 1, 5, 13, 25)
+    series = TelemetrySeries(DEVICE_ID, INTERVAL, None)
+    update(series)
+    cursor = series.get_cursor(series.get_indexes(None, None, complete=False))
+
+    cutoff = NOW + timedelta(minutes=3)
+    with Session(database) as session:
+        session.exec(delete(TelemetryTable).where(TelemetryTable.created_at < cutoff))
+        session.commit()
+    watermarks.mark_deleted(cutoff)
+    update(series)
+
+    assert series.parse_cursor(cursor) is not None
+    assert counts(series) == {NOW: 1, NOW + INTERVAL: 1, NOW + 2 * INTERVAL: 1}
+    # The bucket of the cutoff was counted again
+    assert changed(series, cursor) == [NOW, NOW + 2 * INTERVAL]
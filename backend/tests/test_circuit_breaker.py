@@ -0,0 +1,146 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import pytest
+from app.client import circuit_breaker
+from app.client.circuit_breaker import CircuitBreaker
+from app.client.circuit_breaker import CircuitOpenError
+from app.client.circuit_breaker import CircuitState
+from app.client.circuit_breaker import ConsoleUnavailableError
+from app.client.circuit_breaker import is_console_failure
+
+
+class ApiError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock) -> CircuitBreaker:
+    return CircuitBreaker(
+        "get_device", window=4, min_calls=2, failure_ratio=0.5, reset_timeout=30
+    )
+
+
+def succeed():
+    return "ok"
+
+
+def fail():
+    raise ConsoleUnavailableError("console down")
+
+
+def not_found():
+    raise ApiError(404)
+
+
+def call(breaker: CircuitBreaker, function):
+    try:
+        return breaker.call(function)
+    except ConsoleUnavailableError:
+        return None
+
+
+def test_console_failures():
+    assert is_console_failure(ConsoleUnavailableError())
+    assert is_console_failure(ApiError(503))
+    assert is_console_failure(ApiError(429))
+    assert not is_console_failure(ApiError(404))
+    assert not is_console_failure(ValueError())
+
+    # Clients wrap the errors of the console API clients
+    try:
+        try:
+            raise ApiError(502)
+        except ApiError as e:
+            raise Exception("API error while retrieving device") from e
+    except Exception as wrapped:
+        assert is_console_failure(wrapped)
+
+
+def test_opens_when_most_calls_fail(breaker):
+    call(breaker, fail)
+    assert breaker.state == CircuitState.closed
+    call(breaker, fail)
+    assert breaker.state == CircuitState.open
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+
+
+def test_errors_of_the_call_itself_are_not_recorded(breaker):
+    for _ in range(4):
+        with pytest.raises(ApiError):
+            breaker.call(not_found)
+    assert breaker.state == CircuitState.closed
+
+
+def test_stays_closed_while_most_calls_succeed(breaker):
+    for function in (succeed, succeed, fail, succeed, succeed, succeed, fail):
+        call(breaker, function)
+    assert breaker.state == CircuitState.closed
+
+
+def test_trial_call_closes_the_circuit(breaker, clock):
+    call(breaker, fail)
+    call(breaker, fail)
+    clock.now += 30
+
+    assert breaker.call(succeed) == "ok"
+    assert breaker.state == CircuitState.closed
+
+
+def test_failed_trial_call_opens_the_circuit_again(breaker, clock):
+    call(breaker, fail)
+    call(breaker, fail)
+    clock.now += 30
+
+    call(breaker, fail)
+    assert breaker.state == CircuitState.open
+    with pytest.raises(CircuitOpenError):
+        breaker.call(succeed)
+
+
+def test_single_trial_call_while_half_open(breaker, clock):
+    call(breaker, fail)
+    call(breaker, fail)
+    clock.now += 30
+
+    def trial():
+        assert breaker.state == CircuitState.half_open
+        with pytest.raises(CircuitOpenError):
+            breaker.call(succeed)
+        return "ok"
+
+    assert breaker.call(trial) == "ok"
+    assert breaker.state == CircuitState.closed
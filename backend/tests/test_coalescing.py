@@ -0,0 +1,99 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+from app.client.coalescing import SingleFlight
+
+
+def test_concurrent_reads_share_one_call():
+    flight = SingleFlight(ttl=60)
+    started = Event()
+    release = Event()
+    calls = []
+
+    def read():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "devices"
+
+    with ThreadPoolExecutor(8) as executor:
+        leader = executor.submit(flight.do, ("get_devices", None), read)
+        started.wait(5)
+        followers = [
+            executor.submit(flight.do, ("get_devices", None), read) for _ in range(7)
+        ]
+        release.set()
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert len(calls) == 1
+    assert results[0] == ("devices", "console")
+    assert all(result == "devices" for result, _ in results)
+    assert {source for _, source in results[1:]} <= {"shared", "cache"}
+
+
+def test_results_are_cached_for_the_ttl():
+    flight = SingleFlight(ttl=60)
+    calls = []
+
+    def read():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do(("get_device", "device-1"), read) == (1, "console")
+    assert flight.do(("get_device", "device-1"), read) == (1, "cache")
+    assert flight.do(("get_device", "device-2"), read) == (2, "console")
+
+
+def test_errors_are_shared_but_not_cached():
+    flight = SingleFlight(ttl=60)
+    calls = []
+
+    def read():
+        calls.append(1)
+        raise RuntimeError("console error")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            flight.do(("get_device", "device-1"), read)
+    assert len(calls) == 2
+
+
+def test_invalidate_drops_the_reads_of_a_device():
+    flight = SingleFlight(ttl=60)
+    flight.do(("get_device", "device-1"), lambda: "old")
+    flight.do(("get_device", "device-2"), lambda: "old")
+    flight.do(("get_devices", None), lambda: "old")
+
+    flight.invalidate("device-1")
+
+    assert flight.do(("get_device", "device-1"), lambda: "new") == ("new", "console")
+    assert flight.do(("get_device", "device-2"), lambda: "new") == ("old", "cache")
+    # The device list describes every device
+    assert flight.do(("get_devices", None), lambda: "new") == ("new", "console")
+
+
+def test_reads_in_flight_during_an_invalidation_are_not_cached():
+    flight = SingleFlight(ttl=60)
+
+    def read():
+        flight.invalidate("device-1")
+        return "stale"
+
+    assert flight.do(("get_device", "device-1"), read) == ("stale", "console")
+    assert flight.do(("get_device", "device-1"), lambda: "new") == ("new", "console")
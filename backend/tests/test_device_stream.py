@@ -0,0 +1,97 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from app.data_management.device_stream import DevicePipeline
+from app.data_management.frame_broadcast import FrameBroadcast
+from app.data_management.inference_deserialization import InferenceFormat
+from app.data_management.inference_serialization import serialize
+from app.database.models import TelemetryTable
+from app.utils.timestamp import parse_timestamp
+from sqlmodel import select
+from sqlmodel import Session
+
+DEVICE_ID = "device-1"
+FORMAT = InferenceFormat.OBJECT_DETECTION_EXPANDED
+
+
+class FakeClient:
+    """Console client returning the given responses to get_inferences_since."""
+
+    def __init__(self, responses: list[list[dict]]):
+        self.responses = list(responses)
+        self.since: list = []
+
+    def get_inferences_since(self, device_id, since=None, limit=500):
+        self.since.append(since)
+        return self.responses.pop(0)
+
+
+def make_inference(inference_id: str, timestamp: str, object_count: int) -> dict:
+    detections = [
+        {
+            "class_id": 0,
+            "score": 0.9,
+            "zone_flag": False,
+            "bounding_box": {"left": 0, "top": 0, "right": 10, "bottom": 10},
+        }
+    ] * object_count
+    return {
+        "id": inference_id,
+        "timestamp": timestamp,
+        "timestamp_us": parse_timestamp(timestamp),
+        "content": serialize(detections, FORMAT),
+    }
+
+
+def collect(database, responses: list[list[dict]]) -> tuple[FakeClient, list]:
+    client = FakeClient(responses)
+    pipeline = DevicePipeline(DEVICE_ID, client, FrameBroadcast())
+    pipeline.console_type = FORMAT
+    for _ in responses:
+        pipeline._collect_missed_data()
+    with Session(database) as session:
+        rows = session.exec(select(TelemetryTable).order_by(TelemetryTable.id)).all()
+    return client, rows
+
+
+def test_collect_missed_data_skips_inferences_already_stored(database):
+    first = make_inference("a:0", "20250101120000000", 1)
+    second = make_inference("a:1", "20250101120001000", 2)
+    # Same timestamp as the last one stored, but another inference
+    third = make_inference("b:0", "20250101120001000", 3)
+    fourth = make_inference("c:0", "20250101120002000", 4)
+
+    client, rows = collect(database, [[first, second], [second, third, fourth]])
+
+    assert client.since == [None, second["timestamp_us"]]
+    assert [row.object_count for row in rows] == [1, 2, 3, 4]
+
+
+def test_collect_missed_data_skips_inferences_older_than_last_seen(database):
+    first = make_inference("a:0", "20250101120001000", 1)
+    late = make_inference("b:0", "20250101120000000", 2)
+    second = make_inference("c:0", "20250101120002000", 3)
+
+    _, rows = collect(database, [[first], [late, second]])
+
+    assert [row.object_count for row in rows] == [1, 3]
+
+
+def test_collect_missed_data_without_new_inferences(database):
+    first = make_inference("a:0", "20250101120000000", 1)
+
+    _, rows = collect(database, [[first], [first], []])
+
+    assert [row.object_count for row in rows] == [1]
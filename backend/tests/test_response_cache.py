@@ -0,0 +1,111 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import pytest
+from app.database.watermarks import watermarks
+from app.routers import response_cache
+from app.routers.response_cache import ResponseCache
+from app.routers.response_cache import TelemetryResponseRoute
+from fastapi import APIRouter
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def calls(monkeypatch) -> list[str]:
+    monkeypatch.setattr(response_cache, "response_cache", ResponseCache())
+    return []
+
+
+@pytest.fixture
+def client(calls) -> TestClient:
+    router = APIRouter(route_class=TelemetryResponseRoute)
+
+    @router.get("/rates/{device_id}")
+    def get_rates(device_id: str) -> dict:
+        calls.append(device_id)
+        return {"device_id": device_id, "computed": len(calls)}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def advance(device_id: str):
+    watermarks.advance(device_id, watermarks.last_id + 1)
+
+
+def test_matching_etag_is_not_modified(client, calls):
+    first = client.get("/rates/etag")
+    second = client.get("/rates/etag", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert calls == ["etag"]
+
+
+def test_matching_last_modified_is_not_modified(client, calls):
+    first = client.get("/rates/last-modified")
+    second = client.get(
+        "/rates/last-modified",
+        headers={"If-Modified-Since": first.headers["Last-Modified"]},
+    )
+
+    assert second.status_code == 304
+    assert calls == ["last-modified"]
+
+
+def test_new_telemetries_change_the_etag(client, calls):
+    first = client.get("/rates/changed")
+    advance("changed")
+    second = client.get(
+        "/rates/changed", headers={"If-None-Match": first.headers["ETag"]}
+    )
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json() == {"device_id": "changed", "computed": 2}
+
+
+def test_telemetries_of_other_devices_keep_the_etag(client, calls):
+    first = client.get("/rates/unchanged")
+    advance("other")
+    second = client.get(
+        "/rates/unchanged", headers={"If-None-Match": first.headers["ETag"]}
+    )
+
+    assert second.status_code == 304
+
+
+def test_responses_are_cached_until_telemetries_change(client, calls):
+    first = client.get("/rates/cached")
+    second = client.get("/rates/cached")
+    advance("cached")
+    third = client.get("/rates/cached")
+
+    assert first.json() == second.json() == {"device_id": "cached", "computed": 1}
+    assert third.json() == {"device_id": "cached", "computed": 2}
+
+
+def test_responses_are_not_validated_without_watermarks(client, calls, monkeypatch):
+    monkeypatch.setattr(watermarks, "enabled", False)
+    first = client.get("/rates/disabled")
+    second = client.get("/rates/disabled", headers={"If-None-Match": "*"})
+
+    assert "ETag" not in first.headers
+    assert second.status_code == 200
+    assert calls == ["disabled", "disabled"]
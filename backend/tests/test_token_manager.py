@@ -0,0 +1,85 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from threading import Lock
+
+import pytest
+from app.client import token_manager
+from app.client.token_manager import TokenManager
+
+
+class TokenEndpoint:
+    """Portal authorization endpoint issuing numbered tokens, as slow as needed."""
+
+    def __init__(self):
+        self.requests = 0
+        self.release = Event()
+        self.release.set()
+        self._lock = Lock()
+
+    def get_token(self, client_id, client_secret, portal_authorization_endpoint):
+        with self._lock:
+            self.requests += 1
+            token = f"token-{self.requests}"
+        self.release.wait(5)
+        return token, 3600
+
+
+@pytest.fixture
+def endpoint(monkeypatch) -> TokenEndpoint:
+    endpoint = TokenEndpoint()
+    monkeypatch.setattr(token_manager, "get_token", endpoint.get_token)
+    monkeypatch.setattr(
+        token_manager,
+        "get_console_settings",
+        lambda: ("https://console", "client", "secret", "https://portal"),
+    )
+    return endpoint
+
+
+@pytest.fixture
+def manager(endpoint):
+    manager = TokenManager(refresh_margin=300)
+    yield manager
+    manager.stop()
+
+
+def test_concurrent_callers_share_one_refresh(manager, endpoint):
+    endpoint.release.clear()
+    with ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(manager.get_access_token) for _ in range(8)]
+        endpoint.release.set()
+        tokens = [future.result() for future in futures]
+
+    assert endpoint.requests == 1
+    assert tokens == ["token-1"] * 8
+
+
+def test_valid_token_is_not_refreshed(manager, endpoint):
+    assert manager.get_access_token() == "token-1"
+    assert manager.get_access_token() == "token-1"
+    assert manager.refresh() == "token-1"
+    assert endpoint.requests == 1
+
+
+def test_forced_refresh_notifies_listeners(manager, endpoint):
+    tokens = []
+    manager.add_listener(tokens.append)
+
+    manager.get_access_token()
+    assert manager.refresh(force=True) == "token-2"
+    assert tokens == ["token-1", "token-2"]